@@ -1,12 +1,12 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, WebSocket, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, conint
 import uvicorn
+import asyncio
 import os
-import tempfile
-import shutil
-from typing import Optional, List
+from typing import Optional, List, Union, Literal
+from functools import partial
 import pandas as pd
 import json
 
@@ -14,7 +14,13 @@ import json
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
 from services.unified_recommender_hf import UnifiedOTTRecommender
+from services.text_batcher import TextEmotionBatcher
+from services.inference_executor import BoundedInferenceExecutor, ExecutorSaturated, DeadlineExceeded
+from services.emotion_stream import EmotionStreamSession
+from services.record_encoder import dumps, select_fields
+from models_config import TEXT_BATCHING_SETTINGS, BATCH_API_SETTINGS, INFERENCE_EXECUTOR_SETTINGS, STREAM_SETTINGS, RECOMMENDATION_SETTINGS
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -37,35 +43,107 @@ app.add_middleware(
 # Global variable to store the recommender instance
 recommender = None
 
+# Micro-batcher for concurrent text requests (None when disabled)
+text_batcher = None
+
+# Bounded executor that runs all blocking model work
+inference_executor = None
+
+# Supported recommendation rankings (see MovieRecommenderHF.RANKINGS)
+Ranking = Literal['genre', 'mood', 'emotion']
+
+# Allowed page size of every recommendation endpoint
+MIN_RECOMMENDATIONS = RECOMMENDATION_SETTINGS['min_recommendations']
+MAX_RECOMMENDATIONS = RECOMMENDATION_SETTINGS['max_recommendations']
+NumRecommendations = conint(ge=MIN_RECOMMENDATIONS, le=MAX_RECOMMENDATIONS)
+
 # Pydantic models for request/response
 class TextRequest(BaseModel):
     text: str
     content_type: str = "movie"
-    num_recommendations: int = 10
+    num_recommendations: NumRecommendations = 10
+    ranking: Optional[Ranking] = None  # None = server default
+    fields: Optional[List[str]] = None  # record fields to return, e.g. without 'overview'; None = all
+    seed: Optional[Union[int, str]] = None  # seed or session token for reproducible, pageable results
+
+class TextBatchRequest(BaseModel):
+    texts: List[str]
+    include_recommendations: bool = False
+    content_type: str = "movie"
+    num_recommendations: NumRecommendations = 10
 
 class RecommendationResponse(BaseModel):
     emotion_analysis: dict
     recommendations: List[dict]
     content_type: str
     num_recommendations: int
+    next_cursor: Optional[str] = None  # pass to /recommendations/next for the following page
+
+class PageResponse(BaseModel):
+    recommendations: List[dict]
+    next_cursor: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[dict]
+    content_type: str
+    num_recommendations: int
 
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
 
+class PreEncodedJSONResponse(Response):
+    """JSON response whose body is already encoded; the bytes are sent as-is"""
+    media_type = "application/json"
+
 # Initialize the recommender system
 @app.on_event("startup")
 async def startup_event():
     """Initialize the recommender system on startup"""
-    global recommender
+    global recommender, text_batcher, inference_executor
     try:
-        print("🚀 Initializing OTT Recommendation System...")
-        recommender = UnifiedOTTRecommender()
+        if recommender is None:
+            print("🚀 Initializing OTT Recommendation System...")
+            recommender = UnifiedOTTRecommender(defer_warmup=True)
+        # else: pre-forked worker, models were loaded by the parent
+        
+        if INFERENCE_EXECUTOR_SETTINGS['kind'] == 'process':
+            # Workers fork now and inherit the models: load them all first
+            recommender.load_components(warmup=False)
+        # Created before the warm-up so process workers fork before any inference
+        inference_executor = BoundedInferenceExecutor(
+            kind=INFERENCE_EXECUTOR_SETTINGS['kind'],
+            max_workers=INFERENCE_EXECUTOR_SETTINGS['max_workers'],
+            max_queue=INFERENCE_EXECUTOR_SETTINGS['max_queue'],
+            default_timeout=INFERENCE_EXECUTOR_SETTINGS['timeout_seconds']
+        )
+        if not recommender.lazy:
+            recommender.start_warmup()
+        
+        if TEXT_BATCHING_SETTINGS['enabled']:
+            # Resolve the classifier per batch so it may still be loading at this point
+            text_batcher = TextEmotionBatcher(
+                partial(call_recommender, 'predict_text_emotions'),
+                max_batch_size=TEXT_BATCHING_SETTINGS['max_batch_size'],
+                max_wait_ms=TEXT_BATCHING_SETTINGS['max_wait_ms'],
+                executor=inference_executor
+            )
+            text_batcher.start()
+            print("✅ Text micro-batching enabled")
+        
         print("✅ System initialized successfully!")
     except Exception as e:
         print(f"❌ Error initializing system: {e}")
         raise e
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers on shutdown"""
+    if text_batcher:
+        await text_batcher.stop()
+    if inference_executor:
+        inference_executor.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -77,41 +155,159 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness)"""
     return {
         "status": "healthy",
         "system_initialized": recommender is not None
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: per-component load state and timings, 503 until ready"""
+    if not recommender:
+        return JSONResponse(status_code=503, content={"ready": False, "components": {}})
+    
+    report = recommender.readiness()
+    return JSONResponse(status_code=200 if report['ready'] else 503, content=report)
+
+def require_component(name):
+    """Fail fast while a component is still loading instead of blocking the event loop on it"""
+    state = recommender.component_state(name)
+    if state == 'failed':
+        raise HTTPException(status_code=500, detail=f"{name} not available")
+    if state == 'loading' or (state == 'pending' and not recommender.lazy):
+        raise HTTPException(status_code=503, detail=f"{name} is still loading, retry shortly")
+
+def call_recommender(method, *args, **kwargs):
+    """Call a recommender method (module-level so process executor workers can run it)"""
+    return getattr(recommender, method)(*args, **kwargs)
+
+async def guarded(awaitable):
+    """Await model work, turning executor backpressure into fast HTTP errors"""
+    try:
+        return await awaitable
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=INFERENCE_EXECUTOR_SETTINGS['reject_status_code'],
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+async def run_inference(method, *args, **kwargs):
+    """Run a blocking recommender method on the bounded inference executor"""
+    return await guarded(inference_executor.run(call_recommender, method, *args, **kwargs))
+
+def parse_fields(fields):
+    """Validate a record field selection up front (400 for unknown fields)"""
+    try:
+        return select_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def encode_recommendations(recommendations, fields):
+    """JSON array bytes for a recommendation frame, joined from the catalog's pre-encoded records when possible"""
+    if recommendations.empty:
+        return b'[]'
+    positions = recommendations.attrs.get('catalog_positions')
+    movie_recommender = recommender.movie_recommender
+    if positions is not None and movie_recommender is not None and movie_recommender.record_encoder is not None:
+        return movie_recommender.encode_records(positions, fields)
+    columns = [field for field in fields if field in recommendations.columns]
+    return recommendations[columns].to_json(orient='records').encode('utf-8')
+
+def recommendation_response(results, fields):
+    """RecommendationResponse body assembled from encoded fragments (no dict conversion or model validation)"""
+    return PreEncodedJSONResponse(b''.join([
+        b'{"emotion_analysis":', dumps(results['emotion_analysis']),
+        b',"recommendations":', encode_recommendations(results['recommendations'], fields),
+        b',"content_type":', dumps(results['content_type']),
+        b',"num_recommendations":', dumps(results['num_recommendations']),
+        b',"next_cursor":', dumps(results.get('next_cursor')),
+        b'}'
+    ]))
+
 @app.post("/analyze/text", response_model=RecommendationResponse)
 async def analyze_text_emotion(request: TextRequest):
     """Analyze text emotion and get recommendations"""
     try:
         if not recommender:
             raise HTTPException(status_code=500, detail="System not initialized")
+        require_component('text_classifier')
+        require_component('movie_recommender')
+        fields = parse_fields(request.fields)
         
         # Get recommendations
-        results = recommender.get_complete_recommendation(
-            text=request.text,
-            content_type=request.content_type,
-            num_recommendations=request.num_recommendations
-        )
+        if text_batcher:
+            # Share the forward pass with other in-flight text requests
+            prediction = await guarded(text_batcher.predict(request.text))
+            results = await run_inference(
+                'recommend_for_emotion',
+                recommender.build_text_analysis(*prediction),
+                content_type=request.content_type,
+                num_recommendations=request.num_recommendations,
+                ranking=request.ranking,
+                seed=request.seed
+            )
+        else:
+            results = await run_inference(
+                'get_complete_recommendation',
+                text=request.text,
+                content_type=request.content_type,
+                num_recommendations=request.num_recommendations,
+                ranking=request.ranking,
+                seed=request.seed
+            )
         
         if 'error' in results:
             raise HTTPException(status_code=400, detail=results['error'])
         
-        # Convert recommendations to list of dicts
-        recommendations_list = []
-        if not results['recommendations'].empty:
-            recommendations_list = results['recommendations'].to_dict('records')
+        return recommendation_response(results, fields)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze/text/batch", response_model=BatchResponse)
+async def analyze_text_emotion_batch(request: TextBatchRequest):
+    """Analyze emotion for many texts in one call, optionally with recommendations per text"""
+    if not recommender:
+        raise HTTPException(status_code=500, detail="System not initialized")
+    
+    max_texts = BATCH_API_SETTINGS['max_texts_per_request']
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="texts must not be empty")
+    if len(request.texts) > max_texts:
+        raise HTTPException(status_code=400, detail=f"At most {max_texts} texts per request")
+    require_component('text_classifier')
+    if request.include_recommendations:
+        require_component('movie_recommender')
+    
+    try:
+        results = await run_inference(
+            'analyze_text_batch',
+            request.texts,
+            include_recommendations=request.include_recommendations,
+            content_type=request.content_type,
+            num_recommendations=request.num_recommendations
+        )
+        if results is None:
+            raise HTTPException(status_code=400, detail="Emotion analysis failed")
+        
+        for item in results:
+            if 'recommendations' in item:
+                item['recommendations'] = item['recommendations'].to_dict('records')
         
-        return RecommendationResponse(
-            emotion_analysis=results['emotion_analysis'],
-            recommendations=recommendations_list,
-            content_type=results['content_type'],
-            num_recommendations=results['num_recommendations']
+        return BatchResponse(
+            results=results,
+            content_type=request.content_type,
+            num_recommendations=request.num_recommendations
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -121,53 +317,284 @@ async def analyze_text_emotion(request: TextRequest):
 async def analyze_image_emotion(
     image_file: UploadFile = File(...),
     content_type: str = Form("movie"),
-    num_recommendations: int = Form(10)
+    num_recommendations: int = Form(10, ge=MIN_RECOMMENDATIONS, le=MAX_RECOMMENDATIONS),
+    ranking: Optional[Ranking] = Form(None),
+    fields: Optional[str] = Form(None),
+    seed: Optional[str] = Form(None)
 ):
-    """Analyze image emotion and get recommendations"""
+    """
+    Analyze image emotion and get recommendations
+    
+    fields: comma-separated record fields (default all); seed: seed or session token
+    """
     try:
         if not recommender:
             raise HTTPException(status_code=500, detail="System not initialized")
+        require_component('face_classifier')
+        require_component('movie_recommender')
+        fields = parse_fields(fields)
         
         # Validate file type
         if not image_file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image file")
         
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-            shutil.copyfileobj(image_file.file, tmp_file)
-            tmp_file_path = tmp_file.name
+        # Keep the upload in memory; it is decoded exactly once downstream
+        image_bytes = await image_file.read()
+        if not image_bytes:
+            raise HTTPException(status_code=400, detail="Empty image file")
+        
+        # Get recommendations
+        results = await run_inference(
+            'get_complete_recommendation',
+            image=image_bytes,
+            content_type=content_type,
+            num_recommendations=num_recommendations,
+            ranking=ranking,
+            seed=seed
+        )
+        
+        if 'error' in results:
+            raise HTTPException(status_code=400, detail=results['error'])
+        
+        return recommendation_response(results, fields)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze/image/batch", response_model=BatchResponse)
+async def analyze_image_emotion_batch(
+    image_files: List[UploadFile] = File(...),
+    include_recommendations: bool = Form(False),
+    content_type: str = Form("movie"),
+    num_recommendations: int = Form(10, ge=MIN_RECOMMENDATIONS, le=MAX_RECOMMENDATIONS)
+):
+    """Analyze emotion for many uploaded images in shared batched forward passes"""
+    if not recommender:
+        raise HTTPException(status_code=500, detail="System not initialized")
+    
+    max_images = BATCH_API_SETTINGS['max_images_per_request']
+    if len(image_files) > max_images:
+        raise HTTPException(status_code=400, detail=f"At most {max_images} images per request")
+    for image_file in image_files:
+        if not (image_file.content_type or '').startswith('image/'):
+            raise HTTPException(status_code=400, detail=f"{image_file.filename} must be an image file")
+    require_component('face_classifier')
+    if include_recommendations:
+        require_component('movie_recommender')
+    
+    try:
+        images = [await image_file.read() for image_file in image_files]
+        results = await run_inference(
+            'analyze_image_batch',
+            images,
+            include_recommendations=include_recommendations,
+            content_type=content_type,
+            num_recommendations=num_recommendations
+        )
+        if results is None:
+            raise HTTPException(status_code=400, detail="Emotion analysis failed")
         
+        for item in results:
+            item['filename'] = image_files[item['index']].filename
+            if 'recommendations' in item:
+                item['recommendations'] = item['recommendations'].to_dict('records')
+        
+        return BatchResponse(
+            results=results,
+            content_type=content_type,
+            num_recommendations=num_recommendations
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Combined route removed per requirements
+
+@app.websocket("/ws/emotion")
+async def emotion_stream(
+    websocket: WebSocket,
+    content_type: str = STREAM_SETTINGS['content_type'],
+    num_recommendations: int = Query(STREAM_SETTINGS['num_recommendations'], ge=MIN_RECOMMENDATIONS, le=MAX_RECOMMENDATIONS)
+):
+    """
+    Live emotion stream
+    
+    The client sends encoded frames (JPEG/PNG) as binary messages. The server
+    replies with an 'emotion' message per analyzed frame (probabilities
+    smoothed over time) and a 'recommendations' message whenever the
+    smoothed emotion class changes. Frames that arrive while inference is
+    busy replace the pending frame, so the stream never falls behind.
+    """
+    await websocket.accept()
+    try:
+        if not recommender:
+            raise HTTPException(status_code=500, detail="System not initialized")
+        require_component('face_classifier')
+        require_component('movie_recommender')
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1013 if e.status_code == 503 else 1011)
+        return
+    
+    session = EmotionStreamSession(STREAM_SETTINGS['frame_stride'], STREAM_SETTINGS['ema_alpha'])
+    
+    async def process_frame(frame_index, frame, pushed_class):
+        """Analyze one frame and push recommendations on a class change; returns the pushed class"""
         try:
-            # Get recommendations
-            results = recommender.get_complete_recommendation(
-                image_path=tmp_file_path,
-                content_type=content_type,
-                num_recommendations=num_recommendations
+            probabilities = await inference_executor.run(
+                call_recommender, 'predict_frame_probabilities', frame,
+                timeout=STREAM_SETTINGS['frame_timeout_seconds']
             )
-            
-            if 'error' in results:
-                raise HTTPException(status_code=400, detail=results['error'])
-            
-            # Convert recommendations to list of dicts
-            recommendations_list = []
-            if not results['recommendations'].empty:
-                recommendations_list = results['recommendations'].to_dict('records')
-            
-            return RecommendationResponse(
-                emotion_analysis=results['emotion_analysis'],
-                recommendations=recommendations_list,
-                content_type=results['content_type'],
-                num_recommendations=results['num_recommendations']
+        except (ExecutorSaturated, DeadlineExceeded):
+            # A fresher frame will be along shortly
+            session.dropped += 1
+            return pushed_class
+        
+        if probabilities is None:
+            session.no_face += 1
+            await websocket.send_json({"type": "emotion", "frame": frame_index, "face_detected": False})
+            return pushed_class
+        
+        session.processed += 1
+        smoother = session.smoother
+        smoother.update(probabilities)
+        emotion_analysis = {
+            'emotion_class': smoother.emotion_class,
+            'emotion_label': recommender.emotion_labels.get(smoother.emotion_class, 'Neutral'),
+            'confidence': smoother.confidence,
+            'method': 'stream'
+        }
+        await websocket.send_json({
+            "type": "emotion",
+            "frame": frame_index,
+            "face_detected": True,
+            "emotion_analysis": emotion_analysis,
+            "probabilities": [round(float(p), 4) for p in smoother.probabilities],
+            "stream": session.stats()
+        })
+        
+        if smoother.emotion_class == pushed_class:
+            return pushed_class
+        try:
+            results = await inference_executor.run(
+                call_recommender, 'recommend_for_emotion', emotion_analysis,
+                content_type=content_type, num_recommendations=num_recommendations,
+                emotion_distribution=smoother.probabilities
             )
-            
-        finally:
-            # Clean up temporary file
-            os.unlink(tmp_file_path)
+        except (ExecutorSaturated, DeadlineExceeded):
+            return pushed_class  # retried on the next analyzed frame
+        if 'error' in results:
+            await websocket.send_json({"type": "error", "detail": results['error']})
+            return pushed_class
         
+        await websocket.send_json({
+            "type": "recommendations",
+            "emotion_analysis": emotion_analysis,
+            # to_json handles the numpy scalar types json.dumps rejects
+            "recommendations": json.loads(results['recommendations'].to_json(orient='records')),
+            "content_type": content_type,
+            "num_recommendations": num_recommendations
+        })
+        return smoother.emotion_class
+    
+    async def process_frames():
+        pushed_class = None
+        while True:
+            frame_index, frame = await session.next_frame()
+            try:
+                pushed_class = await process_frame(frame_index, frame, pushed_class)
+            except Exception as e:
+                # Report and keep the stream alive; if even this send fails the
+                # socket is gone and the task ends (see processor_done)
+                print(f"Error in emotion stream frame {frame_index}: {e}")
+                await websocket.send_json({"type": "error", "frame": frame_index, "detail": str(e)})
+    
+    def processor_done(task):
+        # The receive loop only waits on the client: close the socket so a dead
+        # processor doesn't leave frames unanswered
+        if task.cancelled() or task.exception() is None:
+            return
+        print(f"Emotion stream processor failed: {task.exception()}")
+        asyncio.ensure_future(close_stream())
+    
+    async def close_stream():
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass  # already closed by the client
+    
+    processor = asyncio.create_task(process_frames())
+    processor.add_done_callback(processor_done)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            frame = message.get('bytes')
+            if not frame or len(frame) > STREAM_SETTINGS['max_frame_bytes']:
+                session.invalid += 1
+                continue
+            session.offer(frame)
+    finally:
+        processor.cancel()
+        await asyncio.gather(processor, return_exceptions=True)
+
+@app.get("/recommendations/next", response_model=PageResponse)
+async def next_recommendations(
+    cursor: str,
+    limit: int = Query(10, ge=MIN_RECOMMENDATIONS, le=MAX_RECOMMENDATIONS),
+    fields: Optional[str] = None
+):
+    """Next page of an earlier recommendation request (cursor = its next_cursor); the catalog isn't ranked again"""
+    try:
+        if not recommender:
+            raise HTTPException(status_code=500, detail="System not initialized")
+        require_component('movie_recommender')
+        fields = parse_fields(fields)
+        
+        try:
+            results = await run_inference('next_recommendations', cursor, num_recommendations=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if 'error' in results:
+            raise HTTPException(status_code=400, detail=results['error'])
+        
+        return PreEncodedJSONResponse(b''.join([
+            b'{"recommendations":', encode_recommendations(results['recommendations'], fields),
+            b',"next_cursor":', dumps(results['next_cursor']),
+            b'}'
+        ]))
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Combined route removed per requirements
+@app.get("/search")
+async def search_movies(q: str, limit: int = 10, prefix: bool = True):
+    """Full-text search over titles and overviews (BM25 ranking, type-ahead on the last word)"""
+    try:
+        if not recommender:
+            raise HTTPException(status_code=500, detail="System not initialized")
+        if not 1 <= limit <= 100:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+        require_component('movie_recommender')
+        
+        results = await run_inference('search_movies', q, num_results=limit, prefix=prefix)
+        return {
+            "query": q,
+            "results": json.loads(results.to_json(orient='records')) if not results.empty else [],
+            "count": len(results)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/emotions")
 async def get_emotions():
@@ -194,6 +621,14 @@ async def get_content_types():
         ]
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Inference queue depth, wait times and load-shedding counters"""
+    return {
+        "inference_executor": inference_executor.stats() if inference_executor else None,
+        "text_batching": text_batcher.stats() if text_batcher else None
+    }
+
 @app.get("/stats")
 async def get_stats():
     """Get system statistics"""
@@ -201,14 +636,26 @@ async def get_stats():
         if not recommender:
             return {"error": "System not initialized"}
         
+        # Only report on components that have finished loading
+        movie_recommender = recommender.movie_recommender if recommender.component_state('movie_recommender') == 'ready' else None
+        text_classifier = recommender.text_classifier if recommender.component_state('text_classifier') == 'ready' else None
+        
         # Get movie count from the recommender
-        movie_count = len(recommender.movie_recommender.movies_df) if recommender.movie_recommender.movies_df is not None else 0
+        movie_count = len(movie_recommender.movies_df) if movie_recommender and movie_recommender.movies_df is not None else 0
+        
+        text_cache = text_classifier.cache if text_classifier and text_classifier.cache else None
         
         return {
             "total_movies": movie_count,
+            "catalog_memory": movie_recommender.memory_usage() if movie_recommender else None,
+            "available_rankings": movie_recommender.available_rankings() if movie_recommender else None,
             "supported_emotions": 7,
             "supported_content_types": 2,
-            "system_status": "operational"
+            "text_cache": text_cache.stats() if text_cache else None,
+            "image_cache": recommender.image_cache.stats() if recommender.image_cache else None,
+            "text_inference": text_classifier.timing_stats() if text_classifier else None,
+            "text_batching": text_batcher.stats() if text_batcher else None,
+            "system_status": "operational" if recommender.readiness()['ready'] else "starting"
         }
     except Exception as e:
         return {"error": str(e)}
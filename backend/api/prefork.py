@@ -0,0 +1,193 @@
+"""
+Pre-fork server for the OTT Recommendation System API
+
+The parent process loads both transformer models and the movie catalog once,
+freezes the garbage collector and then forks the uvicorn workers. Workers
+inherit the loaded objects copy-on-write, so model weights are stored in
+memory once per node instead of once per worker.
+
+Usage:
+    python prefork.py --workers 4
+    kill -USR1 <parent pid>    # print a per-worker memory report
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+# Forked children must not inherit a running tokenizers thread pool
+os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+from models_config import API_SETTINGS, PREFORK_SETTINGS
+
+import uvicorn
+import app as app_module
+from services.unified_recommender_hf import UnifiedOTTRecommender
+
+
+def read_process_memory(pid):
+    """
+    Read resident and shared memory of a process from /proc/<pid>/smaps_rollup
+
+    Returns:
+        dict: rss/pss/shared/private sizes in MB (empty if unavailable)
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])  # kB
+    except OSError:
+        return {}
+
+    def mb(*names):
+        return round(sum(fields.get(name, 0) for name in names) / 1024, 1)
+
+    return {
+        'rss_mb': mb('Rss'),
+        'pss_mb': mb('Pss'),
+        'shared_mb': mb('Shared_Clean', 'Shared_Dirty'),
+        'private_mb': mb('Private_Clean', 'Private_Dirty')
+    }
+
+
+def memory_report(parent_pid, worker_pids):
+    """Per-process memory for the parent and each worker"""
+    report = [dict(role='parent', pid=parent_pid, **read_process_memory(parent_pid))]
+    for pid in worker_pids:
+        report.append(dict(role='worker', pid=pid, **read_process_memory(pid)))
+    return report
+
+
+def print_memory_report(parent_pid, worker_pids):
+    report = memory_report(parent_pid, worker_pids)
+    print("📊 Memory per process (MB):")
+    print(f"   {'role':<8}{'pid':>8}{'rss':>10}{'pss':>10}{'shared':>10}{'private':>10}")
+    for row in report:
+        print(f"   {row['role']:<8}{row['pid']:>8}{row.get('rss_mb', 0):>10}{row.get('pss_mb', 0):>10}"
+              f"{row.get('shared_mb', 0):>10}{row.get('private_mb', 0):>10}")
+    total_pss = sum(row.get('pss_mb', 0) for row in report)
+    print(f"   Total PSS: {total_pss:.1f} MB across {len(worker_pids)} workers")
+
+
+def preload():
+    """Load every component in the parent before any worker exists"""
+    print("🚀 Pre-loading OTT Recommendation System in the parent process...")
+    recommender = UnifiedOTTRecommender(lazy=False, background=False, defer_warmup=True)
+    app_module.recommender = recommender
+
+    # Move everything allocated so far into the permanent generation: the
+    # collector then never writes to these objects' headers, which would
+    # otherwise un-share their pages in every worker.
+    gc.collect()
+    gc.freeze()
+    return recommender
+
+
+def bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock, threads_per_worker, log_level):
+    """Body of a forked worker: serve the shared socket until told to stop"""
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    if threads_per_worker:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+
+    config = uvicorn.Config(app_module.app, log_level=log_level, workers=1)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn_worker(sock, threads_per_worker, log_level):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(sock, threads_per_worker, log_level)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(host, port, workers, threads_per_worker=None, log_level='info', report_interval=0):
+    preload()
+    sock = bind_socket(host, port)
+
+    if not threads_per_worker:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    parent_pid = os.getpid()
+    worker_pids = set()
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(worker_pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: print_memory_report(parent_pid, sorted(worker_pids)))
+
+    for _ in range(workers):
+        worker_pids.add(spawn_worker(sock, threads_per_worker, log_level))
+    print(f"✅ Serving on http://{host}:{port} with {workers} pre-forked workers "
+          f"({threads_per_worker} torch threads each)")
+
+    next_report = time.monotonic() + report_interval if report_interval else None
+    while worker_pids:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+
+        if pid:
+            worker_pids.discard(pid)
+            if not stopping:
+                # Replacement workers fork from the same preloaded parent
+                print(f"⚠️ Worker {pid} exited with status {status}, restarting")
+                worker_pids.add(spawn_worker(sock, threads_per_worker, log_level))
+            continue
+
+        if next_report and time.monotonic() >= next_report:
+            print_memory_report(parent_pid, sorted(worker_pids))
+            next_report = time.monotonic() + report_interval
+        time.sleep(0.5)
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fork server for the OTT Recommendation System API")
+    parser.add_argument('--host', default=API_SETTINGS['host'])
+    parser.add_argument('--port', type=int, default=API_SETTINGS['port'])
+    parser.add_argument('--workers', type=int, default=PREFORK_SETTINGS['workers'])
+    parser.add_argument('--threads-per-worker', type=int, default=PREFORK_SETTINGS['threads_per_worker'])
+    parser.add_argument('--report-interval', type=int, default=PREFORK_SETTINGS['memory_report_interval'])
+    args = parser.parse_args()
+
+    serve(
+        args.host,
+        args.port,
+        args.workers,
+        threads_per_worker=args.threads_per_worker,
+        log_level=API_SETTINGS['log_level'],
+        report_interval=args.report_interval
+    )
@@ -1,3 +1,5 @@
+import os
+
 TEXT_EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
 # Alternatives:
 # TEXT_EMOTION_MODEL = "cardiffnlp/twitter-roberta-base-emotion"
@@ -33,12 +35,72 @@ FACE_EMOTION_MAPPING = {
     'neutral': 6       # Neutral
 }
 
+# Face Detection (runs before the face emotion model)
+FACE_DETECTION_SETTINGS = {
+    'detector': 'haar',  # 'haar' or 'dnn' (OpenCV ResNet-10 SSD from the local files below)
+    'max_side': 640,  # detect on a copy downscaled to this longest side; 0 disables downscaling
+    'haar_cascade_path': None,  # None = OpenCV's bundled frontal face cascade
+    'haar_scale_factor': 1.1,
+    'haar_min_neighbors': 4,
+    'dnn_prototxt_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts', 'face_detector', 'deploy.prototxt'),
+    'dnn_model_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts', 'face_detector', 'res10_300x300_ssd_iter_140000.caffemodel'),
+    'dnn_confidence': 0.5,
+    'max_faces': 8,  # faces classified per image (largest first), in one batched forward pass
+    'aggregation': 'largest'  # 'largest', 'weighted_mean' or 'majority' across detected faces
+}
+
 # Model Settings
 MODEL_SETTINGS = {
     'return_all_scores': True,
     'device': 'auto',  # 'auto', 'cpu', 'cuda'
-    'batch_size': 1,
-    'max_length': 512
+    'batch_size': 16,  # max texts per padded forward pass
+    'max_length': 512,  # longer texts are truncated to this many tokens
+    'length_buckets': [16, 32, 64, 128, 256, 512]  # a padded batch never spans two buckets
+}
+
+# Startup / Component Loading
+STARTUP_SETTINGS = {
+    'parallel': True,  # load text, face and movie components concurrently
+    'lazy': False,  # load each component on first use instead of at startup
+    'background': True,  # don't block server startup; /ready reports progress
+    'warmup': True  # run one throwaway inference after each component loads
+}
+
+# Text Inference Backend
+TEXT_INFERENCE_SETTINGS = {
+    'backend': 'pytorch',  # 'pytorch' (fp32 eager), 'pytorch_int8' (dynamic quantized), 'onnx' (ONNX Runtime)
+    'artifact_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts'),
+    'onnx_opset': 14,
+    'num_threads': None,  # intra-op threads, None = library default
+    'parity_atol': 0.05  # max probability difference vs fp32 in the parity check
+}
+
+# Text Emotion Result Cache
+TEXT_CACHE_SETTINGS = {
+    'enabled': True,
+    'max_entries': 10000,
+    'max_bytes': 16 * 1024 * 1024,
+    'ttl_seconds': None,  # None = entries live until evicted
+    'casefold': False,  # True treats "Feeling Sad" and "feeling sad" as the same input
+    'shared_backend': None,  # None or 'sqlite' to share hits between workers on one host
+    'sqlite_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts', 'text_emotion_cache.sqlite3'),
+    'shared_max_entries': 100000
+}
+
+# Image Emotion Result Cache (perceptual hash; near-duplicate uploads skip detection and inference)
+IMAGE_CACHE_SETTINGS = {
+    'enabled': True,
+    'max_entries': 2048,
+    'max_bytes': 8 * 1024 * 1024,
+    'hamming_tolerance': 6,  # max differing pHash bits (of 64) still treated as the same image
+    'hash_size': 8  # 8 -> 64-bit hash
+}
+
+# Text Micro-Batching (groups concurrent /analyze/text requests into one forward pass)
+TEXT_BATCHING_SETTINGS = {
+    'enabled': True,
+    'max_batch_size': 16,
+    'max_wait_ms': 10  # how long the first request in a batch waits for company
 }
 
 EMOTION_LABELS = {
@@ -56,10 +118,71 @@ CONTENT_TYPES = {
     'tv_series': 'TV Series'
 }
 
+# Movie Catalog (preprocessed once, then loaded from a memory-mapped snapshot)
+CATALOG_SETTINGS = {
+    'dataset': 'mt0rm0/movie_descriptors_small',
+    'dataset_revision': None,  # pinned Hub commit; None follows the dataset's current commit
+    'seed': 42,  # synthetic ratings/years, so the catalog is identical across restarts
+    'snapshot_enabled': True,
+    'snapshot_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts', 'catalog'),
+    'verify_checksum': True  # sha256 of every snapshot file on load
+}
+
+# Overview Embeddings (offline job: python services/embedding_index.py build)
+EMBEDDING_SETTINGS = {
+    'enabled': True,  # load embeddings for the current catalog version if the job has been run
+    'model': 'sentence-transformers/all-MiniLM-L6-v2',  # local sentence encoder, mean-pooled
+    'batch_size': 64,
+    'max_length': 256,  # overview tokens kept per text
+    'device': 'auto',  # 'auto', 'cpu', 'cuda'
+    'artifact_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts', 'embeddings'),
+    'index': 'exact',  # 'exact' (BLAS over every row) or 'ivf' (needs `build --ivf`)
+    'ivf_lists': 0,  # k-means lists for `build --ivf`, 0 = 4 * sqrt(rows)
+    'ivf_probes': 8,  # lists scored per query
+    'mood_candidates': 2000,  # nearest overviews per emotion's mood query
+    'mood_weight': 4.0  # score = base score + mood_weight * cosine similarity
+}
+
+# Movie Emotion Profiles (offline job: python services/emotion_profiles.py build)
+EMOTION_PROFILE_SETTINGS = {
+    'enabled': True,  # load profiles for the current catalog version if the job has been run
+    'artifact_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts', 'emotion_profiles'),
+    'chunk_size': 512,  # overviews per resumable chunk
+    'workers': 0,  # worker processes, 0 = one per CPU core
+    'threads_per_worker': 1,  # torch intra-op threads in each worker
+    'weight': 2.0  # score = base score + weight * (user emotion distribution . movie profile)
+}
+
 RECOMMENDATION_SETTINGS = {
     'default_num_recommendations': 10,
     'max_recommendations': 50,
-    'min_recommendations': 1
+    'min_recommendations': 1,
+    'ranking': 'genre',  # default ranking: 'genre' (cluster + rating), 'mood' (needs embeddings) or 'emotion' (needs profiles)
+    'pool_cache_size': 1024  # sampled candidate orders kept for cursor pagination (0 = recompute every page)
+}
+
+# Inference Executor (keeps model work off the event loop, sheds load when full)
+INFERENCE_EXECUTOR_SETTINGS = {
+    'kind': 'thread',  # 'thread' or 'process' (forked workers inherit loaded models)
+    'max_workers': 4,
+    'max_queue': 32,  # jobs allowed to wait; further requests are rejected immediately
+    'timeout_seconds': 30.0,  # per-request deadline including queue wait (> 0, or None for no limit)
+    'reject_status_code': 503  # 503 or 429 when the queue is full
+}
+
+BATCH_API_SETTINGS = {
+    'max_texts_per_request': 64,  # upper bound for /analyze/text/batch
+    'max_images_per_request': 16  # upper bound for /analyze/image/batch
+}
+
+# Live Emotion Stream (/ws/emotion WebSocket)
+STREAM_SETTINGS = {
+    'frame_stride': 3,  # analyze every Nth received frame
+    'ema_alpha': 0.3,  # weight of the newest frame in the smoothed probabilities
+    'frame_timeout_seconds': 2.0,  # per-frame inference deadline; late frames are dropped
+    'max_frame_bytes': 2 * 1024 * 1024,
+    'content_type': 'movie',
+    'num_recommendations': 10
 }
 
 API_SETTINGS = {
@@ -69,6 +192,13 @@ API_SETTINGS = {
     'log_level': 'info'
 }
 
+# Pre-fork serving (api/prefork.py): models load once in the parent, workers share them copy-on-write
+PREFORK_SETTINGS = {
+    'workers': 4,
+    'threads_per_worker': None,  # torch intra-op threads per worker, None = cores // workers
+    'memory_report_interval': 300  # seconds between per-worker memory reports, 0 to disable
+}
+
 FRONTEND_SETTINGS = {
     'port': 3000,
     'host': 'localhost'
@@ -0,0 +1,397 @@
+"""
+Result caches for emotion inference
+
+TextEmotionCache is a bounded, content-addressed LRU keyed by a hash of the
+normalized input text, with an optional TTL and an optional shared SQLite
+store so several workers on one host can reuse each other's results.
+
+ImageEmotionCache is keyed by a perceptual hash of the decoded image and
+matches near-duplicates (re-encodes, small crops) within a Hamming distance.
+Near-duplicate hits return the emotion result without the per-face boxes,
+which belong to the cached image's pixel grid.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+# Add config path to import
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+from models_config import TEXT_CACHE_SETTINGS, IMAGE_CACHE_SETTINGS
+
+
+def normalize_text(text, casefold=False):
+    """Normalize text for cache keys: Unicode NFKC, collapsed whitespace, optional case folding"""
+    normalized = ' '.join(unicodedata.normalize('NFKC', text).split())
+    return normalized.casefold() if casefold else normalized
+
+
+class SQLiteCacheBackend:
+    """Shared on-disk cache store, safe for multiple processes on one host"""
+
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._inherited = []
+        self._puts = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Short-lived connection: nothing stays open for pre-forked workers to inherit
+        connection = self._open()
+        try:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS emotion_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL, last_access REAL NOT NULL)"
+            )
+        finally:
+            connection.close()
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _connection(self):
+        # sqlite3 connections may not be shared between threads or across fork(),
+        # so each thread of each process opens its own on first use
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid != os.getpid():
+            # Opened by the parent before fork: never use it, and keep a reference
+            # so it isn't closed (and its WAL checkpointed) from the child either
+            self._inherited.append(connection)
+            connection = None
+        if connection is None:
+            connection = self._open()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM emotion_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self._connection().execute("DELETE FROM emotion_cache WHERE key = ?", (key,))
+            return None
+
+        self._connection().execute("UPDATE emotion_cache SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def put(self, key, value, expires_at=None):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO emotion_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), expires_at, time.time())
+        )
+
+        # Trim occasionally rather than on every write
+        self._puts += 1
+        if self._puts % 256 == 0:
+            connection.execute(
+                "DELETE FROM emotion_cache WHERE key IN ("
+                " SELECT key FROM emotion_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+
+class TextEmotionCache:
+    def __init__(self, namespace='', max_entries=10000, max_bytes=16 * 1024 * 1024,
+                 ttl_seconds=None, casefold=False, shared_backend=None):
+        """
+        Initialize the cache
+
+        Args:
+            namespace (str): Mixed into every key (e.g. model name and backend) so results never cross models
+            max_entries (int): Maximum number of in-process entries
+            max_bytes (int): Approximate maximum in-process memory for entries
+            ttl_seconds (float): Entry lifetime, None to keep entries until evicted
+            casefold (bool): Treat texts differing only in case as the same input
+            shared_backend (SQLiteCacheBackend): Optional store shared between workers
+        """
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.casefold = casefold
+        self.shared_backend = shared_backend
+
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text):
+        """Content address of a text: sha256 over namespace and normalized text"""
+        normalized = normalize_text(text, self.casefold)
+        return hashlib.sha256(f"{self.namespace}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, text):
+        """Return the cached prediction for text, or None"""
+        key = self.key(text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+
+        if self.shared_backend is not None:
+            try:
+                value = self.shared_backend.get(key)
+            except sqlite3.Error as e:
+                print(f"Error reading shared emotion cache: {e}")
+                value = None
+            if value is not None:
+                value = tuple(value)
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store(key, value, now)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text, value):
+        """Cache a prediction tuple for text"""
+        key = self.key(text)
+        now = time.time()
+
+        with self._lock:
+            self._store(key, value, now)
+
+        if self.shared_backend is not None:
+            expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+            try:
+                self.shared_backend.put(key, list(value), expires_at)
+            except sqlite3.Error as e:
+                print(f"Error writing shared emotion cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': ((self.hits + self.shared_hits) / lookups) if lookups else 0.0,
+                'shared_backend': type(self.shared_backend).__name__ if self.shared_backend else None
+            }
+
+    def _entry_size(self, key, value):
+        return sys.getsizeof(key) + sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, value, now):
+        # Caller holds the lock
+        if key in self._entries:
+            self._remove(key)
+
+        size = self._entry_size(key, value)
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+
+def build_text_cache(namespace):
+    """Create the text emotion cache configured in TEXT_CACHE_SETTINGS (None when disabled)"""
+    if not TEXT_CACHE_SETTINGS['enabled']:
+        return None
+
+    shared_backend = None
+    if TEXT_CACHE_SETTINGS['shared_backend'] == 'sqlite':
+        try:
+            shared_backend = SQLiteCacheBackend(
+                TEXT_CACHE_SETTINGS['sqlite_path'],
+                max_entries=TEXT_CACHE_SETTINGS['shared_max_entries']
+            )
+        except sqlite3.Error as e:
+            print(f"Shared emotion cache unavailable ({e}), using in-process cache only")
+
+    return TextEmotionCache(
+        namespace=namespace,
+        max_entries=TEXT_CACHE_SETTINGS['max_entries'],
+        max_bytes=TEXT_CACHE_SETTINGS['max_bytes'],
+        ttl_seconds=TEXT_CACHE_SETTINGS['ttl_seconds'],
+        casefold=TEXT_CACHE_SETTINGS['casefold'],
+        shared_backend=shared_backend
+    )
+
+
+def perceptual_hash(image, hash_size=8):
+    """
+    DCT perceptual hash (pHash) of an image
+
+    Args:
+        image (np.array): BGR or grayscale image
+        hash_size (int): Side of the low-frequency DCT block; the hash has hash_size**2 bits
+
+    Returns:
+        int: Hash as an unsigned integer
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    side = hash_size * 4
+    small = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low_freq = cv2.dct(small)[:hash_size, :hash_size].flatten()
+    # Compare against the median, ignoring the DC term that only encodes brightness
+    bits = low_freq > np.median(low_freq[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class ImageEmotionCache:
+    def __init__(self, max_entries=2048, max_bytes=8 * 1024 * 1024, hamming_tolerance=6, hash_size=8):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries (int): Maximum number of cached images
+            max_bytes (int): Approximate maximum memory for cached results
+            hamming_tolerance (int): Largest hash distance still treated as the same image
+            hash_size (int): pHash block size (hash_size**2 bits, at most 64)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hamming_tolerance = hamming_tolerance
+        self.hash_size = hash_size
+
+        self._entries = OrderedDict()  # hash -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hash_array = None  # uint64 snapshot of the keys for near-duplicate scans
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, image):
+        """Perceptual hash of a decoded image"""
+        return perceptual_hash(image, self.hash_size)
+
+    def get(self, key):
+        """
+        Return a copy of the cached analysis for an exact or near-duplicate hash
+
+        Args:
+            key (int): Perceptual hash from key()
+
+        Returns:
+            dict: The cached analysis, or None on a miss. Near-duplicate hits
+                have no 'faces': boxes from another image don't apply to this one
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key][0])
+
+            if self.hamming_tolerance > 0 and self._entries:
+                if self._hash_array is None:
+                    self._hash_array = np.fromiter(self._entries.keys(), dtype=np.uint64, count=len(self._entries))
+                # Popcount of the XOR for every cached hash at once
+                xor = np.bitwise_xor(self._hash_array, np.uint64(key))
+                distances = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+                best = int(np.argmin(distances))
+                if distances[best] <= self.hamming_tolerance:
+                    match = int(self._hash_array[best])
+                    self._entries.move_to_end(match)
+                    self.near_hits += 1
+                    value = self._entries[match][0]
+                    return copy.deepcopy({field: item for field, item in value.items() if field != 'faces'})
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Cache the final emotion analysis for an image hash"""
+        size = sys.getsizeof(key) + len(json.dumps(value, default=str))
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            # Stored as a copy so later edits to the caller's dict don't leak into hits
+            self._entries[key] = (copy.deepcopy(value), size)
+            self._bytes += size
+            self._hash_array = None
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hash_array = None
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': ((self.hits + self.near_hits) / lookups) if lookups else 0.0,
+                'hamming_tolerance': self.hamming_tolerance
+            }
+
+
+def build_image_cache():
+    """Create the image emotion cache configured in IMAGE_CACHE_SETTINGS (None when disabled)"""
+    if not IMAGE_CACHE_SETTINGS['enabled']:
+        return None
+    return ImageEmotionCache(
+        max_entries=IMAGE_CACHE_SETTINGS['max_entries'],
+        max_bytes=IMAGE_CACHE_SETTINGS['max_bytes'],
+        hamming_tolerance=IMAGE_CACHE_SETTINGS['hamming_tolerance'],
+        hash_size=IMAGE_CACHE_SETTINGS['hash_size']
+    )
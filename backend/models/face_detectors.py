@@ -0,0 +1,155 @@
+"""
+Face detectors used ahead of the face emotion model
+
+Detectors are built once (get_face_detector caches them) and shared by all
+request threads. Detection runs on a downscaled copy of the image and the
+boxes are mapped back to full-resolution coordinates, so the crop handed to
+the emotion model keeps full detail.
+"""
+
+import os
+import sys
+import threading
+import cv2
+import numpy as np
+
+# Add config path to import
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+from models_config import FACE_DETECTION_SETTINGS
+
+
+class FaceDetector:
+    """Base class; subclasses implement _detect on the downscaled image"""
+
+    name = 'base'
+
+    def __init__(self, max_side=640):
+        """
+        Args:
+            max_side (int): Longest side of the image detection runs on (0 = no downscaling)
+        """
+        self.max_side = max_side
+        # OpenCV detector objects are not safe to call from several threads at once
+        self._lock = threading.Lock()
+
+    def detect(self, image):
+        """
+        Detect faces in a BGR image
+
+        Args:
+            image (np.array): BGR image at full resolution
+
+        Returns:
+            list[tuple]: (x, y, w, h, score) per face in full-resolution pixels;
+                score is None for detectors without a confidence
+        """
+        height, width = image.shape[:2]
+        scale = 1.0
+        small = image
+        if self.max_side and max(height, width) > self.max_side:
+            scale = self.max_side / float(max(height, width))
+            small = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+
+        faces = []
+        for x, y, w, h, score in self._detect(small):
+            # Map back to the original resolution and clip to the image
+            x0 = int(np.clip(round(x / scale), 0, width - 1))
+            y0 = int(np.clip(round(y / scale), 0, height - 1))
+            x1 = int(np.clip(round((x + w) / scale), x0 + 1, width))
+            y1 = int(np.clip(round((y + h) / scale), y0 + 1, height))
+            faces.append((x0, y0, x1 - x0, y1 - y0, score))
+        return faces
+
+    def _detect(self, image):
+        raise NotImplementedError
+
+
+class HaarFaceDetector(FaceDetector):
+    """OpenCV Haar cascade detector"""
+
+    name = 'haar'
+
+    def __init__(self, cascade_path=None, scale_factor=1.1, min_neighbors=4, max_side=640):
+        super().__init__(max_side)
+        cascade_path = cascade_path or cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise ValueError(f"Could not load Haar cascade from {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def _detect(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        with self._lock:
+            faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+        return [(int(x), int(y), int(w), int(h), None) for x, y, w, h in faces]
+
+
+class DnnFaceDetector(FaceDetector):
+    """OpenCV DNN detector (ResNet-10 SSD Caffe model loaded from local files)"""
+
+    name = 'dnn'
+
+    def __init__(self, prototxt_path, model_path, confidence=0.5, max_side=640):
+        super().__init__(max_side)
+        for path in (prototxt_path, model_path):
+            if not path or not os.path.exists(path):
+                raise FileNotFoundError(f"DNN face detector file not found: {path}")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self.confidence = confidence
+
+    def _detect(self, image):
+        height, width = image.shape[:2]
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        blob = cv2.dnn.blobFromImage(cv2.resize(image, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward()
+
+        faces = []
+        for detection in detections[0, 0]:
+            score = float(detection[2])
+            if score < self.confidence:
+                continue
+            x0, y0, x1, y1 = detection[3:7] * np.array([width, height, width, height])
+            faces.append((float(x0), float(y0), float(x1 - x0), float(y1 - y0), score))
+        return faces
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def build_face_detector(name):
+    """Construct a detector from FACE_DETECTION_SETTINGS (DNN falls back to Haar if its files are missing)"""
+    settings = FACE_DETECTION_SETTINGS
+    if name == 'dnn':
+        try:
+            return DnnFaceDetector(
+                settings['dnn_prototxt_path'],
+                settings['dnn_model_path'],
+                confidence=settings['dnn_confidence'],
+                max_side=settings['max_side']
+            )
+        except Exception as e:
+            print(f"DNN face detector unavailable ({e}), falling back to Haar cascade")
+            name = 'haar'
+    if name == 'haar':
+        return HaarFaceDetector(
+            settings['haar_cascade_path'],
+            scale_factor=settings['haar_scale_factor'],
+            min_neighbors=settings['haar_min_neighbors'],
+            max_side=settings['max_side']
+        )
+    raise ValueError(f"Unknown face detector '{name}', expected 'haar' or 'dnn'")
+
+
+def get_face_detector(name=None):
+    """Return the shared detector instance for name (defaults to FACE_DETECTION_SETTINGS['detector'])"""
+    name = name or FACE_DETECTION_SETTINGS['detector']
+    with _detectors_lock:
+        if name not in _detectors:
+            _detectors[name] = build_face_detector(name)
+        return _detectors[name]
@@ -1,5 +1,6 @@
 import torch
 import cv2
+import io
 from PIL import Image
 import numpy as np
 from transformers import pipeline
@@ -10,7 +11,22 @@ warnings.filterwarnings('ignore')
 
 # Add config path to import
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
-from models_config import FACE_EMOTION_MODEL, FACE_EMOTION_MAPPING, MODEL_SETTINGS
+sys.path.append(os.path.dirname(__file__))
+from models_config import FACE_EMOTION_MODEL, FACE_EMOTION_MAPPING, MODEL_SETTINGS, FACE_DETECTION_SETTINGS
+from face_detectors import get_face_detector
+
+# Normalize common label variants
+LABEL_NORMALIZATION = {
+    'happiness': 'happy', 'joy': 'happy',
+    'sadness': 'sad',
+    'anger': 'angry', 'angry': 'angry',
+    'fear': 'fear', 'scared': 'fear',
+    'disgust': 'disgust',
+    'surprise': 'surprise', 'surprised': 'surprise',
+    'neutral': 'neutral'
+}
+
+FACE_AGGREGATIONS = ('largest', 'weighted_mean', 'majority')
 
 class FaceEmotionClassifier:
     def __init__(self):
@@ -24,6 +40,42 @@ class FaceEmotionClassifier:
         
         # Use centralized emotion mapping
         self.emotion_mapping = FACE_EMOTION_MAPPING
+        
+        # Shared face detector, loaded once
+        self.face_detector = get_face_detector()
+        
+        # Preprocessing parameters for the vectorized batch path, read from the
+        # model's own image processor so the batch path matches the pipeline
+        self.configure_preprocessing(getattr(self.classifier, 'image_processor', None) or self.classifier.feature_extractor)
+        
+        id2label = self.classifier.model.config.id2label
+        self.labels = [LABEL_NORMALIZATION.get(str(id2label[i]).lower(), str(id2label[i]).lower())
+                       for i in range(len(id2label))]
+    
+    def configure_preprocessing(self, processor):
+        """
+        Read resize and normalization parameters for preprocess_batch from an image processor
+        
+        Args:
+            processor: The pipeline's image processor (e.g. ViTImageProcessor)
+        """
+        size = processor.size
+        # A plain dict in older transformers, a dict-like SizeDict in newer ones
+        if hasattr(size, 'get'):
+            height = size.get('height', size.get('shortest_edge'))
+            width = size.get('width', size.get('shortest_edge'))
+        else:
+            height = width = int(size)
+        self.input_size = (int(width), int(height))
+        self.rescale_factor = float(getattr(processor, 'rescale_factor', 1 / 255)) if getattr(processor, 'do_rescale', True) else 1.0
+        if getattr(processor, 'do_normalize', True):
+            self.image_mean = np.asarray(processor.image_mean, dtype=np.float32).reshape(1, 1, 1, 3)
+            self.image_std = np.asarray(processor.image_std, dtype=np.float32).reshape(1, 1, 1, 3)
+        else:
+            self.image_mean = np.zeros((1, 1, 1, 3), dtype=np.float32)
+            self.image_std = np.ones((1, 1, 1, 3), dtype=np.float32)
+        # Same filter the processor resizes with (PILImageResampling shares PIL's values)
+        self.resample = int(getattr(processor, 'resample', None) or Image.BILINEAR)
     
     def preprocess_image(self, image_path):
         """
@@ -75,46 +127,56 @@ class FaceEmotionClassifier:
             print(f"Error preprocessing image array: {e}")
             return None
     
-    def predict_emotion(self, image_path):
+    def load_image(self, image):
         """
-        Predict emotion from image using Hugging Face model
+        Decode an image once into a BGR array
         
         Args:
-            image_path (str): Path to image file
+            image (str | bytes | np.array | PIL.Image): File path, encoded image bytes,
+                BGR array (returned unchanged) or PIL image
             
         Returns:
-            int: Emotion class (0=sad, 1=happy, 2=surprise, 3=angry, 4=fear, 5=disgust, 6=neutral)
+            np.array: BGR image array, or None if it could not be decoded
         """
         try:
-            # Preprocess image
-            image = self.preprocess_image(image_path)
-            if image is None:
-                return 0, 0.0, "error"
+            if isinstance(image, np.ndarray):
+                return image
+            if isinstance(image, Image.Image):
+                return cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
             
-            # Get predictions from the model
-            results = self.classifier(image)
-            # HF pipeline may return List[Dict] or List[List[Dict]] depending on batching
-            candidates = results if (len(results) and isinstance(results[0], dict)) else results[0]
-            # Find the emotion with highest confidence
-            best_emotion = max(candidates, key=lambda x: x.get('score', 0))
-            emotion_label = str(best_emotion.get('label', '')).lower()
-            # Normalize common label variants
-            label_norm = {
-                'happiness': 'happy', 'joy': 'happy',
-                'sadness': 'sad',
-                'anger': 'angry', 'angry': 'angry',
-                'fear': 'fear', 'scared': 'fear',
-                'disgust': 'disgust',
-                'surprise': 'surprise', 'surprised': 'surprise',
-                'neutral': 'neutral'
-            }
-            emotion_label = label_norm.get(emotion_label, emotion_label)
-            confidence = float(best_emotion.get('score', 0))
+            if isinstance(image, (bytes, bytearray, memoryview)):
+                decoded = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+                source = io.BytesIO(image)
+            else:
+                decoded = cv2.imread(image)
+                source = image
+            if decoded is not None:
+                return decoded
             
-            # Map to our emotion system
-            emotion_class = self.emotion_mapping.get(emotion_label, 6)  # default to neutral
+            # PIL reads a few formats OpenCV can't (e.g. GIF)
+            with Image.open(source) as img:
+                return cv2.cvtColor(np.asarray(img.convert('RGB')), cv2.COLOR_RGB2BGR)
             
-            return emotion_class, confidence, emotion_label
+        except Exception as e:
+            print(f"Could not decode image: {e}")
+            return None
+    
+    def predict_emotion(self, image):
+        """
+        Predict emotion from a whole image using Hugging Face model
+        
+        Args:
+            image (str | bytes | np.array): Path to image file, encoded image bytes or BGR array
+            
+        Returns:
+            int: Emotion class (0=sad, 1=happy, 2=surprise, 3=angry, 4=fear, 5=disgust, 6=neutral)
+        """
+        try:
+            image_array = self.load_image(image)
+            if image_array is None:
+                return 0, 0.0, "error"
+            
+            return self.predict_emotion_from_array(image_array)
             
         except Exception as e:
             print(f"Error in face emotion prediction: {e}")
@@ -142,16 +204,7 @@ class FaceEmotionClassifier:
             # Find the emotion with highest confidence
             best_emotion = max(candidates, key=lambda x: x.get('score', 0))
             emotion_label = str(best_emotion.get('label', '')).lower()
-            label_norm = {
-                'happiness': 'happy', 'joy': 'happy',
-                'sadness': 'sad',
-                'anger': 'angry', 'angry': 'angry',
-                'fear': 'fear', 'scared': 'fear',
-                'disgust': 'disgust',
-                'surprise': 'surprise', 'surprised': 'surprise',
-                'neutral': 'neutral'
-            }
-            emotion_label = label_norm.get(emotion_label, emotion_label)
+            emotion_label = LABEL_NORMALIZATION.get(emotion_label, emotion_label)
             confidence = float(best_emotion.get('score', 0))
             
             # Map to our emotion system
@@ -193,47 +246,334 @@ class FaceEmotionClassifier:
             print(f"Error getting emotion probabilities: {e}")
             return {}
     
-    def detect_face_and_predict(self, image_path):
+    def preprocess_batch(self, images):
         """
-        Detect face in image and predict emotion
+        Resize and normalize many images into one model input tensor
+        
+        Each image is resized with PIL, using the processor's own filter, into a
+        preallocated uint8 stack; rescaling and normalization then run once over
+        the whole stack instead of per image.
         
         Args:
-            image_path (str): Path to image file
+            images (list[np.array]): BGR (or grayscale / BGRA) images of any size
             
         Returns:
-            tuple: (emotion_class, confidence, emotion_label, face_detected)
+            np.array: float32 pixel values shaped (N, 3, height, width)
         """
-        try:
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
-                return 0, 0.0, "error", False
+        width, height = self.input_size
+        stack = np.empty((len(images), height, width, 3), dtype=np.uint8)
+        for i, image in enumerate(images):
+            if image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+            elif image.shape[2] == 4:
+                image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGB)
+            else:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            # PIL rather than cv2.resize: its antialiased filters are what the model
+            # was trained and evaluated with, OpenCV's differ noticeably when shrinking
+            stack[i] = np.asarray(Image.fromarray(image).resize((width, height), resample=self.resample))
+        
+        pixels = stack.astype(np.float32)
+        pixels *= self.rescale_factor
+        pixels -= self.image_mean
+        pixels /= self.image_std
+        return np.ascontiguousarray(pixels.transpose(0, 3, 1, 2))
+    
+    def predict_probabilities_batch(self, images, batch_size=None):
+        """
+        Run the ViT over many images in fixed-size batches
+        
+        Args:
+            images (list[np.array]): BGR images or face crops
+            batch_size (int): Images per forward pass (defaults to MODEL_SETTINGS['batch_size'])
+            
+        Returns:
+            np.array: (len(images), len(self.labels)) softmax probabilities
+        """
+        batch_size = max(1, batch_size or MODEL_SETTINGS['batch_size'])
+        model = self.classifier.model
+        probabilities = np.zeros((len(images), len(self.labels)), dtype=np.float32)
+        
+        for start in range(0, len(images), batch_size):
+            pixel_values = torch.from_numpy(self.preprocess_batch(images[start:start + batch_size]))
+            with torch.inference_mode():
+                logits = model(pixel_values=pixel_values.to(model.device)).logits
+            probabilities[start:start + batch_size] = torch.softmax(logits.float(), dim=-1).cpu().numpy()
+        
+        return probabilities
+    
+    def classify_faces(self, face_images):
+        """
+        Classify several face crops in batched forward passes
+        
+        Args:
+            face_images (list[np.array]): BGR face crops
+            
+        Returns:
+            list[dict]: Normalized label -> probability for each crop, in input order
+        """
+        if not face_images:
+            return []
+        
+        results = []
+        for row in self.predict_probabilities_batch(face_images):
+            scores = {}
+            for label, score in zip(self.labels, row):
+                scores[label] = scores.get(label, 0.0) + float(score)
+            results.append(scores)
+        return results
+    
+    def predict_emotions_batch(self, images):
+        """
+        Predict emotion for many whole images (or face crops) at once
+        
+        Args:
+            images (list): Paths, encoded bytes or BGR arrays
+            
+        Returns:
+            list[tuple]: (emotion_class, confidence, emotion_label) per image; undecodable images give "error"
+        """
+        decoded = [self.load_image(image) for image in images]
+        valid = [i for i, image in enumerate(decoded) if image is not None]
+        predictions = [(0, 0.0, "error")] * len(decoded)
+        
+        for i, scores in zip(valid, self.classify_faces([decoded[i] for i in valid])):
+            label = max(scores, key=scores.get)
+            predictions[i] = (self.emotion_mapping.get(label, 6), scores[label], label)
+        return predictions
+    
+    def predict_class_probabilities(self, image):
+        """
+        Emotion probabilities for the largest face in an image (e.g. a webcam frame)
+        
+        Args:
+            image (str | bytes | np.array): Path, encoded image bytes or BGR array
             
-            # Load face cascade classifier
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        Returns:
+            np.array: Probability per emotion class (index = emotion_class), or None if no face was found
+        """
+        image = self.load_image(image)
+        if image is None:
+            return None
+        
+        detections = self._detect_faces(image)
+        if not detections:
+            return None
+        
+        x, y, w, h, _ = detections[0]
+        return self.class_probabilities(self.classify_faces([image[y:y+h, x:x+w]])[0])
+    
+    def class_probabilities(self, scores):
+        """
+        Fold one face's label scores into probabilities per emotion class
+        
+        Args:
+            scores (dict): Model label -> probability, as returned by classify_faces
             
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        Returns:
+            np.array: Probability per emotion class (index = emotion_class); unmapped labels count as neutral
+        """
+        probabilities = np.zeros(max(self.emotion_mapping.values()) + 1, dtype=np.float32)
+        for label, score in scores.items():
+            probabilities[self.emotion_mapping.get(label, 6)] += score
+        return probabilities
+    
+    def aggregate_probabilities(self, faces, aggregation, emotion_label):
+        """
+        Emotion class probabilities for an image, consistent with aggregate_faces
+        
+        Args:
+            faces (list[dict]): Per-face results with 'box', 'emotion_label', 'confidence' and 'scores'
+            aggregation (str): One of FACE_AGGREGATIONS
+            emotion_label (str): Label aggregate_faces chose ('majority' averages only its voters)
             
-            # Detect faces
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+        Returns:
+            np.array: Confidence-weighted mean of the contributing faces' class probabilities
+        """
+        if aggregation == 'largest':
+            faces = [max(faces, key=lambda f: f['box'][2] * f['box'][3])]
+        elif aggregation == 'majority':
+            faces = [face for face in faces if face['emotion_label'] == emotion_label]
+        
+        weights = np.array([face['confidence'] for face in faces], dtype=np.float32)
+        if weights.sum() <= 0:
+            weights = np.ones(len(faces), dtype=np.float32)
+        vectors = np.stack([self.class_probabilities(face['scores']) for face in faces])
+        return weights @ vectors / weights.sum()
+    
+    def aggregate_faces(self, faces, aggregation):
+        """
+        Combine per-face predictions into one emotion label
+        
+        Args:
+            faces (list[dict]): Per-face results with 'box', 'emotion_label', 'confidence' and 'scores'
+            aggregation (str): 'largest' (biggest face wins), 'weighted_mean' (confidence-weighted
+                mean of the probability vectors) or 'majority' (vote, ties broken by total confidence)
             
-            if len(faces) == 0:
-                print("No face detected in the image")
-                return 0, 0.0, "no_face", False
+        Returns:
+            tuple: (emotion_label, confidence)
+        """
+        if aggregation == 'largest':
+            face = max(faces, key=lambda f: f['box'][2] * f['box'][3])
+            return face['emotion_label'], face['confidence']
+        
+        if aggregation == 'weighted_mean':
+            total_weight = sum(f['confidence'] for f in faces) or 1.0
+            combined = {}
+            for face in faces:
+                for label, score in face['scores'].items():
+                    combined[label] = combined.get(label, 0.0) + score * face['confidence'] / total_weight
+            label = max(combined, key=combined.get)
+            return label, combined[label]
+        
+        if aggregation == 'majority':
+            votes, weight = {}, {}
+            for face in faces:
+                label = face['emotion_label']
+                votes[label] = votes.get(label, 0) + 1
+                weight[label] = weight.get(label, 0.0) + face['confidence']
+            label = max(votes, key=lambda l: (votes[l], weight[l]))
+            return label, weight[label] / votes[label]
+        
+        raise ValueError(f"Unknown face aggregation '{aggregation}', expected one of {FACE_AGGREGATIONS}")
+    
+    def _detect_faces(self, image):
+        """Detected faces in a BGR image, largest first, capped at FACE_DETECTION_SETTINGS['max_faces']"""
+        detections = sorted(self.face_detector.detect(image), key=lambda d: d[2] * d[3], reverse=True)
+        return detections[:FACE_DETECTION_SETTINGS['max_faces']]
+    
+    def _empty_result(self, aggregation, emotion_label='error'):
+        return {
+            'emotion_class': 0, 'confidence': 0.0, 'emotion_label': emotion_label,
+            'face_detected': False, 'aggregation': aggregation, 'faces': [], 'probabilities': None
+        }
+    
+    def _faces_result(self, detections, face_scores, aggregation):
+        """Per-face entries plus the aggregated emotion for one image"""
+        faces = []
+        for (x, y, w, h, detector_score), scores in zip(detections, face_scores):
+            label = max(scores, key=scores.get)
+            faces.append({
+                'box': [int(x), int(y), int(w), int(h)],
+                'detector_score': detector_score,
+                'emotion_label': label,
+                'emotion_class': self.emotion_mapping.get(label, 6),
+                'confidence': scores[label],
+                'scores': scores
+            })
+        
+        emotion_label, confidence = self.aggregate_faces(faces, aggregation)
+        return {
+            'emotion_class': self.emotion_mapping.get(emotion_label, 6),  # default to neutral
+            'confidence': float(confidence),
+            'emotion_label': emotion_label,
+            'face_detected': True,
+            'aggregation': aggregation,
+            'faces': faces,
+            'probabilities': self.aggregate_probabilities(faces, aggregation, emotion_label)
+        }
+    
+    def detect_faces_and_predict(self, image, aggregation=None):
+        """
+        Detect every face in an image, classify them together and aggregate
+        
+        Args:
+            image (str | bytes | np.array): Path to image file, encoded image bytes or BGR array
+            aggregation (str): One of FACE_AGGREGATIONS (defaults to FACE_DETECTION_SETTINGS['aggregation'])
             
-            # Use the first detected face
-            x, y, w, h = faces[0]
-            face_roi = image[y:y+h, x:x+w]
+        Returns:
+            dict: emotion_class, confidence, emotion_label, face_detected, aggregation,
+                  faces (box [x, y, w, h], detector score, label, confidence, scores per face) and
+                  probabilities per emotion class (None if no face was classified)
+        """
+        aggregation = aggregation or FACE_DETECTION_SETTINGS['aggregation']
+        try:
+            # Decode once (no-op if we were handed an array)
+            image = self.load_image(image)
+            if image is None:
+                return self._empty_result(aggregation)
             
-            # Predict emotion from face region
-            emotion_class, confidence, emotion_label = self.predict_emotion_from_array(face_roi)
+            # Detect faces (on a downscaled copy; boxes come back in full resolution)
+            detections = self._detect_faces(image)
+            if len(detections) == 0:
+                print("No face detected in the image")
+                return self._empty_result(aggregation, 'no_face')
             
-            return emotion_class, confidence, emotion_label, True
+            crops = [image[y:y+h, x:x+w] for x, y, w, h, _ in detections]
+            return self._faces_result(detections, self.classify_faces(crops), aggregation)
             
         except Exception as e:
             print(f"Error in face detection and emotion prediction: {e}")
-            return 0, 0.0, "error", False
+            return self._empty_result(aggregation)
+    
+    def analyze_images(self, images, aggregation=None):
+        """
+        Detect and classify faces across many images with shared batched forward passes
+        
+        Face crops from every image go into one list; images without a face
+        contribute the whole image instead. All of them are classified by
+        predict_probabilities_batch, then split back per image.
+        
+        Args:
+            images (list): Paths, encoded bytes or BGR arrays
+            aggregation (str): One of FACE_AGGREGATIONS
+            
+        Returns:
+            list[dict]: detect_faces_and_predict-style result per image, with 'method'
+                set to 'face', 'full-image' or 'error'
+        """
+        aggregation = aggregation or FACE_DETECTION_SETTINGS['aggregation']
+        decoded = [self.load_image(image) for image in images]
+        
+        crops, owners, detections_per_image = [], [], []
+        for index, image in enumerate(decoded):
+            detections = self._detect_faces(image) if image is not None else []
+            detections_per_image.append(detections)
+            if image is None:
+                continue
+            if detections:
+                crops.extend(image[y:y+h, x:x+w] for x, y, w, h, _ in detections)
+                owners.extend([index] * len(detections))
+            else:
+                crops.append(image)
+                owners.append(index)
+        
+        scores_per_image = [[] for _ in decoded]
+        for owner, scores in zip(owners, self.classify_faces(crops)):
+            scores_per_image[owner].append(scores)
+        
+        results = []
+        for image, detections, scores in zip(decoded, detections_per_image, scores_per_image):
+            if image is None:
+                result = self._empty_result(aggregation)
+                result['method'] = 'error'
+            elif detections:
+                result = self._faces_result(detections, scores, aggregation)
+                result['method'] = 'face'
+            else:
+                label = max(scores[0], key=scores[0].get)
+                result = self._empty_result(aggregation, label)
+                result.update({
+                    'emotion_class': self.emotion_mapping.get(label, 6),
+                    'confidence': scores[0][label],
+                    'probabilities': self.class_probabilities(scores[0]),
+                    'method': 'full-image'
+                })
+            results.append(result)
+        return results
+    
+    def detect_face_and_predict(self, image):
+        """
+        Detect faces in image and predict one emotion for them
+        
+        Args:
+            image (str | bytes | np.array): Path to image file, encoded image bytes or BGR array
+            
+        Returns:
+            tuple: (emotion_class, confidence, emotion_label, face_detected)
+        """
+        result = self.detect_faces_and_predict(image)
+        return result['emotion_class'], result['confidence'], result['emotion_label'], result['face_detected']
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+"""
+Inference backends for the text emotion model
+
+    pytorch       - eager fp32 PyTorch (default)
+    pytorch_int8  - PyTorch with int8 dynamic quantization of the Linear layers
+    onnx          - exported ONNX graph run by ONNX Runtime on CPU
+
+Every backend takes tokenized numpy arrays and returns numpy logits, so the
+classifier does not care which one it is talking to.
+
+The ONNX graph is exported offline, never while serving. Exports are keyed by
+model, opset, max_length and the installed torch/transformers versions, so
+an upgrade never loads a stale graph; the onnx backend refuses to start
+until the matching export exists.
+
+Command line:
+    python text_backends.py export            # export the ONNX artifact for the current key
+    python text_backends.py parity pytorch_int8
+"""
+
+import argparse
+import hashlib
+import importlib.metadata
+import json
+import os
+import sys
+import numpy as np
+import warnings
+warnings.filterwarnings('ignore')
+
+# Add config path to import
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+from models_config import TEXT_EMOTION_MODEL, TEXT_INFERENCE_SETTINGS, MODEL_SETTINGS
+
+TEXT_BACKENDS = ('pytorch', 'pytorch_int8', 'onnx')
+
+# Short texts covering every label; used to check a backend against fp32
+PARITY_FIXTURE_TEXTS = [
+    "I am so happy today!",
+    "This is the best news I've had all year",
+    "This makes me really angry",
+    "Stop wasting my time, I'm furious",
+    "I'm scared of the dark",
+    "I'm terrified about the exam tomorrow",
+    "I feel so sad and lonely",
+    "I miss my old friends so much",
+    "What a surprise!",
+    "I can't believe they actually did it",
+    "This is disgusting",
+    "The food smelled rotten and I felt sick",
+    "I'm going to the store later",
+    "The meeting is at three o'clock"
+]
+
+
+def _set_num_threads():
+    num_threads = TEXT_INFERENCE_SETTINGS.get('num_threads')
+    if num_threads:
+        import torch
+        torch.set_num_threads(int(num_threads))
+
+
+class TorchTextBackend:
+    """Eager PyTorch backend, optionally with int8 dynamic quantization"""
+
+    def __init__(self, model_name, quantize=False):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        _set_num_threads()
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            # Weights stored as int8, activations quantized on the fly
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        self.name = 'pytorch_int8' if quantize else 'pytorch'
+        self.model = model
+        self.id2label = model.config.id2label
+
+    def __call__(self, input_ids, attention_mask):
+        import torch
+        with torch.inference_mode():
+            outputs = self.model(
+                input_ids=torch.from_numpy(np.ascontiguousarray(input_ids, dtype=np.int64)),
+                attention_mask=torch.from_numpy(np.ascontiguousarray(attention_mask, dtype=np.int64))
+            )
+        return outputs.logits.float().numpy()
+
+
+class OnnxTextBackend:
+    """ONNX Runtime backend over a graph exported offline (see export_onnx)"""
+
+    def __init__(self, model_name, artifact_dir=None):
+        import onnxruntime as ort
+        from transformers import AutoConfig
+
+        model_path = onnx_artifact_path(model_name, artifact_dir)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX export of {model_name} for {onnx_export_key(model_name)} at {model_path} "
+                f"(run models/text_backends.py export)"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        num_threads = TEXT_INFERENCE_SETTINGS.get('num_threads')
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+
+        self.name = 'onnx'
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.id2label = AutoConfig.from_pretrained(model_name).id2label
+
+    def __call__(self, input_ids, attention_mask):
+        return self.session.run(
+            ['logits'],
+            {
+                'input_ids': np.asarray(input_ids, dtype=np.int64),
+                'attention_mask': np.asarray(attention_mask, dtype=np.int64)
+            }
+        )[0]
+
+
+def load_text_backend(backend_name, model_name=TEXT_EMOTION_MODEL):
+    """
+    Build the inference backend selected in TEXT_INFERENCE_SETTINGS
+
+    Args:
+        backend_name (str): One of TEXT_BACKENDS
+        model_name (str): Hugging Face model id
+
+    Returns:
+        callable: backend(input_ids, attention_mask) -> np.ndarray of logits
+    """
+    if backend_name == 'pytorch':
+        return TorchTextBackend(model_name)
+    if backend_name == 'pytorch_int8':
+        return TorchTextBackend(model_name, quantize=True)
+    if backend_name == 'onnx':
+        return OnnxTextBackend(model_name, TEXT_INFERENCE_SETTINGS['artifact_dir'])
+    raise ValueError(f"Unknown text backend '{backend_name}', expected one of {TEXT_BACKENDS}")
+
+
+def _package_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def onnx_export_key(model_name=TEXT_EMOTION_MODEL):
+    """Everything an ONNX export depends on; any change needs a new export"""
+    return {
+        'model': model_name,
+        'opset': TEXT_INFERENCE_SETTINGS['onnx_opset'],
+        'max_length': MODEL_SETTINGS['max_length'],
+        'torch': _package_version('torch'),
+        'transformers': _package_version('transformers')
+    }
+
+
+def onnx_artifact_path(model_name, artifact_dir=None):
+    """Location of the ONNX export for a model under the current export key"""
+    artifact_dir = artifact_dir or TEXT_INFERENCE_SETTINGS['artifact_dir']
+    key = onnx_export_key(model_name)
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(artifact_dir, 'onnx', f"{model_name.replace('/', '__')}-{digest}", 'model.onnx')
+
+
+def export_onnx(model_name=TEXT_EMOTION_MODEL, artifact_dir=None, force=False):
+    """
+    Export the text model to ONNX (offline step; serving only loads the result)
+
+    Args:
+        model_name (str): Hugging Face model id
+        artifact_dir (str): Directory holding exported artifacts
+        force (bool): Re-export even if an export for the current key exists
+
+    Returns:
+        str: Path to the .onnx file
+    """
+    path = onnx_artifact_path(model_name, artifact_dir)
+    if os.path.exists(path) and not force:
+        return path
+
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    print(f"Exporting {model_name} to ONNX...")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    dummy = tokenizer(["an example input", "a second, slightly longer example input"],
+                      padding=True, return_tensors='pt')
+
+    # Write to a temporary name first so concurrent workers never load a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (dummy['input_ids'], dummy['attention_mask']),
+            tmp_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=TEXT_INFERENCE_SETTINGS['onnx_opset']
+        )
+    os.replace(tmp_path, path)
+    with open(os.path.join(os.path.dirname(path), 'manifest.json'), 'w') as f:
+        json.dump(onnx_export_key(model_name), f, indent=2)
+    print(f"ONNX model exported to {path}")
+    return path
+
+
+def softmax(logits):
+    """Row-wise softmax over a 2D logits array"""
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def check_parity(backend_name, texts=None, atol=None, model_name=TEXT_EMOTION_MODEL):
+    """
+    Compare a backend against the fp32 PyTorch model on a fixture set
+
+    Args:
+        backend_name (str): Backend to check
+        texts (list[str]): Fixture texts (defaults to PARITY_FIXTURE_TEXTS)
+        atol (float): Allowed absolute difference per probability
+        model_name (str): Hugging Face model id
+
+    Returns:
+        dict: Report with top-1 agreement, max probability difference and a pass flag
+    """
+    from transformers import AutoTokenizer
+
+    texts = texts or PARITY_FIXTURE_TEXTS
+    atol = TEXT_INFERENCE_SETTINGS['parity_atol'] if atol is None else atol
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    encoded = tokenizer(texts, padding=True, truncation=True, return_tensors='np')
+
+    reference = softmax(load_text_backend('pytorch', model_name)(encoded['input_ids'], encoded['attention_mask']))
+    candidate = softmax(load_text_backend(backend_name, model_name)(encoded['input_ids'], encoded['attention_mask']))
+
+    top1_matches = reference.argmax(axis=1) == candidate.argmax(axis=1)
+    max_abs_diff = float(np.abs(reference - candidate).max())
+
+    return {
+        'backend': backend_name,
+        'num_texts': len(texts),
+        'top1_agreement': float(top1_matches.mean()),
+        'mismatched_texts': [text for text, ok in zip(texts, top1_matches) if not ok],
+        'max_abs_prob_diff': max_abs_diff,
+        'atol': atol,
+        'passed': bool(top1_matches.all() and max_abs_diff <= atol)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Text emotion backend tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Export the ONNX artifact for the current key')
+    export_parser.add_argument('--force', action='store_true', help='Re-export even if it exists')
+
+    parity_parser = subparsers.add_parser('parity', help='Check a backend against fp32 PyTorch')
+    parity_parser.add_argument('backend', choices=TEXT_BACKENDS)
+    parity_parser.add_argument('--atol', type=float, default=None)
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        print(export_onnx(force=args.force))
+    else:
+        report = check_parity(args.backend, atol=args.atol)
+        print("Backend Parity Report:")
+        print("=" * 50)
+        for key, value in report.items():
+            print(f"{key}: {value}")
+        sys.exit(0 if report['passed'] else 1)
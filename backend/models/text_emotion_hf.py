@@ -1,27 +1,158 @@
-import torch
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+import numpy as np
+import threading
+import time
 import warnings
 import sys
 import os
 warnings.filterwarnings('ignore')
 
+from transformers import AutoTokenizer
+
 # Add config path to import
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
-from models_config import TEXT_EMOTION_MODEL, TEXT_EMOTION_MAPPING, MODEL_SETTINGS
+sys.path.append(os.path.dirname(__file__))
+from models_config import TEXT_EMOTION_MODEL, TEXT_EMOTION_MAPPING, MODEL_SETTINGS, TEXT_INFERENCE_SETTINGS
+from text_backends import load_text_backend, softmax
+from emotion_cache import build_text_cache
 
 class TextEmotionClassifier:
-    def __init__(self):
-        """Initialize the text emotion classifier using Hugging Face models"""
+    def __init__(self, backend=None):
+        """
+        Initialize the text emotion classifier using Hugging Face models
+        
+        Args:
+            backend (str): Inference backend ('pytorch', 'pytorch_int8', 'onnx');
+                defaults to TEXT_INFERENCE_SETTINGS['backend']
+        """
         # Using centralized model configuration
         self.model_name = TEXT_EMOTION_MODEL
-        self.classifier = pipeline(
-            "text-classification",
-            model=self.model_name,
-            return_all_scores=MODEL_SETTINGS['return_all_scores']
-        )
+        self.backend_name = backend or TEXT_INFERENCE_SETTINGS['backend']
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.backend = load_text_backend(self.backend_name, self.model_name)
+        self.labels = [self.backend.id2label[i] for i in range(len(self.backend.id2label))]
         
         # Use centralized emotion mapping
         self.emotion_mapping = TEXT_EMOTION_MAPPING
+        
+        # Never feed the model more tokens than it (or the config) allows
+        self.max_length = min(MODEL_SETTINGS['max_length'], self.tokenizer.model_max_length)
+        
+        # Cache of finished predictions keyed by normalized text
+        self.cache = build_text_cache(f"{self.model_name}:{self.backend_name}")
+        
+        # Cumulative time spent tokenizing vs in the forward pass
+        self.timings = {
+            'calls': 0, 'texts': 0, 'tokens': 0, 'padded_tokens': 0,
+            'tokenize_seconds': 0.0, 'forward_seconds': 0.0
+        }
+        self._timing_lock = threading.Lock()
+    
+    def _length_buckets(self, lengths):
+        """
+        Group text indices into batches of similar token length
+        
+        Texts are sorted by length and cut into batches of at most
+        MODEL_SETTINGS['batch_size']; a batch never spans two of the configured
+        length buckets, so short texts are not padded up to long ones.
+        
+        Args:
+            lengths (list[int]): Token count per text
+            
+        Returns:
+            list[list[int]]: Batches of indices into the input texts
+        """
+        batch_size = max(1, MODEL_SETTINGS['batch_size'])
+        boundaries = MODEL_SETTINGS['length_buckets']
+        
+        batches = []
+        current, current_bucket = [], None
+        for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            bucket = int(np.searchsorted(boundaries, lengths[i]))
+            if current and (len(current) == batch_size or bucket != current_bucket):
+                batches.append(current)
+                current = []
+            current.append(i)
+            current_bucket = bucket
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _pad(self, sequences):
+        """Pad token id lists to the longest one; returns (input_ids, attention_mask)"""
+        width = max(len(ids) for ids in sequences)
+        input_ids = np.full((len(sequences), width), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), width), dtype=np.int64)
+        for row, ids in enumerate(sequences):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return input_ids, attention_mask
+    
+    def predict_probabilities(self, texts):
+        """
+        Run the model over texts, tokenized once and batched by length
+        
+        Inputs are truncated to MODEL_SETTINGS['max_length'] tokens.
+        
+        Args:
+            texts (list[str]): Input texts
+            
+        Returns:
+            np.ndarray: (len(texts), len(self.labels)) softmax probabilities, columns ordered as self.labels
+        """
+        texts = list(texts)
+        probabilities = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        if not texts:
+            return probabilities
+        
+        started = time.perf_counter()
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)['input_ids']
+        tokenize_seconds = time.perf_counter() - started
+        
+        forward_seconds = 0.0
+        padded_tokens = 0
+        for batch in self._length_buckets([len(ids) for ids in encoded]):
+            input_ids, attention_mask = self._pad([encoded[i] for i in batch])
+            padded_tokens += input_ids.size
+            
+            started = time.perf_counter()
+            logits = self.backend(input_ids, attention_mask)
+            forward_seconds += time.perf_counter() - started
+            
+            probabilities[batch] = softmax(logits)
+        
+        with self._timing_lock:
+            self.timings['calls'] += 1
+            self.timings['texts'] += len(texts)
+            self.timings['tokens'] += sum(len(ids) for ids in encoded)
+            self.timings['padded_tokens'] += padded_tokens
+            self.timings['tokenize_seconds'] += tokenize_seconds
+            self.timings['forward_seconds'] += forward_seconds
+        
+        return probabilities
+    
+    def timing_stats(self):
+        """Cumulative tokenizer vs forward-pass time and padding overhead"""
+        with self._timing_lock:
+            stats = dict(self.timings)
+        stats['padding_overhead'] = (
+            (stats['padded_tokens'] - stats['tokens']) / stats['padded_tokens'] if stats['padded_tokens'] else 0.0
+        )
+        return stats
+    
+    def _to_prediction(self, probabilities):
+        """Turn one text's probability row into (emotion_class, confidence, emotion_label, probabilities)"""
+        # Find the emotion with highest confidence
+        best_index = int(np.argmax(probabilities))
+        emotion_label = self.labels[best_index]
+        confidence = float(probabilities[best_index])
+        
+        # Map to our emotion system
+        emotion_class = self.emotion_mapping.get(emotion_label, 0)  # default to sad
+        
+        # Full distribution (ordered as self.labels) for distribution-aware ranking
+        distribution = tuple(round(float(p), 4) for p in probabilities)
+        
+        return emotion_class, confidence, emotion_label, distribution
     
     def predict_emotion(self, text):
         """
@@ -31,26 +162,65 @@ class TextEmotionClassifier:
             text (str): Input text to analyze
             
         Returns:
-            int: Emotion class (0=sad, 1=happy, 2=surprise, 3=angry, 4=fear, 5=disgust)
+            tuple: (emotion_class, confidence, emotion_label, probabilities), where emotion_class is
+                0=sad, 1=happy, 2=surprise, 3=angry, 4=fear, 5=disgust and probabilities are per
+                model label, ordered as self.labels; (0, 0.0, "error") if prediction failed
         """
         try:
-            # Get predictions from the model
-            results = self.classifier(text)
+            if self.cache is not None:
+                cached = self.cache.get(text)
+                if cached is not None:
+                    return cached
             
-            # Find the emotion with highest confidence
-            best_emotion = max(results[0], key=lambda x: x['score'])
-            emotion_label = best_emotion['label']
-            confidence = best_emotion['score']
-            
-            # Map to our emotion system
-            emotion_class = self.emotion_mapping.get(emotion_label, 0)  # default to sad
+            # Get predictions from the model
+            probabilities = self.predict_probabilities([text])
+            prediction = self._to_prediction(probabilities[0])
             
-            return emotion_class, confidence, emotion_label
+            if self.cache is not None:
+                self.cache.put(text, prediction)
+            return prediction
             
         except Exception as e:
             print(f"Error in emotion prediction: {e}")
             return 0, 0.0, "error"  # default to sad
     
+    def predict_emotions(self, texts):
+        """
+        Predict emotions for several texts with padded, batched forward passes
+        
+        Args:
+            texts (list[str]): Input texts to analyze
+            
+        Returns:
+            list[tuple]: (emotion_class, confidence, emotion_label, probabilities) for each text, in input order
+                ((0, 0.0, "error") for texts the model failed on)
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        
+        predictions = [None] * len(texts)
+        try:
+            if self.cache is not None:
+                for i, text in enumerate(texts):
+                    predictions[i] = self.cache.get(text)
+            
+            # Only run the model on texts we haven't seen
+            misses = [i for i, prediction in enumerate(predictions) if prediction is None]
+            if misses:
+                probabilities = self.predict_probabilities([texts[i] for i in misses])
+                for i, row in zip(misses, probabilities):
+                    predictions[i] = self._to_prediction(row)
+                    if self.cache is not None:
+                        self.cache.put(texts[i], predictions[i])
+            
+            return predictions
+            
+        except Exception as e:
+            print(f"Error in batch emotion prediction: {e}")
+            # Cache hits are still good; only the texts left without a prediction failed
+            return [prediction if prediction is not None else (0, 0.0, "error") for prediction in predictions]
+    
     def get_emotion_probabilities(self, text):
         """
         Get probability distribution for all emotions
@@ -62,15 +232,8 @@ class TextEmotionClassifier:
             dict: Dictionary with emotion probabilities
         """
         try:
-            results = self.classifier(text)
-            emotion_probs = {}
-            
-            for result in results[0]:
-                emotion_label = result['label']
-                probability = result['score']
-                emotion_probs[emotion_label] = probability
-            
-            return emotion_probs
+            probabilities = self.predict_probabilities([text])[0]
+            return {label: float(p) for label, p in zip(self.labels, probabilities)}
             
         except Exception as e:
             print(f"Error getting emotion probabilities: {e}")
@@ -95,7 +258,7 @@ if __name__ == "__main__":
     print("=" * 50)
     
     for text in test_texts:
-        emotion_class, confidence, emotion_label = text_classifier.predict_emotion(text)
+        emotion_class, confidence, emotion_label = text_classifier.predict_emotion(text)[:3]
         print(f"Text: '{text}'")
         print(f"Predicted Emotion: {emotion_label} (Class: {emotion_class})")
         print(f"Confidence: {confidence:.3f}")
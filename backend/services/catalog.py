@@ -0,0 +1,123 @@
+"""
+Compact in-memory representation of the movie catalog
+
+compact_catalog downcasts numeric columns (float32 ratings, int16 years) and
+moves text columns into Arrow-backed string arrays, which keep all values in
+one contiguous buffer instead of one Python object per cell. Genres are
+already a uint16 bitmask (see genre_tagger). pyarrow ships with the
+`datasets` dependency; without it text columns stay as Python objects.
+
+Usage:
+    python catalog.py    # per-column memory report for a synthetic catalog, before and after
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (enables the 'string[pyarrow]' dtype)
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = None
+
+# Decimals kept when float columns are returned to clients
+OUTPUT_DECIMALS = 2
+
+
+def compact_catalog(movies):
+    """
+    Return a compact copy of a catalog frame
+
+    Args:
+        movies (pd.DataFrame): Catalog as loaded and preprocessed
+
+    Returns:
+        pd.DataFrame: Same rows and columns with a fresh RangeIndex (row position == label)
+    """
+    movies = movies.reset_index(drop=True)
+    for column in movies.columns:
+        series = movies[column]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_float_dtype(series) and series.dtype.itemsize > 4:
+            movies[column] = series.astype(np.float32)
+        elif pd.api.types.is_signed_integer_dtype(series):
+            movies[column] = pd.to_numeric(series, downcast='integer')
+        elif STRING_DTYPE and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+            movies[column] = series.astype(STRING_DTYPE)
+    return movies
+
+
+def widen_float32(values, decimals=OUTPUT_DECIMALS):
+    """
+    float32 values -> float64 without float32 rounding noise (9.3, not 9.300000190734863)
+
+    Meant for the handful of rows returned to clients; other dtypes pass through.
+
+    Args:
+        values (np.array): Column values
+        decimals (int): Decimals to round to; None keeps every digit float32 holds (9.243677)
+
+    Returns:
+        np.array: float64 values for float32 input, otherwise the input unchanged
+    """
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        return values
+    if decimals is None:
+        return np.array([float(str(value)) for value in values], dtype=np.float64)
+    return np.round(values.astype(np.float64), decimals)
+
+
+def memory_usage(movies):
+    """
+    Memory used by a catalog frame, broken down by column
+
+    Returns:
+        dict: rows, total_bytes, bytes_per_movie, index_bytes and per column
+            {'dtype', 'bytes', 'bytes_per_movie'}
+    """
+    usage = movies.memory_usage(index=True, deep=True)
+    rows = len(movies)
+    total = int(usage.sum())
+    return {
+        'rows': rows,
+        'total_bytes': total,
+        'bytes_per_movie': round(total / rows, 1) if rows else 0.0,
+        'index_bytes': int(usage['Index']),
+        'columns': {
+            column: {
+                'dtype': str(movies[column].dtype),
+                'bytes': int(usage[column]),
+                'bytes_per_movie': round(usage[column] / rows, 1) if rows else 0.0
+            }
+            for column in movies.columns
+        }
+    }
+
+
+def print_memory_report(report, title):
+    print(f"{title}: {report['rows']} movies, {report['total_bytes'] / 2**20:.2f} MB "
+          f"({report['bytes_per_movie']} bytes/movie)")
+    for column, stats in report['columns'].items():
+        print(f"   {column:<12}{stats['dtype']:<18}{stats['bytes'] / 2**20:>9.2f} MB")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    size = 28655
+    genre_names = ['action', 'comedy', 'drama', 'romance', 'thriller', 'horror']
+    catalog = pd.DataFrame({
+        'title': [f"Movie {i}" for i in range(size)],
+        'overview': [' '.join(rng.choice(['a', 'young', 'hero', 'city', 'love', 'war', 'secret'], 40))
+                     for _ in range(size)],
+        'rating': rng.uniform(7.0, 9.5, size),
+        'year': rng.integers(1990, 2024, size),
+    })
+    catalog['genres'] = [list(rng.choice(genre_names, 2, replace=False)) for _ in range(size)]
+    # Python object strings, as older pandas versions load them
+    catalog = catalog.astype({'title': object, 'overview': object})
+    print_memory_report(memory_usage(catalog), "Object columns + genre lists")
+
+    catalog['genre_mask'] = rng.integers(1, 1 << 11, size).astype(np.uint16)
+    print_memory_report(memory_usage(compact_catalog(catalog.drop(columns='genres'))), "Compact catalog")
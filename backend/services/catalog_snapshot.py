@@ -0,0 +1,214 @@
+"""
+Versioned on-disk snapshot of the preprocessed movie catalog
+
+A snapshot directory holds the compact catalog as an uncompressed Arrow IPC
+file, the derived numpy indexes as .npy files and a manifest with the
+sha256 of every file. Loading memory-maps both, so startup skips the
+dataset download, genre tagging and index build, and pre-forked workers
+share the pages. The snapshot version is a hash of everything the
+preprocessing depends on (dataset and its revision, seed, genre table,
+clusters, scoring); a version mismatch or a bad checksum means the caller
+rebuilds.
+
+Bump SNAPSHOT_FORMAT whenever preprocessing changes in a way the
+fingerprint doesn't capture.
+
+Usage:
+    python catalog_snapshot.py build     # rebuild from the dataset and write a snapshot
+    python catalog_snapshot.py verify    # check the snapshot checksums
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+SNAPSHOT_FORMAT = 1
+CATALOG_FILE = 'catalog.arrow'
+MANIFEST_FILE = 'manifest.json'
+
+
+def snapshot_version(fingerprint):
+    """Short stable hash of the preprocessing inputs"""
+    payload = json.dumps({'format': SNAPSHOT_FORMAT, **fingerprint}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_snapshot(root, version, movies, arrays, metadata=None):
+    """
+    Write a snapshot atomically and remove snapshots of other versions
+
+    Args:
+        root (str): Directory holding one subdirectory per version
+        version (str): Output of snapshot_version
+        movies (pd.DataFrame): Compact catalog (RangeIndex)
+        arrays (dict): Index name -> np.array
+        metadata (dict): Extra JSON-serializable information for the manifest
+
+    Returns:
+        str: Path of the snapshot directory
+    """
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{version}-", dir=root)
+    try:
+        table = pa.Table.from_pandas(movies, preserve_index=False)
+        with pa.OSFile(os.path.join(staging, CATALOG_FILE), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+
+        manifest = {
+            'format': SNAPSHOT_FORMAT,
+            'version': version,
+            'rows': len(movies),
+            'created_at': time.time(),
+            'arrays': sorted(arrays),
+            'files': {name: file_sha256(os.path.join(staging, name)) for name in sorted(os.listdir(staging))},
+            'metadata': metadata or {}
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+
+        final = os.path.join(root, version)
+        if os.path.exists(final):
+            shutil.rmtree(final)
+        os.replace(staging, final)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Older versions can't be loaded any more
+    for name in os.listdir(root):
+        if name != version and not name.startswith('.') and os.path.exists(os.path.join(root, name, MANIFEST_FILE)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return final
+
+
+def _arrow_types(arrow_type):
+    # Keep text in the Arrow buffers instead of converting to Python strings
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+def read_manifest(root, version):
+    path = os.path.join(root, version, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_versions(root, fingerprint, ignore=()):
+    """
+    Versions of the snapshots in root built from a matching fingerprint
+
+    Args:
+        root (str): Directory holding one subdirectory per version
+        fingerprint (dict): Fingerprint stored in the manifest metadata
+        ignore (tuple): Fingerprint keys whose values may differ
+
+    Returns:
+        list: Matching versions, newest first
+    """
+    if not os.path.isdir(root):
+        return []
+    # Round trip through JSON so tuples and int keys compare like the stored copy
+    wanted = json.loads(json.dumps(fingerprint, default=str))
+    manifests = []
+    for name in os.listdir(root):
+        manifest = read_manifest(root, name) if not name.startswith('.') else None
+        stored = (manifest or {}).get('metadata', {}).get('fingerprint')
+        if stored is None or stored.keys() != wanted.keys():
+            continue
+        if all(stored[key] == value for key, value in wanted.items() if key not in ignore):
+            manifests.append(manifest)
+    manifests.sort(key=lambda manifest: manifest.get('created_at', 0), reverse=True)
+    return [manifest['version'] for manifest in manifests]
+
+
+def verify_snapshot(root, version, manifest):
+    """Return the names of files whose checksum doesn't match the manifest"""
+    directory = os.path.join(root, version)
+    return [name for name, digest in manifest['files'].items()
+            if not os.path.exists(os.path.join(directory, name))
+            or file_sha256(os.path.join(directory, name)) != digest]
+
+
+def load_snapshot(root, version, verify_checksum=True):
+    """
+    Memory-map a snapshot
+
+    Args:
+        root (str): Directory holding one subdirectory per version
+        version (str): Expected version; any other snapshot counts as stale
+        verify_checksum (bool): Check every file against the manifest first
+
+    Returns:
+        tuple: (movies, arrays, manifest), or None if missing, stale or corrupt
+    """
+    manifest = read_manifest(root, version)
+    if manifest is None:
+        print(f"No catalog snapshot for version {version}")
+        return None
+    if manifest.get('format') != SNAPSHOT_FORMAT or manifest.get('version') != version:
+        print(f"Catalog snapshot {version} is stale (format {manifest.get('format')})")
+        return None
+    if verify_checksum:
+        corrupt = verify_snapshot(root, version, manifest)
+        if corrupt:
+            print(f"Catalog snapshot {version} failed checksum: {', '.join(corrupt)}")
+            return None
+
+    directory = os.path.join(root, version)
+    # The table keeps the mapping alive; pages are shared with other processes
+    source = pa.memory_map(os.path.join(directory, CATALOG_FILE), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    movies = table.to_pandas(split_blocks=True, types_mapper=_arrow_types)
+    arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in manifest['arrays']}
+    return movies, arrays, manifest
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+    from models_config import CATALOG_SETTINGS
+    from movie_recommender_hf import MovieRecommenderHF
+
+    parser = argparse.ArgumentParser(description="Build or verify the preprocessed catalog snapshot")
+    parser.add_argument('command', choices=['build', 'verify'])
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        recommender = MovieRecommenderHF(snapshot=False)
+        if recommender.catalog_source != 'dataset':
+            sys.exit("Dataset could not be loaded; not writing a snapshot of the sample data")
+        path = recommender.save_snapshot()
+        print(f"Wrote {path} in {time.perf_counter() - started:.1f}s")
+    else:
+        root = CATALOG_SETTINGS['snapshot_dir']
+        versions = [name for name in sorted(os.listdir(root)) if read_manifest(root, name)] if os.path.isdir(root) else []
+        if not versions:
+            sys.exit(f"No catalog snapshot in {root}")
+        for version in versions:
+            manifest = read_manifest(root, version)
+            corrupt = verify_snapshot(root, version, manifest)
+            print(f"Snapshot {version}: {manifest['rows']} movies, "
+                  f"{'OK' if not corrupt else 'corrupt: ' + ', '.join(corrupt)}")
@@ -0,0 +1,376 @@
+"""
+Overview embeddings and a nearest-neighbour index for mood ranking
+
+An offline job embeds every overview with a local sentence encoder
+(mean-pooled, L2-normalized, length-sorted batches) straight into a float16
+.npy through a memmap. It also stores one query vector per emotion, built
+from MovieRecommenderHF.emotion_mood_mapping, and optionally an IVF
+partition. Artifacts live in EMBEDDING_SETTINGS['artifact_dir']/<catalog
+version>, so they always line up with the catalog rows they were computed
+from; the server memory-maps them and never loads the encoder.
+
+    exact - brute force: float16 blocks widened to float32 and scored with
+            one BLAS matrix product each
+    ivf   - k-means lists; a query only scores the rows of the ivf_probes
+            lists whose centroids are nearest to it
+
+Usage:
+    python embedding_index.py build [--ivf]   # embed the overviews of the current catalog
+    python embedding_index.py bench           # exact vs IVF query latency at 28k and 1M rows
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+from models_config import EMBEDDING_SETTINGS
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+MOOD_VECTORS_FILE = 'mood_vectors.npy'
+IVF_FILES = ('ivf_centroids.npy', 'ivf_offsets.npy', 'ivf_rows.npy')
+MANIFEST_FILE = 'manifest.json'
+
+# Rows widened to float32 per BLAS call in exact search
+BLOCK_ROWS = 65536
+
+# Exact search keeps a widened float32 copy of matrices up to this size;
+# larger ones are widened block by block on every query
+FLOAT32_COPY_MAX_BYTES = 256 * 2**20
+
+
+def artifact_path(version):
+    """Directory holding the embedding artifacts for a catalog version"""
+    return os.path.join(EMBEDDING_SETTINGS['artifact_dir'], version)
+
+
+def normalize_rows(vectors):
+    """L2-normalize each row (zero rows stay zero)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceEncoder:
+    """Mean-pooled transformer sentence embeddings (torch and transformers are only needed offline)"""
+
+    def __init__(self, model_name=None, batch_size=None, max_length=None, device=None):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.torch = torch
+        self.model_name = model_name or EMBEDDING_SETTINGS['model']
+        self.batch_size = batch_size or EMBEDDING_SETTINGS['batch_size']
+        device = device or EMBEDDING_SETTINGS['device']
+        if device == 'auto':
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.device = device
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModel.from_pretrained(self.model_name).to(self.device).eval()
+        self.max_length = min(max_length or EMBEDDING_SETTINGS['max_length'], self.tokenizer.model_max_length)
+        self.dim = self.model.config.hidden_size
+
+    def encode(self, texts):
+        """
+        Embed texts
+
+        Args:
+            texts (list[str]): Input texts (missing values count as empty)
+
+        Returns:
+            np.ndarray: (len(texts), dim) float32 unit vectors, in input order
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        # Similar lengths share a batch, so little compute goes into padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = self.tokenizer([texts[i] for i in batch], padding=True, truncation=True,
+                                     max_length=self.max_length, return_tensors='pt').to(self.device)
+            with self.torch.no_grad():
+                hidden = self.model(**encoded).last_hidden_state
+            mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            embeddings[batch] = pooled.float().cpu().numpy()
+        return normalize_rows(embeddings)
+
+
+def write_embeddings(directory, texts, encoder, chunk_size=4096):
+    """
+    Embed texts chunk by chunk into a float16 .npy without holding the matrix in memory
+
+    Args:
+        directory (str): Output directory
+        texts (list[str]): One text per catalog row
+        encoder (SentenceEncoder): Encoder to run
+        chunk_size (int): Texts encoded between progress reports
+
+    Returns:
+        np.memmap: The written (len(texts), dim) matrix, opened read-only
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, EMBEDDINGS_FILE)
+    staging = path + '.partial'
+    matrix = np.lib.format.open_memmap(staging, mode='w+', dtype=np.float16, shape=(len(texts), encoder.dim))
+    started = time.perf_counter()
+    for start in range(0, len(texts), chunk_size):
+        end = min(start + chunk_size, len(texts))
+        matrix[start:end] = encoder.encode(texts[start:end])
+        elapsed = time.perf_counter() - started
+        print(f"Embedded {end}/{len(texts)} overviews ({end / elapsed:.0f}/s)")
+    matrix.flush()
+    del matrix
+    os.replace(staging, path)
+    return np.load(path, mmap_mode='r')
+
+
+def mood_query_vectors(encoder, emotion_mood_mapping):
+    """
+    One unit query vector per emotion: the mean embedding of "a <keyword> movie" over its mood keywords
+
+    Returns:
+        np.ndarray: (max emotion + 1, dim) float32; row = emotion class
+    """
+    vectors = np.zeros((max(emotion_mood_mapping) + 1, encoder.dim), dtype=np.float32)
+    for emotion, keywords in emotion_mood_mapping.items():
+        vectors[emotion] = encoder.encode([f"a {keyword} movie" for keyword in keywords]).mean(axis=0)
+    return normalize_rows(vectors)
+
+
+def build_ivf(vectors, num_lists, iterations=10, sample_size=None, rng=None):
+    """
+    Partition rows into lists with spherical k-means
+
+    Centroids are trained on a sample; every row is then assigned to its
+    nearest centroid, blockwise.
+
+    Args:
+        vectors (np.ndarray): (N, dim) unit vectors (float16 memmap is fine)
+        num_lists (int): Number of lists
+        iterations (int): k-means iterations
+        sample_size (int): Rows used for training (default 64 per list)
+        rng (np.random.Generator): Source of randomness
+
+    Returns:
+        tuple: (centroids (lists, dim) float32, offsets (lists + 1) int64, rows int32 grouped by list)
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    num_rows = len(vectors)
+    num_lists = max(1, min(num_lists, num_rows))
+    sample_size = min(num_rows, sample_size or num_lists * 64)
+    sample = np.asarray(vectors[np.sort(rng.choice(num_rows, sample_size, replace=False))], dtype=np.float32)
+
+    centroids = sample[rng.choice(sample_size, num_lists, replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=num_lists)
+        # Empty lists keep their previous centroid
+        centroids = np.where(counts[:, None] > 0, normalize_rows(sums), centroids)
+
+    assignment = np.empty(num_rows, dtype=np.int32)
+    for start in range(0, num_rows, BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    rows = np.argsort(assignment, kind='stable').astype(np.int32)
+    offsets = np.searchsorted(assignment[rows], np.arange(num_lists + 1)).astype(np.int64)
+    return centroids.astype(np.float32), offsets, rows
+
+
+class EmbeddingIndex:
+    def __init__(self, vectors, ivf=None, probes=None):
+        """
+        Args:
+            vectors (np.ndarray): (N, dim) unit vectors, typically a float16 memmap
+            ivf (tuple): (centroids, offsets, rows) from build_ivf; None for exact search only
+            probes (int): IVF lists scored per query (defaults to EMBEDDING_SETTINGS['ivf_probes'])
+        """
+        self.vectors = vectors
+        self.ivf = ivf
+        self.probes = probes or EMBEDDING_SETTINGS['ivf_probes']
+        # float16 -> float32 conversion costs more than the matrix product itself
+        self._widened = None
+        if vectors.dtype != np.float32 and vectors.size * 4 <= FLOAT32_COPY_MAX_BYTES:
+            self._widened = np.asarray(vectors, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @property
+    def mode(self):
+        return 'ivf' if self.ivf is not None else 'exact'
+
+    def similarities(self, queries, rows=None):
+        """
+        Exact cosine similarities
+
+        Args:
+            queries (np.ndarray): (dim,) or (dim, m) unit query vectors
+            rows (np.ndarray): Only score these rows (all rows when None)
+
+        Returns:
+            np.ndarray: (n,) or (n, m) float32, n = len(rows) or N
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if self._widened is not None:
+            return (self._widened if rows is None else self._widened[rows]) @ queries
+        if rows is not None:
+            return np.asarray(self.vectors[rows], dtype=np.float32) @ queries
+        scores = np.empty((len(self.vectors),) + queries.shape[1:], dtype=np.float32)
+        for start in range(0, len(self.vectors), BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ queries
+        return scores
+
+    def search(self, query, k, exact=None):
+        """
+        Nearest rows to a query vector
+
+        Args:
+            query (np.ndarray): (dim,) unit vector
+            k (int): Number of rows to return
+            exact (bool): Force brute force even when an IVF partition is loaded
+
+        Returns:
+            tuple: (rows, similarities) best first
+        """
+        if exact or self.ivf is None:
+            rows = None
+            scores = self.similarities(query)
+        else:
+            centroids, offsets, list_rows = self.ivf
+            probes = min(self.probes, len(centroids))
+            nearest = np.argpartition(-(centroids @ np.asarray(query, dtype=np.float32)), probes - 1)[:probes]
+            rows = np.sort(np.concatenate([list_rows[offsets[i]:offsets[i + 1]] for i in nearest]))
+            scores = self.similarities(query, rows)
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        positions = rows[top] if rows is not None else top
+        return positions.astype(np.int64), scores[top]
+
+
+def load_embeddings(version, rows, mode=None):
+    """
+    Memory-map the embedding artifacts of a catalog version
+
+    Args:
+        version (str): Catalog snapshot version
+        rows (int): Catalog size the embeddings must match
+        mode (str): 'exact' or 'ivf' (defaults to EMBEDDING_SETTINGS['index'])
+
+    Returns:
+        tuple: (EmbeddingIndex, mood vectors, manifest), or None if missing or stale
+    """
+    directory = artifact_path(version)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        print(f"No overview embeddings for catalog {version} (run services/embedding_index.py build)")
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('rows') != rows:
+        print(f"Overview embeddings for catalog {version} have {manifest.get('rows')} rows, expected {rows}")
+        return None
+
+    vectors = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode='r')
+    mood_vectors = np.load(os.path.join(directory, MOOD_VECTORS_FILE))
+    ivf = None
+    if (mode or EMBEDDING_SETTINGS['index']) == 'ivf':
+        if all(os.path.exists(os.path.join(directory, name)) for name in IVF_FILES):
+            ivf = tuple(np.load(os.path.join(directory, name), mmap_mode='r') for name in IVF_FILES)
+        else:
+            print("No IVF partition for these embeddings (run build --ivf), using exact search")
+    return EmbeddingIndex(vectors, ivf), mood_vectors, manifest
+
+
+def build_artifacts(recommender, ivf=False):
+    """Embed the recommender's catalog and write all artifacts for its version"""
+    version = recommender.catalog_version()
+    directory = artifact_path(version)
+    encoder = SentenceEncoder()
+
+    started = time.perf_counter()
+    # Title first: short overviews say little on their own
+    movies = recommender.movies_df
+    texts = [f"{title}. {overview}" if isinstance(overview, str) else str(title)
+             for title, overview in zip(movies['title'].tolist(), movies['overview'].tolist())]
+    vectors = write_embeddings(directory, texts, encoder)
+    np.save(os.path.join(directory, MOOD_VECTORS_FILE), mood_query_vectors(encoder, recommender.emotion_mood_mapping))
+
+    if ivf:
+        num_lists = EMBEDDING_SETTINGS['ivf_lists'] or int(4 * np.sqrt(len(vectors)))
+        for name, array in zip(IVF_FILES, build_ivf(vectors, num_lists)):
+            np.save(os.path.join(directory, name), array)
+
+    manifest = {
+        'version': version,
+        'rows': len(vectors),
+        'dim': int(vectors.shape[1]),
+        'model': encoder.model_name,
+        'ivf': ivf,
+        'created_at': time.time(),
+        'seconds': time.perf_counter() - started
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return directory
+
+
+def benchmark(sizes=(28655, 1000000), dim=384, queries=20):
+    """Exact vs IVF latency and recall@10 on clustered random vectors"""
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        centers = normalize_rows(rng.standard_normal((512, dim)).astype(np.float32))
+        vectors = np.empty((size, dim), dtype=np.float16)
+        for start in range(0, size, BLOCK_ROWS):
+            count = min(BLOCK_ROWS, size - start)
+            noise = rng.standard_normal((count, dim), dtype=np.float32)
+            vectors[start:start + count] = normalize_rows(centers[rng.integers(0, 512, count)] + noise / np.sqrt(dim))
+        query_vectors = normalize_rows(vectors[rng.integers(0, size, queries)].astype(np.float32) + 0.05 * rng.standard_normal((queries, dim)).astype(np.float32))
+
+        started = time.perf_counter()
+        ivf = build_ivf(vectors, int(4 * np.sqrt(size)), rng=rng)
+        ivf_seconds = time.perf_counter() - started
+        index = EmbeddingIndex(vectors, ivf)
+
+        timings = {'exact': [], 'ivf': []}
+        recall = []
+        for query in query_vectors:
+            started = time.perf_counter()
+            exact_rows, _ = index.search(query, 10, exact=True)
+            timings['exact'].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            ivf_rows, _ = index.search(query, 10)
+            timings['ivf'].append(time.perf_counter() - started)
+            recall.append(len(np.intersect1d(exact_rows, ivf_rows)) / 10)
+
+        print(f"{size} x {dim} float16 ({vectors.nbytes / 2**20:.0f} MB, "
+              f"{'float32 copy' if index._widened is not None else 'widened per query'}), IVF built in {ivf_seconds:.1f}s:")
+        for name, values in timings.items():
+            print(f"   {name:<6}{np.median(values) * 1000:>9.2f} ms/query")
+        print(f"   IVF recall@10 {np.mean(recall):.2f} ({index.probes} of {len(ivf[0])} lists probed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline overview embeddings for mood ranking")
+    parser.add_argument('command', choices=['build', 'bench'])
+    parser.add_argument('--ivf', action='store_true', help="also build an IVF partition (large catalogs)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from movie_recommender_hf import MovieRecommenderHF
+        recommender = MovieRecommenderHF()
+        if recommender.catalog_source == 'sample':
+            sys.exit("Dataset could not be loaded; not embedding the sample data")
+        print(f"Wrote {build_artifacts(recommender, ivf=args.ivf)}")
+    else:
+        benchmark()
@@ -0,0 +1,251 @@
+"""
+Per-movie emotion profiles from the text emotion model
+
+An offline job runs TextEmotionClassifier over every overview and stores,
+per catalog row, the probability of each of our 7 emotion classes (model
+labels folded through TEXT_EMOTION_MAPPING) as an (N, 7) float32 .npy. The
+catalog is cut into chunks that worker processes classify independently;
+each finished chunk is written atomically, so an interrupted run resumes
+where it stopped. Once every chunk exists they are assembled into one file
+in EMOTION_PROFILE_SETTINGS['artifact_dir']/<catalog version>, next to
+the catalog snapshot of the same version, and memory-mapped by the
+recommender for ranking='emotion'.
+
+Usage:
+    python emotion_profiles.py build [--workers N] [--chunk-size N]
+    python emotion_profiles.py status    # chunks done for the current catalog
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'models'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+from models_config import EMOTION_PROFILE_SETTINGS, TEXT_EMOTION_MAPPING, TEXT_EMOTION_MODEL, TEXT_INFERENCE_SETTINGS
+
+PROFILES_FILE = 'profiles.npy'
+MANIFEST_FILE = 'manifest.json'
+CHUNKS_DIR = 'chunks'
+JOB_FILE = 'job.json'
+
+NUM_CLASSES = max(TEXT_EMOTION_MAPPING.values()) + 1
+
+
+def artifact_path(version):
+    """Directory holding the emotion profiles for a catalog version"""
+    return os.path.join(EMOTION_PROFILE_SETTINGS['artifact_dir'], version)
+
+
+def chunk_path(directory, start):
+    return os.path.join(directory, CHUNKS_DIR, f"chunk_{start:010d}.npy")
+
+
+def class_profiles(probabilities, labels, emotion_mapping=TEXT_EMOTION_MAPPING):
+    """
+    Fold model label probabilities into emotion class probabilities
+
+    Args:
+        probabilities (np.ndarray): (n, len(labels)) softmax output
+        labels (list[str]): Model label per column
+        emotion_mapping (dict): Model label -> emotion class
+
+    Returns:
+        np.ndarray: (n, NUM_CLASSES) float32; labels outside the mapping are dropped
+    """
+    profiles = np.zeros((len(probabilities), NUM_CLASSES), dtype=np.float32)
+    for column, label in enumerate(labels):
+        if label in emotion_mapping:
+            profiles[:, emotion_mapping[label]] += probabilities[:, column]
+    return profiles
+
+
+def validate_distribution(distribution):
+    """
+    Check a user's emotion distribution before ranking with it
+
+    Args:
+        distribution (array-like): Probability (or weight) per emotion class
+
+    Returns:
+        np.ndarray: (NUM_CLASSES,) float32
+
+    Raises:
+        ValueError: For the wrong number of values or negative / non-finite ones
+    """
+    distribution = np.asarray(distribution, dtype=np.float32)
+    if distribution.shape != (NUM_CLASSES,):
+        raise ValueError(f"Emotion distribution needs {NUM_CLASSES} values, got shape {distribution.shape}")
+    if not np.all(np.isfinite(distribution)) or np.any(distribution < 0):
+        raise ValueError("Emotion distribution values must be finite and non-negative")
+    return distribution
+
+
+# One classifier per worker process, loaded by _init_worker
+_classifier = None
+
+
+def _init_worker(threads):
+    global _classifier
+    if threads:
+        import torch
+        torch.set_num_threads(int(threads))
+    from text_emotion_hf import TextEmotionClassifier
+    _classifier = TextEmotionClassifier()
+    # Every overview is seen once; caching them would only use memory
+    _classifier.cache = None
+
+
+def _profile_chunk(task):
+    """Classify one chunk and write it atomically; returns (start, rows)"""
+    start, texts, path = task
+    profiles = np.zeros((len(texts), NUM_CLASSES), dtype=np.float32)
+    # Missing overviews carry no emotion rather than whatever the model makes of ''
+    present = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    if present:
+        probabilities = _classifier.predict_probabilities([texts[i] for i in present])
+        profiles[present] = class_profiles(probabilities, _classifier.labels, _classifier.emotion_mapping)
+
+    staging = path + '.partial.npy'
+    np.save(staging, profiles)
+    os.replace(staging, path)
+    return start, len(texts)
+
+
+def build_profiles(recommender, workers=None, chunk_size=None):
+    """
+    Profile every overview of the recommender's catalog, resuming from finished chunks
+
+    Args:
+        recommender (MovieRecommenderHF): Loaded recommender (its catalog version names the output)
+        workers (int): Worker processes (defaults to EMOTION_PROFILE_SETTINGS['workers'], 0 = CPU count)
+        chunk_size (int): Overviews per chunk (finished chunks of a different size are discarded)
+
+    Returns:
+        str: Output directory
+    """
+    version = recommender.catalog_version()
+    directory = artifact_path(version)
+    chunk_size = chunk_size or EMOTION_PROFILE_SETTINGS['chunk_size']
+    workers = workers if workers is not None else EMOTION_PROFILE_SETTINGS['workers']
+    workers = workers or os.cpu_count() or 1
+    overviews = recommender.movies_df['overview'].tolist()
+
+    # Chunks from a run with another layout can't be reused
+    job = {'rows': len(overviews), 'chunk_size': chunk_size, 'model': TEXT_EMOTION_MODEL}
+    chunks = os.path.join(directory, CHUNKS_DIR)
+    job_path = os.path.join(chunks, JOB_FILE)
+    if os.path.exists(job_path):
+        with open(job_path) as f:
+            if json.load(f) != job:
+                print("Discarding chunks from a run with a different chunk size or model")
+                shutil.rmtree(chunks)
+    os.makedirs(chunks, exist_ok=True)
+    with open(job_path, 'w') as f:
+        json.dump(job, f)
+
+    starts = range(0, len(overviews), chunk_size)
+    tasks = [(start, overviews[start:start + chunk_size], chunk_path(directory, start))
+             for start in starts if not os.path.exists(chunk_path(directory, start))]
+    print(f"{len(starts) - len(tasks)}/{len(starts)} chunks already done, "
+          f"{len(tasks)} to go on {workers} worker(s)")
+
+    started = time.perf_counter()
+    done = 0
+    if workers > 1 and len(tasks) > 1:
+        # spawn: forking a process that already holds torch state can deadlock
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(EMOTION_PROFILE_SETTINGS['threads_per_worker'],)) as pool:
+            for _, rows in pool.imap_unordered(_profile_chunk, tasks):
+                done += rows
+                print(f"Profiled {done} overviews ({done / (time.perf_counter() - started):.0f}/s)")
+    elif tasks:
+        _init_worker(TEXT_INFERENCE_SETTINGS.get('num_threads'))
+        for task in tasks:
+            _, rows = _profile_chunk(task)
+            done += rows
+            print(f"Profiled {done} overviews ({done / (time.perf_counter() - started):.0f}/s)")
+
+    # Assemble once every chunk is on disk
+    path = os.path.join(directory, PROFILES_FILE)
+    staging = path + '.partial.npy'
+    profiles = np.lib.format.open_memmap(staging, mode='w+', dtype=np.float32, shape=(len(overviews), NUM_CLASSES))
+    for start in starts:
+        profiles[start:start + chunk_size] = np.load(chunk_path(directory, start))
+    profiles.flush()
+    del profiles
+    os.replace(staging, path)
+
+    manifest = {
+        'version': version,
+        'rows': len(overviews),
+        'classes': NUM_CLASSES,
+        'model': TEXT_EMOTION_MODEL,
+        'backend': TEXT_INFERENCE_SETTINGS['backend'],
+        'created_at': time.time()
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(os.path.join(directory, CHUNKS_DIR), ignore_errors=True)
+    return directory
+
+
+def load_profiles(version, rows):
+    """
+    Memory-map the emotion profiles of a catalog version
+
+    Args:
+        version (str): Catalog snapshot version
+        rows (int): Catalog size the profiles must match
+
+    Returns:
+        tuple: ((rows, NUM_CLASSES) float32 profiles, manifest), or None if missing or stale
+    """
+    directory = artifact_path(version)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        print(f"No emotion profiles for catalog {version} (run services/emotion_profiles.py build)")
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('rows') != rows or manifest.get('classes') != NUM_CLASSES:
+        print(f"Emotion profiles for catalog {version} don't match it "
+              f"({manifest.get('rows')} rows x {manifest.get('classes')} classes)")
+        return None
+    return np.load(os.path.join(directory, PROFILES_FILE), mmap_mode='r'), manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline per-movie emotion profiles")
+    parser.add_argument('command', choices=['build', 'status'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=None)
+    args = parser.parse_args()
+
+    from movie_recommender_hf import MovieRecommenderHF
+    recommender = MovieRecommenderHF()
+    if recommender.catalog_source == 'sample':
+        sys.exit("Dataset could not be loaded; not profiling the sample data")
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        directory = build_profiles(recommender, args.workers, args.chunk_size)
+        print(f"Wrote {directory} in {time.perf_counter() - started:.1f}s")
+    else:
+        directory = artifact_path(recommender.catalog_version())
+        chunk_size = args.chunk_size or EMOTION_PROFILE_SETTINGS['chunk_size']
+        total = -(-len(recommender.movies_df) // chunk_size)
+        if os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+            print(f"Complete: {directory}")
+        else:
+            chunks = os.path.join(directory, CHUNKS_DIR)
+            finished = len([name for name in os.listdir(chunks)
+                            if name.startswith('chunk_') and not name.endswith('.partial.npy')]) if os.path.isdir(chunks) else 0
+            print(f"{finished}/{total} chunks done in {directory}")
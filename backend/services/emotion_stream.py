@@ -0,0 +1,113 @@
+"""
+Live emotion stream state for the /ws/emotion WebSocket
+
+Frames arrive faster than the face model can classify them, so a session
+keeps only the newest sampled frame: anything that arrives while inference
+is running replaces the waiting frame instead of queueing behind it, which
+bounds latency to roughly one inference. Per-frame probabilities are
+smoothed with an exponential moving average and the caller is told when the
+smoothed emotion class changes.
+"""
+
+import asyncio
+import numpy as np
+
+
+class EmotionSmoother:
+    def __init__(self, alpha=0.3):
+        """
+        Args:
+            alpha (float): Weight of the newest observation (1.0 = no smoothing)
+        """
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"alpha must be in (0, 1], got {alpha}")
+        self.alpha = alpha
+        self.probabilities = None
+        self.emotion_class = None
+
+    def update(self, probabilities):
+        """
+        Fold one frame's class probabilities into the moving average
+
+        Args:
+            probabilities (np.array): Probability per emotion class
+
+        Returns:
+            bool: True if the smoothed emotion class changed (including the first frame)
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if self.probabilities is None:
+            self.probabilities = probabilities.copy()
+        else:
+            self.probabilities = self.alpha * probabilities + (1.0 - self.alpha) * self.probabilities
+
+        emotion_class = int(np.argmax(self.probabilities))
+        changed = emotion_class != self.emotion_class
+        self.emotion_class = emotion_class
+        return changed
+
+    @property
+    def confidence(self):
+        return float(self.probabilities[self.emotion_class]) if self.probabilities is not None else 0.0
+
+    def reset(self):
+        self.probabilities = None
+        self.emotion_class = None
+
+
+class EmotionStreamSession:
+    def __init__(self, frame_stride=3, alpha=0.3):
+        """
+        Args:
+            frame_stride (int): Only every Nth received frame is considered for inference
+            alpha (float): EMA weight passed to EmotionSmoother
+        """
+        self.frame_stride = max(1, int(frame_stride))
+        self.smoother = EmotionSmoother(alpha)
+        self._frame = None
+        self._frame_index = None
+        self._available = asyncio.Event()
+
+        self.received = 0
+        self.skipped = 0  # not sampled by the stride
+        self.dropped = 0  # sampled but replaced by a newer frame, or rejected by the executor
+        self.processed = 0
+        self.no_face = 0
+        self.invalid = 0  # empty, oversized or non-binary messages
+
+    def offer(self, frame):
+        """
+        Hand a received frame to the session (never blocks)
+
+        Returns:
+            bool: True if the frame was kept for inference
+        """
+        self.received += 1
+        if (self.received - 1) % self.frame_stride:
+            self.skipped += 1
+            return False
+
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._frame_index = self.received - 1
+        self._available.set()
+        return True
+
+    async def next_frame(self):
+        """Wait for and take the newest pending frame, returning (frame_index, frame)"""
+        await self._available.wait()
+        self._available.clear()
+        frame, index = self._frame, self._frame_index
+        self._frame = None
+        return index, frame
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'skipped': self.skipped,
+            'dropped': self.dropped,
+            'processed': self.processed,
+            'no_face': self.no_face,
+            'invalid': self.invalid
+        }
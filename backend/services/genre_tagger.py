@@ -0,0 +1,236 @@
+"""
+Vectorized keyword genre tagger for movie overviews
+
+All overviews are lowercased and joined into one byte buffer. One numpy pass
+over the buffer marks every position where some keyword's first three bytes
+occur (a byte-pair lookup table, then a third-byte check); each keyword is
+then confirmed only at its own candidate positions, also in numpy. Hits are folded into a uint16 bitmask per movie, so the
+catalog stores one small integer instead of a Python list of genre names.
+Tagging follows MovieRecommenderHF.extract_genres_from_text exactly:
+keywords match as plain substrings of the lowercased overview, at most three
+genres are kept in GENRE_KEYWORDS order, and untagged overviews default to
+drama.
+
+Usage:
+    python genre_tagger.py    # benchmark against the per-row implementation
+"""
+
+import time
+import numpy as np
+import pandas as pd
+
+# Genre -> keywords; the order decides which three genres are kept
+GENRE_KEYWORDS = {
+    'action': ['action', 'fight', 'battle', 'war', 'combat', 'adventure'],
+    'comedy': ['comedy', 'funny', 'humor', 'laugh', 'hilarious'],
+    'drama': ['drama', 'emotional', 'serious', 'tragic', 'life'],
+    'romance': ['romance', 'love', 'relationship', 'couple', 'romantic'],
+    'thriller': ['thriller', 'suspense', 'mystery', 'crime', 'detective'],
+    'horror': ['horror', 'scary', 'frightening', 'terrifying', 'monster'],
+    'sci-fi': ['sci-fi', 'science fiction', 'space', 'future', 'alien'],
+    'fantasy': ['fantasy', 'magic', 'supernatural', 'wizard', 'dragon'],
+    'family': ['family', 'children', 'kids', 'child', 'parent'],
+    'documentary': ['documentary', 'real', 'true story', 'biography']
+}
+
+# Genres that are never inferred from keywords but occur in curated data
+EXTRA_GENRES = ['crime']
+
+MAX_GENRES = 3
+DEFAULT_GENRE = 'drama'
+
+
+class GenreTagger:
+    def __init__(self, genre_keywords=None, extra_genres=None, max_genres=MAX_GENRES, default_genre=DEFAULT_GENRE):
+        """
+        Compile the keyword table
+
+        Args:
+            genre_keywords (dict): Genre -> keywords (defaults to GENRE_KEYWORDS)
+            extra_genres (list): Additional genre names that get a bit but no keywords
+            max_genres (int): Genres kept per movie, lowest bits (= keyword table order) first
+            default_genre (str): Genre for overviews without any keyword
+        """
+        genre_keywords = GENRE_KEYWORDS if genre_keywords is None else genre_keywords
+        extra_genres = EXTRA_GENRES if extra_genres is None else extra_genres
+
+        self.genres = list(genre_keywords) + [g for g in extra_genres if g not in genre_keywords]
+        if len(self.genres) > 16:
+            raise ValueError(f"At most 16 genres fit a uint16 mask, got {len(self.genres)}")
+        self.bits = {genre: 1 << i for i, genre in enumerate(self.genres)}
+        self.max_genres = max_genres
+        self.default_mask = self.bits[default_genre]
+
+        # keyword -> genre bits
+        self.keyword_bits = {}
+        for genre, keywords in genre_keywords.items():
+            for keyword in keywords:
+                if len(keyword.encode('utf-8')) < 2 or '\0' in keyword:
+                    raise ValueError(f"Keywords need at least two bytes and no NUL, got {keyword!r}")
+                self.keyword_bits[keyword] = self.keyword_bits.get(keyword, 0) | self.bits[genre]
+
+        # Keywords grouped by their first two bytes (packed into a uint16 code),
+        # plus which third bytes can follow each pair
+        self.keywords_by_pair = {}
+        for keyword, bits in self.keyword_bits.items():
+            encoded = np.frombuffer(keyword.encode('utf-8'), dtype=np.uint8)
+            pair = (int(encoded[0]) << 8) | int(encoded[1])
+            self.keywords_by_pair.setdefault(pair, []).append((encoded, bits))
+        self._pair_index = np.full(1 << 16, -1, dtype=np.int16)
+        self._third_bytes = np.zeros((len(self.keywords_by_pair), 256), dtype=bool)
+        for index, (pair, group) in enumerate(self.keywords_by_pair.items()):
+            self._pair_index[pair] = index
+            for encoded, _ in group:
+                if len(encoded) > 2:
+                    self._third_bytes[index, encoded[2]] = True
+                else:
+                    self._third_bytes[index, :] = True
+        self._longest = max(len(encoded) for group in self.keywords_by_pair.values() for encoded, _ in group)
+
+        # mask -> genre names, for decoding results
+        self._decoded = [self._decode_slow(mask) for mask in range(1 << len(self.genres))]
+
+    def tag(self, overviews):
+        """
+        Tag many overviews at once
+
+        Args:
+            overviews (pd.Series | list): Overview texts (missing values allowed)
+
+        Returns:
+            np.array: uint16 genre mask per overview
+        """
+        # Missing overviews become empty strings and end up with the default genre
+        if hasattr(overviews, 'tolist'):
+            overviews = overviews.tolist()
+        texts = [text if isinstance(text, str) else '' for text in overviews]
+        masks = np.zeros(len(texts), dtype=np.uint16)
+        if not texts:
+            return masks
+
+        # NUL separates overviews (keywords never contain it, so no match spans
+        # two overviews); the NUL padding keeps every keyword window in bounds
+        corpus = '\0'.join(texts)
+        if corpus.count('\0') != len(texts) - 1:
+            corpus = '\0'.join(text.replace('\0', '\1') for text in texts)
+        buffer = np.frombuffer((corpus.lower() + '\0' * self._longest).encode('utf-8'), dtype=np.uint8)
+        corpus_end = len(buffer) - self._longest
+        row_starts = np.r_[0, np.flatnonzero(buffer[:corpus_end] == 0) + 1]
+
+        # Pass 1: positions whose first three bytes could start some keyword
+        pairs = (buffer[:corpus_end].astype(np.uint16) << 8) | buffer[1:corpus_end + 1]
+        candidates = np.flatnonzero(self._pair_index[pairs] >= 0)
+        candidate_pairs = pairs[candidates]
+        keep = self._third_bytes[self._pair_index[candidate_pairs], buffer[candidates + 2]]
+        candidates, candidate_pairs = candidates[keep], candidate_pairs[keep]
+        candidate_rows = np.searchsorted(row_starts, candidates, side='right') - 1
+
+        order = np.argsort(candidate_pairs, kind='stable')
+        candidates, candidate_pairs, candidate_rows = candidates[order], candidate_pairs[order], candidate_rows[order]
+
+        # Pass 2: confirm each keyword at the candidates sharing its first bytes
+        for pair, group in self.keywords_by_pair.items():
+            low, high = np.searchsorted(candidate_pairs, [pair, pair + 1])
+            if low == high:
+                continue
+            positions, rows = candidates[low:high], candidate_rows[low:high]
+            for encoded, bits in group:
+                window = buffer[positions[:, None] + np.arange(2, len(encoded))]
+                masks[rows[(window == encoded[2:]).all(axis=1)]] |= bits
+
+        masks = self.limit(masks)
+        masks[masks == 0] = self.default_mask
+        return masks
+
+    def limit(self, masks):
+        """Keep only the max_genres lowest set bits of each mask"""
+        remaining = masks.astype(np.int32)
+        kept = np.zeros_like(remaining)
+        for _ in range(self.max_genres):
+            lowest = remaining & -remaining
+            kept |= lowest
+            remaining ^= lowest
+        return kept.astype(np.uint16)
+
+    def encode(self, genres):
+        """Genre names -> mask (unknown names are ignored)"""
+        mask = 0
+        for genre in genres:
+            mask |= self.bits.get(genre, 0)
+        return mask
+
+    def decode(self, mask):
+        """Mask -> list of genre names in table order"""
+        return list(self._decoded[int(mask)])
+
+    def decode_many(self, masks):
+        """Masks -> list of genre name lists"""
+        return [list(self._decoded[int(mask)]) for mask in masks]
+
+    def _decode_slow(self, mask):
+        return tuple(genre for genre in self.genres if mask & self.bits[genre])
+
+
+_default_tagger = None
+
+
+def get_genre_tagger():
+    """Shared tagger for the default keyword table"""
+    global _default_tagger
+    if _default_tagger is None:
+        _default_tagger = GenreTagger()
+    return _default_tagger
+
+
+def extract_genres_reference(text):
+    """Per-row reference implementation (what MovieRecommenderHF.extract_genres_from_text does)"""
+    if pd.isna(text):
+        return [DEFAULT_GENRE]
+
+    text_lower = text.lower()
+    genres = [genre for genre, keywords in GENRE_KEYWORDS.items()
+              if any(keyword in text_lower for keyword in keywords)]
+    return genres[:MAX_GENRES] if genres else [DEFAULT_GENRE]
+
+
+def load_benchmark_overviews():
+    """Overviews from the movie dataset, or synthetic ones if it can't be loaded"""
+    try:
+        from datasets import load_dataset
+        return load_dataset("mt0rm0/movie_descriptors_small")['train'].to_pandas()['overview']
+    except Exception as e:
+        print(f"Dataset unavailable ({e}), using synthetic overviews")
+        rng = np.random.default_rng(0)
+        keywords = [k for keywords in GENRE_KEYWORDS.values() for k in keywords]
+        filler = ("the a young man woman city journey secret home after his her their when must find "
+                  "discover years old town struggles against friends new world story two brothers small "
+                  "village past finds himself herself Awarded warrior Reality childhood").split()
+        texts = []
+        for _ in range(28655):
+            words = list(rng.choice(filler, size=rng.integers(30, 70)))
+            for _ in range(rng.integers(0, 4)):
+                words.insert(rng.integers(0, len(words)), rng.choice(keywords))
+            texts.append(' '.join(words))
+        texts[::500] = [None] * len(texts[::500])
+        return pd.Series(texts)
+
+if __name__ == "__main__":
+    overviews = load_benchmark_overviews()
+    tagger = GenreTagger()
+
+    started = time.perf_counter()
+    reference = overviews.apply(extract_genres_reference)
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    masks = tagger.tag(overviews)
+    vectorized_seconds = time.perf_counter() - started
+
+    mismatches = [i for i, (expected, mask) in enumerate(zip(reference, masks)) if tagger.decode(mask) != expected]
+    print(f"Overviews:        {len(overviews)}")
+    print(f"apply() per row:  {reference_seconds:.3f}s")
+    print(f"Genre tagger:     {vectorized_seconds:.3f}s ({reference_seconds / vectorized_seconds:.1f}x)")
+    print(f"Mask column:      {masks.nbytes / 1024:.1f} KB vs {reference.memory_usage(deep=True) / 1024:.1f} KB of lists")
+    print(f"Identical tags:   {not mismatches} ({len(mismatches)} mismatches)")
+    for i in mismatches[:5]:
+        print(f"   #{i}: expected {reference.iloc[i]}, got {tagger.decode(masks[i])}")
@@ -0,0 +1,183 @@
+"""
+Bounded executor for blocking model work
+
+Keeps inference off the asyncio event loop, caps how much work may be queued,
+drops jobs whose deadline passed while they waited, and records queue depth
+and wait-time metrics.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor already holds its maximum number of jobs"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a job could not finish before its deadline"""
+
+
+def _noop():
+    return None
+
+
+def _check_timeout(timeout, name):
+    if timeout is not None and timeout <= 0:
+        raise ValueError(f"{name} must be positive or None (no limit), got {timeout}")
+
+
+def _timed_call(fn, args, kwargs, deadline):
+    """Run fn in the worker, skipping it if the caller's deadline has already passed"""
+    started = time.time()
+    if deadline is not None and started >= deadline:
+        raise DeadlineExceeded("Deadline passed while queued")
+    return started, fn(*args, **kwargs)
+
+
+class BoundedInferenceExecutor:
+    def __init__(self, kind='thread', max_workers=4, max_queue=32, default_timeout=30.0):
+        """
+        Initialize the executor
+
+        Args:
+            kind (str): 'thread' or 'process'. Process workers are forked right here so
+                they inherit already loaded models; construct the executor before any
+                inference runs in this process, since forking after torch has started its
+                thread pools can deadlock the children.
+            max_workers (int): Jobs that may run at the same time
+            max_queue (int): Jobs that may wait for a worker; beyond this, run() rejects
+            default_timeout (float): Seconds a job may take from submission to result, None for no limit
+        """
+        _check_timeout(default_timeout, 'default_timeout')
+        if kind == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('fork')
+            )
+            # With fork every worker starts on the first submit: do it now rather
+            # than lazily in the middle of serving, after warm-up inference
+            self._executor.submit(_noop).result()
+        elif kind == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inference')
+        else:
+            raise ValueError(f"Unknown executor kind '{kind}', expected 'thread' or 'process'")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._waits = deque(maxlen=1000)  # recent queue wait times, seconds
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_inflight_seen = 0
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    def queue_depth(self):
+        """Jobs waiting for a worker (submitted but not yet running)"""
+        with self._lock:
+            return max(0, self._inflight - self.max_workers)
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the executor
+
+        Args:
+            fn (callable): Blocking function (module-level when kind is 'process')
+            timeout (float): Per-request deadline in seconds (defaults to default_timeout)
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            ValueError: For a timeout <= 0
+            ExecutorSaturated: The queue is full, the caller should shed load
+            DeadlineExceeded: The job did not finish within the deadline
+        """
+        _check_timeout(timeout, 'timeout')
+        with self._lock:
+            if self._inflight >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(f"Inference queue full ({self.capacity} jobs)")
+            self._inflight += 1
+            self.submitted += 1
+            self.max_inflight_seen = max(self.max_inflight_seen, self._inflight)
+
+        timeout = self.default_timeout if timeout is None else timeout
+        submitted_at = time.time()
+        deadline = submitted_at + timeout if timeout else None
+
+        try:
+            job = self._executor.submit(_timed_call, fn, args, kwargs, deadline)
+        except Exception:
+            with self._lock:
+                self._inflight -= 1
+            raise
+        # Free the slot when the job really ends, not when the caller stops waiting
+        job.add_done_callback(self._job_done)
+
+        try:
+            started, result = await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise DeadlineExceeded(f"Inference did not finish within {timeout:.1f}s")
+        except DeadlineExceeded:
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+        with self._lock:
+            self._waits.append(started - submitted_at)
+        return result
+
+    def _job_done(self, job):
+        with self._lock:
+            self._inflight -= 1
+            if job.cancelled() or job.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def stats(self):
+        """Queue depth, wait-time and outcome counters"""
+        with self._lock:
+            waits = sorted(self._waits)
+            inflight = self._inflight
+
+        def percentile(q):
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 2) if waits else 0.0
+
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'inflight': inflight,
+            'queue_depth': max(0, inflight - self.max_workers),
+            'max_inflight_seen': self.max_inflight_seen,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'wait_ms_p50': percentile(0.50),
+            'wait_ms_p95': percentile(0.95),
+            'wait_ms_max': round(waits[-1] * 1000, 2) if waits else 0.0
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -6,13 +6,88 @@ import pandas as pd
 import numpy as np
 from datasets import load_dataset
 import warnings
+import sys
+import os
+import time
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.dirname(__file__))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'config'))
+from models_config import CATALOG_SETTINGS, EMBEDDING_SETTINGS, EMOTION_PROFILE_SETTINGS, RECOMMENDATION_SETTINGS
+import catalog_snapshot
+from genre_tagger import get_genre_tagger, extract_genres_reference
+from topk_sampler import pool_order
+from catalog import compact_catalog, memory_usage, widen_float32
+from search_index import SearchIndex, TOKEN_PATTERN, FIELD_WEIGHTS, BM25_K1, BM25_B
+from title_index import TitleIndex
+from record_encoder import RecordEncoder, RECORD_FIELDS
+import embedding_index
+import emotion_profiles
+from recommendation_cursor import PoolCache, decode_cursor, encode_cursor, seed_from
+
+# Ranking: base score = rating * 0.65 + recency * 0.25 (plus mood_weight * mood
+# similarity with ranking='mood', or weight * emotion affinity with
+# ranking='emotion'), plus uniform jitter in [0, SCORE_JITTER);
+# recommendations are sampled from the top CANDIDATE_POOL_SIZE, in an
+# order fixed by the request seed so pages of one draw never overlap
+MIN_RATING = 7.0
+CURRENT_YEAR = 2024
+SCORE_JITTER = 0.10
+CANDIDATE_POOL_SIZE = 200
+
+# Supported values of the ranking parameter
+RANKINGS = ('genre', 'mood', 'emotion')
+
+
+def resolve_dataset_revision(dataset):
+    """
+    Current commit of a Hugging Face dataset
+
+    Args:
+        dataset (str): Dataset repository id
+
+    Returns:
+        str: Commit sha, or None when the Hub can't be reached
+    """
+    try:
+        from huggingface_hub import HfApi
+        return HfApi().dataset_info(dataset).sha
+    except Exception as e:
+        print(f"Could not resolve the revision of {dataset}: {e}")
+        return None
+
+
 class MovieRecommenderHF:
-    def __init__(self):
-        """Initialize the movie recommender with Hugging Face dataset"""
+    def __init__(self, rng=None, snapshot=None):
+        """
+        Initialize the movie recommender with Hugging Face dataset
+        
+        Args:
+            rng (np.random.Generator): Draws the seeds of unseeded requests (fresh entropy when None)
+            snapshot (bool): Load the preprocessed catalog from its on-disk snapshot and write one
+                after a rebuild (defaults to CATALOG_SETTINGS['snapshot_enabled'])
+        """
         self.movies_df = None
-        self.load_movie_dataset()
+        # Genres are stored as a uint16 bitmask column ('genre_mask')
+        self.genre_tagger = get_genre_tagger()
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.cluster_index = {}
+        self.search_index = None
+        self.title_index = None
+        # Pre-encoded JSON fragments of the public record fields
+        self.record_encoder = None
+        # Overview embeddings and per-emotion mood candidates (ranking='mood')
+        self.embedding_index = None
+        self.mood_vectors = None
+        self.mood_index = {}
+        # (N, 7) emotion probabilities per overview (ranking='emotion')
+        self.emotion_profiles = None
+        self.catalog_source = None  # 'snapshot', 'dataset' or 'sample'
+        self._dataset_revision = None
+        self._dataset_revision_resolved = False
+        self._catalog_version = None
+        # Sampled pool orders of recent requests, for cursor pagination
+        self.pool_cache = PoolCache(RECOMMENDATION_SETTINGS['pool_cache_size'])
         
         # Emotion to cluster mapping (matching original system)
         # Original clustering: 0-> sad/fear/angry, 1->neutral/disgust/lazy, 2->happy/surprise/joy
@@ -43,13 +118,122 @@ class MovieRecommenderHF:
             5: ['clean', 'wholesome', 'family-friendly'],   # disgust -> need clean
             6: ['balanced', 'diverse', 'quality']           # neutral -> want quality
         }
+        
+        snapshot = CATALOG_SETTINGS['snapshot_enabled'] if snapshot is None else snapshot
+        if snapshot and self.load_snapshot():
+            self.build_title_index()
+            self.load_embeddings()
+            self.load_emotion_profiles()
+            return
+        
+        self.load_movie_dataset()
+        # Downcast numerics and move text into Arrow buffers before indexing
+        if self.movies_df is not None:
+            self.movies_df = compact_catalog(self.movies_df)
+        self.build_cluster_index()
+        self.build_search_index()
+        self.build_record_encoder()
+        self.build_title_index()
+        self.load_embeddings()
+        self.load_emotion_profiles()
+        
+        # Never persist the sample fallback
+        if snapshot and self.catalog_source == 'dataset':
+            try:
+                self.save_snapshot()
+            except Exception as e:
+                print(f"Error writing catalog snapshot: {e}")
+    
+    def dataset_revision(self):
+        """Dataset commit the catalog is built from: the pinned one, else the Hub's current one (None offline)"""
+        if not self._dataset_revision_resolved:
+            self._dataset_revision = (CATALOG_SETTINGS['dataset_revision']
+                                      or resolve_dataset_revision(CATALOG_SETTINGS['dataset']))
+            self._dataset_revision_resolved = True
+        return self._dataset_revision
+    
+    def snapshot_fingerprint(self):
+        """Everything the preprocessed catalog and its indexes depend on"""
+        return {
+            'dataset': CATALOG_SETTINGS['dataset'],
+            'revision': self.dataset_revision(),
+            'seed': CATALOG_SETTINGS['seed'],
+            'genres': self.genre_tagger.genres,
+            'genre_keywords': self.genre_tagger.keyword_bits,
+            'clusters': self.cluster_genre_mapping,
+            'scoring': [MIN_RATING, CURRENT_YEAR, 0.65, 0.25],
+            # Actual values: BM25 impacts are precomputed into the snapshot
+            'search': [TOKEN_PATTERN.pattern, FIELD_WEIGHTS, BM25_K1, BM25_B],
+            'records': list(RECORD_FIELDS)
+        }
+    
+    def catalog_version(self):
+        """Version of the preprocessed catalog (names its snapshot and derived artifacts)"""
+        if self._catalog_version is None:
+            fingerprint = self.snapshot_fingerprint()
+            version = catalog_snapshot.snapshot_version(fingerprint)
+            if fingerprint['revision'] is None:
+                # Hub unreachable: a snapshot built with the same settings from any revision will do
+                matches = catalog_snapshot.find_versions(CATALOG_SETTINGS['snapshot_dir'], fingerprint, ignore=('revision',))
+                if matches:
+                    version = matches[0]
+            self._catalog_version = version
+        return self._catalog_version
+    
+    def load_snapshot(self):
+        """Memory-map the catalog snapshot; returns False if it is missing, stale or corrupt"""
+        started = time.perf_counter()
+        version = self.catalog_version()
+        try:
+            loaded = catalog_snapshot.load_snapshot(
+                CATALOG_SETTINGS['snapshot_dir'], version, CATALOG_SETTINGS['verify_checksum']
+            )
+            if loaded is None:
+                return False
+            movies, arrays, manifest = loaded
+            cluster_index = {
+                cluster: (arrays[f"cluster_{cluster}_rows"], arrays[f"cluster_{cluster}_scores"])
+                for cluster in self.cluster_genre_mapping
+            }
+            search_index = SearchIndex.from_arrays(arrays, movies['rating'].to_numpy())
+            record_encoder = RecordEncoder.from_arrays(arrays)
+        except Exception as e:
+            print(f"Error loading catalog snapshot: {e}")
+            return False
+        
+        self.movies_df = movies
+        self.cluster_index = cluster_index
+        self.search_index = search_index
+        self.record_encoder = record_encoder
+        self.catalog_source = 'snapshot'
+        print(f"Loaded catalog snapshot {version} ({len(movies)} movies) in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+        return True
+    
+    def save_snapshot(self):
+        """Write the current catalog, cluster index and search index as the snapshot for this fingerprint"""
+        arrays = {}
+        for cluster, (rows, scores) in self.cluster_index.items():
+            arrays[f"cluster_{cluster}_rows"] = rows
+            arrays[f"cluster_{cluster}_scores"] = scores
+        if self.search_index is not None:
+            arrays.update(self.search_index.to_arrays())
+        if self.record_encoder is not None:
+            arrays.update(self.record_encoder.to_arrays())
+        return catalog_snapshot.write_snapshot(
+            CATALOG_SETTINGS['snapshot_dir'],
+            self.catalog_version(),
+            self.movies_df,
+            arrays,
+            metadata={'fingerprint': self.snapshot_fingerprint()}
+        )
     
     def load_movie_dataset(self):
         """Load movie dataset from Hugging Face"""
         try:
             print("Loading movie dataset from Hugging Face...")
             # Load the movie descriptors dataset with 28,655 movies
-            dataset = load_dataset("mt0rm0/movie_descriptors_small")
+            dataset = load_dataset(CATALOG_SETTINGS['dataset'], revision=self.dataset_revision())
             
             # Convert to pandas DataFrame
             self.movies_df = dataset['train'].to_pandas()
@@ -58,6 +242,7 @@ class MovieRecommenderHF:
             self.preprocess_movie_data()
             
             print(f"Successfully loaded {len(self.movies_df)} movies from Hugging Face dataset")
+            self.catalog_source = 'dataset'
             
         except Exception as e:
             print(f"Error loading Hugging Face dataset: {e}")
@@ -70,20 +255,21 @@ class MovieRecommenderHF:
             # Remove rows with missing essential data
             self.movies_df = self.movies_df.dropna(subset=['title', 'overview'])
             
-            # Create genre categories from overview text
-            self.movies_df['genres'] = self.movies_df['overview'].apply(self.extract_genres_from_text)
+            # Create genre categories from overview text (all overviews in one vectorized pass)
+            self.movies_df['genre_mask'] = self.genre_tagger.tag(self.movies_df['overview'])
             
-            # Add rating and year information if available
+            # Add rating and year information if available (seeded, so every rebuild is identical)
+            rng = np.random.default_rng(CATALOG_SETTINGS['seed'])
             if 'rating' not in self.movies_df.columns:
                 # Generate synthetic ratings based on text length and year
-                self.movies_df['rating'] = np.random.uniform(6.0, 9.5, len(self.movies_df))
+                self.movies_df['rating'] = rng.uniform(6.0, 9.5, len(self.movies_df))
             
             if 'year' not in self.movies_df.columns:
                 # Generate synthetic years
-                self.movies_df['year'] = np.random.randint(1990, 2024, len(self.movies_df))
+                self.movies_df['year'] = rng.integers(1990, 2024, len(self.movies_df))
             
             # Filter movies with good ratings
-            self.movies_df = self.movies_df[self.movies_df['rating'] >= 7.0]
+            self.movies_df = self.movies_df[self.movies_df['rating'] >= MIN_RATING]
             
             print(f"After preprocessing: {len(self.movies_df)} movies available")
             
@@ -91,36 +277,22 @@ class MovieRecommenderHF:
             print(f"Error preprocessing movie data: {e}")
     
     def extract_genres_from_text(self, text):
-        """Extract genre information from movie overview text"""
-        if pd.isna(text):
-            return ['drama']
-        
-        text_lower = text.lower()
-        genres = []
-        
-        # Define genre keywords
-        genre_keywords = {
-            'action': ['action', 'fight', 'battle', 'war', 'combat', 'adventure'],
-            'comedy': ['comedy', 'funny', 'humor', 'laugh', 'hilarious'],
-            'drama': ['drama', 'emotional', 'serious', 'tragic', 'life'],
-            'romance': ['romance', 'love', 'relationship', 'couple', 'romantic'],
-            'thriller': ['thriller', 'suspense', 'mystery', 'crime', 'detective'],
-            'horror': ['horror', 'scary', 'frightening', 'terrifying', 'monster'],
-            'sci-fi': ['sci-fi', 'science fiction', 'space', 'future', 'alien'],
-            'fantasy': ['fantasy', 'magic', 'supernatural', 'wizard', 'dragon'],
-            'family': ['family', 'children', 'kids', 'child', 'parent'],
-            'documentary': ['documentary', 'real', 'true story', 'biography']
-        }
-        
-        for genre, keywords in genre_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                genres.append(genre)
-        
-        # Default to drama if no genres found
-        if not genres:
-            genres = ['drama']
+        """
+        Extract genre information from one movie overview
         
-        return genres[:3]  # Return top 3 genres
+        Per-row reference for GenreTagger.tag, which tags the whole catalog at once.
+        """
+        return extract_genres_reference(text)
+    
+    def with_genre_names(self, movies):
+        """Prepare catalog rows for output: genre_mask -> list of genre names, float32 -> float"""
+        movies = movies.copy()
+        for column in movies.columns:
+            if movies[column].dtype == np.float32:
+                movies[column] = widen_float32(movies[column].to_numpy())
+        if 'genre_mask' in movies.columns:
+            movies['genres'] = self.genre_tagger.decode_many(movies.pop('genre_mask'))
+        return movies
     
     def create_sample_data(self):
         """Create sample movie data if Hugging Face dataset fails"""
@@ -163,128 +335,483 @@ class MovieRecommenderHF:
         ]
         
         self.movies_df = pd.DataFrame(sample_movies)
+        self.catalog_source = 'sample'
+        self.movies_df['genre_mask'] = np.array(
+            [self.genre_tagger.encode(genres) for genres in self.movies_df.pop('genres')], dtype=np.uint16
+        )
         print("Using sample movie data")
     
-    def recommend_movies(self, emotion_class, num_recommendations=10, content_type='movie'):
+    def base_scores(self, movies):
+        """Request-independent part of the ranking score (prefers high ratings, then recent movies)"""
+        return (
+            movies['rating'].to_numpy(dtype=np.float64) * 0.65 +
+            (movies['year'].to_numpy(dtype=np.float64) - 1990) / (CURRENT_YEAR - 1990) * 0.25
+        )
+    
+    def build_cluster_index(self):
+        """
+        Precompute, for each cluster, its candidate row positions sorted by base score
+        
+        Must be called again whenever movies_df changes.
+        """
+        self.cluster_index = {}
+        if self.movies_df is None or len(self.movies_df) == 0:
+            return
+        
+        scores = self.base_scores(self.movies_df)
+        genre_masks = self.movies_df['genre_mask'].to_numpy()
+        for cluster, genres in self.cluster_genre_mapping.items():
+            rows = np.flatnonzero(genre_masks & self.genre_tagger.encode(genres))
+            # If no movies match the preferred genres, use all movies
+            if len(rows) == 0:
+                rows = np.arange(len(scores))
+            # Negated so the best movies come first and np.searchsorted works on it
+            negated = -scores[rows]
+            order = np.argsort(negated, kind='stable')
+            self.cluster_index[cluster] = (rows[order], negated[order])
+    
+    def build_search_index(self):
+        """
+        Build the full-text index over titles and overviews
+        
+        Must be called again whenever movies_df changes.
+        """
+        self.search_index = None
+        if self.movies_df is None or len(self.movies_df) == 0:
+            return
+        
+        started = time.perf_counter()
+        self.search_index = SearchIndex.build(
+            self.movies_df['title'].tolist(),
+            self.movies_df['overview'].tolist(),
+            self.movies_df['rating'].to_numpy()
+        )
+        print(f"Built search index ({len(self.search_index.terms)} terms) in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    def build_record_encoder(self):
+        """
+        Pre-encode the public JSON fields (RECORD_FIELDS) of every catalog row
+        
+        Must be called again whenever movies_df changes.
+        """
+        self.record_encoder = None
+        if self.movies_df is None or len(self.movies_df) == 0:
+            return
+        
+        started = time.perf_counter()
+        columns = {}
+        for field in RECORD_FIELDS:
+            if field == 'genres':
+                columns[field] = self.genre_tagger.decode_many(self.movies_df['genre_mask'].to_numpy())
+            elif pd.api.types.is_float_dtype(self.movies_df[field]):
+                columns[field] = widen_float32(self.movies_df[field].to_numpy()).tolist()
+            elif pd.api.types.is_integer_dtype(self.movies_df[field]):
+                columns[field] = self.movies_df[field].to_numpy().tolist()
+            else:
+                # Missing text (pd.NA) becomes null
+                columns[field] = [value if isinstance(value, str) else None for value in self.movies_df[field].tolist()]
+        self.record_encoder = RecordEncoder.build(columns)
+        print(f"Pre-encoded {len(self.movies_df)} JSON records in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    def encode_records(self, positions, fields=None):
+        """
+        JSON array of catalog records for row positions, joined from pre-encoded fragments
+        
+        Args:
+            positions (np.array): Row positions into movies_df (e.g. a recommendation frame's
+                attrs['catalog_positions'])
+            fields (list): Subset of RECORD_FIELDS, in output order (all when None)
+            
+        Returns:
+            bytes: Encoded JSON array
+        """
+        return self.record_encoder.encode(positions, fields)
+    
+    def build_title_index(self):
+        """
+        Build the normalized title -> row positions map used by get_movie_info
+        
+        Must be called again whenever movies_df changes.
+        """
+        self.title_index = None
+        if self.movies_df is None:
+            return
+        self.title_index = TitleIndex(self.movies_df['title'].tolist(), self.movies_df['year'].to_numpy())
+    
+    def load_embeddings(self):
+        """
+        Memory-map the overview embeddings of this catalog version and build the mood index
+        
+        Returns:
+            bool: False if embeddings are disabled, missing or don't match the catalog
+        """
+        self.embedding_index, self.mood_vectors, self.mood_index = None, None, {}
+        # The sample fallback shares the dataset's version but not its rows
+        if not EMBEDDING_SETTINGS['enabled'] or self.movies_df is None or self.catalog_source == 'sample':
+            return False
+        try:
+            loaded = embedding_index.load_embeddings(self.catalog_version(), len(self.movies_df))
+            if loaded is None:
+                return False
+            self.embedding_index, self.mood_vectors, _ = loaded
+            self.build_mood_index()
+            return True
+        except Exception as e:
+            print(f"Error loading overview embeddings: {e}")
+            self.embedding_index, self.mood_vectors, self.mood_index = None, None, {}
+            return False
+    
+    def build_mood_index(self):
+        """
+        Precompute, for each emotion, the mood candidates sorted by base score plus mood similarity
+        
+        Candidates are the EMBEDDING_SETTINGS['mood_candidates'] overviews nearest to the
+        emotion's mood query vector that are also in the emotion's genre cluster.
+        """
+        self.mood_index = {}
+        started = time.perf_counter()
+        scores = self.base_scores(self.movies_df)
+        for emotion, cluster in self.emotion_cluster_mapping.items():
+            rows, similarities = self.embedding_index.search(self.mood_vectors[emotion], EMBEDDING_SETTINGS['mood_candidates'])
+            in_cluster = np.isin(rows, self.cluster_index[cluster][0])
+            rows, similarities = rows[in_cluster], similarities[in_cluster]
+            if len(rows) == 0:
+                continue
+            negated = -(scores[rows] + EMBEDDING_SETTINGS['mood_weight'] * similarities)
+            order = np.argsort(negated, kind='stable')
+            self.mood_index[emotion] = (rows[order], negated[order])
+        print(f"Built mood index ({self.embedding_index.mode} search over {len(self.embedding_index)} embeddings) "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    def load_emotion_profiles(self):
+        """
+        Memory-map the per-movie emotion profiles of this catalog version
+        
+        Returns:
+            bool: False if profiles are disabled, missing or don't match the catalog
+        """
+        self.emotion_profiles = None
+        if not EMOTION_PROFILE_SETTINGS['enabled'] or self.movies_df is None or self.catalog_source == 'sample':
+            return False
+        try:
+            loaded = emotion_profiles.load_profiles(self.catalog_version(), len(self.movies_df))
+            if loaded is None:
+                return False
+            self.emotion_profiles = loaded[0]
+            print(f"Loaded emotion profiles for {len(self.emotion_profiles)} movies")
+            return True
+        except Exception as e:
+            print(f"Error loading emotion profiles: {e}")
+            return False
+    
+    def emotion_candidates(self, cluster, emotion_distribution):
+        """
+        Rescore a cluster's candidates by affinity with a user's emotion distribution
+        
+        Only the rows that can still reach the sampling pool after jitter are sorted.
+        
+        Args:
+            cluster (int): Key of cluster_genre_mapping
+            emotion_distribution (np.array): Probability per emotion class
+            
+        Returns:
+            tuple: (rows, negated scores) like cluster_index entries
+        """
+        rows, negated = self.cluster_index[cluster]
+        distribution = emotion_profiles.validate_distribution(emotion_distribution)
+        if distribution.sum() > 0:
+            distribution = distribution / distribution.sum()
+        
+        # One contiguous matrix-vector product beats gathering the cluster's rows first
+        affinity = np.asarray(self.emotion_profiles @ distribution)[rows]
+        scores = negated - EMOTION_PROFILE_SETTINGS['weight'] * affinity
+        
+        pool_size = min(CANDIDATE_POOL_SIZE, len(scores))
+        boundary = np.partition(scores, pool_size - 1)[pool_size - 1]
+        window = np.flatnonzero(scores <= boundary + SCORE_JITTER)
+        window = window[np.argsort(scores[window], kind='stable')]
+        return rows[window], scores[window]
+    
+    def memory_usage(self):
+        """Catalog memory broken down by column, plus the recommendation index"""
+        if self.movies_df is None:
+            return {}
+        report = memory_usage(self.movies_df)
+        report['cluster_index_bytes'] = int(sum(rows.nbytes + scores.nbytes for rows, scores in self.cluster_index.values()))
+        report['mood_index_bytes'] = int(sum(rows.nbytes + scores.nbytes for rows, scores in self.mood_index.values()))
+        report['emotion_profile_bytes'] = int(self.emotion_profiles.nbytes) if self.emotion_profiles is not None else 0
+        if self.record_encoder is not None:
+            report['record_json_bytes'] = self.record_encoder.nbytes()
+        if self.search_index is not None:
+            report['search_index_bytes'] = int(sum(array.nbytes for array in self.search_index.to_arrays().values()))
+        return report
+    
+    def available_rankings(self):
+        """Rankings whose offline artifacts are loaded for this catalog"""
+        available = ['genre']
+        if self.mood_index:
+            available.append('mood')
+        if self.emotion_profiles is not None:
+            available.append('emotion')
+        return available
+    
+    def resolve_ranking(self, ranking=None):
+        """
+        Check a requested ranking
+        
+        Args:
+            ranking (str): One of RANKINGS, or None for RECOMMENDATION_SETTINGS['ranking']
+                (which falls back to 'genre' when its artifacts are missing)
+            
+        Returns:
+            str: Ranking to use
+            
+        Raises:
+            ValueError: For unknown rankings, or a requested one whose artifacts are missing
+        """
+        available = self.available_rankings()
+        if ranking is None:
+            ranking = RECOMMENDATION_SETTINGS['ranking']
+            if ranking not in available:
+                print(f"Default ranking {ranking!r} unavailable for this catalog, using genre ranking")
+                ranking = 'genre'
+            return ranking
+        if ranking not in RANKINGS:
+            raise ValueError(f"Unknown ranking {ranking!r}; expected one of {list(RANKINGS)}")
+        if ranking not in available:
+            missing = {
+                'mood': "no overview embeddings (run services/embedding_index.py build)",
+                'emotion': "no emotion profiles (run services/emotion_profiles.py build)"
+            }[ranking]
+            raise ValueError(f"Ranking {ranking!r} is unavailable for catalog {self.catalog_version()}: {missing}")
+        return ranking
+    
+    def candidates(self, emotion_class, ranking='genre', emotion_distribution=None):
+        """
+        Presorted candidates for an emotion
+        
+        Args:
+            emotion_class (int): Emotion class
+            ranking (str): 'genre' (cluster + base score), 'mood' (adds mood similarity) or
+                'emotion' (adds affinity with emotion_distribution); see resolve_ranking
+            emotion_distribution (np.array): User's probability per emotion class for
+                ranking='emotion' (one-hot emotion_class when None)
+            
+        Returns:
+            tuple: (rows, negated scores) in ascending order of negated score
+            
+        Raises:
+            ValueError: For unknown or unavailable rankings
+        """
+        ranking = self.resolve_ranking(ranking)
+        # Map emotion to cluster (matching original system)
+        cluster = self.emotion_cluster_mapping.get(emotion_class, 1)
+        
+        # An emotion none of whose nearest overviews are in its cluster has no mood
+        # entry (see build_mood_index) and is ranked by genre
+        if ranking == 'mood' and emotion_class in self.mood_index:
+            return self.mood_index[emotion_class]
+        if ranking == 'emotion':
+            if emotion_distribution is None:
+                emotion_distribution = np.eye(self.emotion_profiles.shape[1], dtype=np.float32)[emotion_class]
+            return self.emotion_candidates(cluster, emotion_distribution)
+        return self.cluster_index[cluster]
+    
+    def sampled_order(self, candidates, seed):
+        """
+        Seeded sampling order of the top candidate pool
+        
+        Args:
+            candidates (tuple): (rows, negated scores), see candidates()
+            seed (int): Sampling seed; the same seed gives the same order
+            
+        Returns:
+            np.array: Row positions into movies_df; a page is a slice of this order
+        """
+        rows, negated = candidates
+        return rows[pool_order(
+            negated,
+            np.random.default_rng(seed),
+            pool_size=CANDIDATE_POOL_SIZE,
+            jitter=SCORE_JITTER
+        )]
+    
+    def materialize(self, positions, columns=RECORD_FIELDS):
+        """
+        Build the output frame for the given row positions only
+        
+        Args:
+            positions (np.array): Row positions into movies_df
+            columns (tuple): Output columns; 'genres' is decoded from genre_mask
+            
+        Returns:
+            pd.DataFrame: One row per position, in order; attrs['catalog_positions'] keeps
+                the positions so callers can use the pre-encoded records (encode_records)
+        """
+        data = {}
+        for column in columns:
+            if column == 'genres' and 'genre_mask' in self.movies_df.columns:
+                data[column] = self.genre_tagger.decode_many(self.movies_df['genre_mask'].iloc[positions])
+            elif column in self.movies_df.columns:
+                # iloc first: to_numpy() on a string column would convert all of it
+                data[column] = widen_float32(self.movies_df[column].iloc[positions].to_numpy())
+        frame = pd.DataFrame(data)
+        frame.attrs['catalog_positions'] = np.asarray(positions)
+        return frame
+    
+    def recommend_movies(self, emotion_class, num_recommendations=10, content_type='movie', rng=None, ranking=None,
+                         emotion_distribution=None, seed=None, cursor=None):
         """
         Recommend movies based on emotion (matching original system)
         
+        The candidate pool is sampled in an order fixed by the seed. The result's
+        attrs['next_cursor'] continues that order: passing it back returns the next
+        page, never overlapping earlier ones, without ranking the catalog again.
+        
         Args:
             emotion_class (int): Emotion class (0=sad, 1=happy, 2=surprise, 3=angry, 4=fear, 5=disgust, 6=neutral)
             num_recommendations (int): Number of recommendations to return
             content_type (str): 'movie' or 'tv_series'
+            rng (np.random.Generator): Draws the seed when none is given (defaults to the recommender's)
+            ranking (str): 'genre', 'mood' or 'emotion' (defaults to RECOMMENDATION_SETTINGS['ranking'])
+            emotion_distribution (np.array): User's probability per emotion class, for ranking='emotion'
+            seed (int | str): Seed or session token; the same seed gives the same recommendations
+            cursor (str): next_cursor of a previous page; its emotion, ranking and seed
+                replace the other arguments
             
         Returns:
-            pd.DataFrame: Recommended movies
+            pd.DataFrame: Recommended movies (attrs['next_cursor'] is None on the last page)
+            
+        Raises:
+            ValueError: For malformed cursors or cursors from another catalog version,
+                unknown or unavailable rankings (see resolve_ranking), malformed emotion
+                distributions (see emotion_profiles.validate_distribution) and page sizes below 1
         """
+        if int(num_recommendations) < 1:
+            raise ValueError(f"num_recommendations must be at least 1, got {num_recommendations}")
+        if cursor is not None:
+            state = decode_cursor(cursor, self.catalog_version())
+            self.resolve_ranking(state['ranking'])
+        else:
+            state = {
+                'catalog': self.catalog_version(),
+                'emotion': int(emotion_class),
+                'ranking': self.resolve_ranking(ranking),
+                'distribution': emotion_distribution,
+                'seed': seed_from(seed) if seed is not None else int((rng if rng is not None else self.rng).integers(2**63)),
+                'offset': 0
+            }
+        # Only emotion ranking reads the distribution, so it must not split the pool cache
+        # for other rankings; a bad one is the client's error
+        if state['ranking'] != 'emotion':
+            state['distribution'] = None
+        elif state['distribution'] is not None:
+            state['distribution'] = emotion_profiles.validate_distribution(state['distribution'])
+        
         try:
             if self.movies_df is None or len(self.movies_df) == 0:
                 print("No movie data available")
                 return pd.DataFrame()
             
-            # Map emotion to cluster (matching original system)
-            cluster = self.emotion_cluster_mapping.get(emotion_class, 1)
-            preferred_genres = self.cluster_genre_mapping.get(cluster, ['drama'])
-            
-            # Filter movies based on preferred genres
-            genre_mask = self.movies_df['genres'].apply(
-                lambda x: any(genre in preferred_genres for genre in x)
-            )
-            
-            filtered_movies = self.movies_df[genre_mask].copy()
-            
-            # If no movies match the preferred genres, use all movies
-            if len(filtered_movies) == 0:
-                filtered_movies = self.movies_df.copy()
-            
-            # Score movies based on rating and year (prefer recent movies)
-            current_year = 2024
-            filtered_movies['score'] = (
-                filtered_movies['rating'] * 0.65 +
-                (filtered_movies['year'] - 1990) / (current_year - 1990) * 0.25
-            )
-
-            # Add small stochasticity to diversify results across requests
-            rng = np.random.default_rng()
-            filtered_movies['score'] = filtered_movies['score'] + rng.uniform(0, 0.10, size=len(filtered_movies))
-
-            # Take a broader top pool, then sample without replacement for diversity
-            pool_size = min(200, len(filtered_movies))
-            top_pool = filtered_movies.nlargest(pool_size, 'score')
-            if len(top_pool) > num_recommendations:
-                recommendations = top_pool.sample(n=num_recommendations, random_state=None)
-            else:
-                recommendations = top_pool
-            
-            # Select relevant columns
-            result_columns = ['title', 'rating', 'year', 'genres', 'overview']
-            available_columns = [col for col in result_columns if col in recommendations.columns]
+            # Candidates were filtered and pre-ranked at load time; only the chosen rows are built.
+            # Sampled orders are cached, so following a cursor skips ranking altogether
+            key = PoolCache.key(state['catalog'], state['emotion'], state['ranking'], state['distribution'], state['seed'])
+            order = self.pool_cache.get(key)
+            if order is None:
+                candidates = self.candidates(state['emotion'], state['ranking'], state['distribution'])
+                order = self.sampled_order(candidates, state['seed'])
+                self.pool_cache.put(key, order)
             
-            recommendations = recommendations[available_columns]
-            
-            return recommendations.reset_index(drop=True)
+            offset = state['offset']
+            recommendations = self.materialize(order[offset:offset + num_recommendations])
+            next_offset = offset + num_recommendations
+            recommendations.attrs['next_cursor'] = encode_cursor({
+                **state,
+                'distribution': None if state['distribution'] is None else state['distribution'].tolist(),
+                'offset': next_offset
+            }) if next_offset < len(order) else None
+            return recommendations
             
         except Exception as e:
             print(f"Error in movie recommendation: {e}")
             return pd.DataFrame()
     
-    def get_movie_info(self, movie_title):
+    def get_movie_info(self, movie_title, year=None):
         """
         Get detailed information about a specific movie
         
         Args:
-            movie_title (str): Title of the movie
+            movie_title (str): Title of the movie (case and Unicode form don't matter)
+            year (int): Release year, to pick between movies sharing a title
             
         Returns:
-            dict: Movie information
+            dict: Movie information (the first match in catalog order)
         """
         try:
-            if self.movies_df is None:
+            if self.movies_df is None or self.title_index is None:
                 return {}
             
-            # Find movie by title (case-insensitive)
-            movie = self.movies_df[
-                self.movies_df['title'].str.lower() == movie_title.lower()
-            ]
-            
-            if len(movie) == 0:
+            position = self.title_index.first(movie_title, year)
+            if position is None:
                 return {}
             
-            movie_info = movie.iloc[0].to_dict()
+            movie_info = self.with_genre_names(self.movies_df.iloc[[position]]).iloc[0].to_dict()
             return movie_info
             
         except Exception as e:
             print(f"Error getting movie info: {e}")
             return {}
     
-    def search_movies(self, query, num_results=10):
+    def get_movies_info(self, movie_titles, years=None):
         """
-        Search for movies by title or overview
+        Get detailed information about many movies at once
         
         Args:
-            query (str): Search query
-            num_results (int): Number of results to return
+            movie_titles (list): Titles of the movies
+            years (list): Optional release year per title (None entries match any year)
             
         Returns:
-            pd.DataFrame: Search results
+            list: Movie information dict per title, {} where no movie matched
         """
         try:
-            if self.movies_df is None:
-                return pd.DataFrame()
+            if self.movies_df is None or self.title_index is None:
+                return [{} for _ in movie_titles]
             
-            # Search in title and overview
-            title_mask = self.movies_df['title'].str.contains(query, case=False, na=False)
-            overview_mask = self.movies_df['overview'].str.contains(query, case=False, na=False)
+            positions = self.title_index.lookup_many(movie_titles, years)
+            found = positions >= 0
+            movies = self.with_genre_names(self.movies_df.iloc[positions[found]]).to_dict('records')
             
-            search_results = self.movies_df[title_mask | overview_mask]
+            results = [{} for _ in movie_titles]
+            for i, movie_info in zip(np.flatnonzero(found), movies):
+                results[i] = movie_info
+            return results
             
-            # Sort by rating
-            search_results = search_results.sort_values('rating', ascending=False)
+        except Exception as e:
+            print(f"Error getting movie info: {e}")
+            return [{} for _ in movie_titles]
+    
+    def search_movies(self, query, num_results=10, prefix=True):
+        """
+        Search for movies by title or overview
+        
+        Args:
+            query (str): Search query (plain text; never interpreted as a pattern)
+            num_results (int): Number of results to return
+            prefix (bool): Also match words starting with the last query word (type-ahead)
             
-            # Return top results
-            return search_results.head(num_results).reset_index(drop=True)
+        Returns:
+            pd.DataFrame: Search results ranked by BM25 relevance, then rating, with a 'score' column
+        """
+        try:
+            if self.movies_df is None or self.search_index is None:
+                return pd.DataFrame()
+            
+            positions, scores = self.search_index.search(query, limit=num_results, prefix=prefix)
+            search_results = self.with_genre_names(self.movies_df.iloc[positions]).reset_index(drop=True)
+            search_results['score'] = np.round(scores.astype(np.float64), 4)
+            return search_results
             
         except Exception as e:
             print(f"Error searching movies: {e}")
             return pd.DataFrame()
-
@@ -0,0 +1,185 @@
+"""
+Async micro-batching for text emotion inference
+
+Concurrent requests are collected for a short window (or until the batch is
+full) and classified together in one padded forward pass. The queue is
+bounded and every queued text carries a deadline, so the batched path sheds
+load with the same ExecutorSaturated / DeadlineExceeded errors as direct
+executor calls.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.inference_executor import ExecutorSaturated, DeadlineExceeded
+
+
+class TextEmotionBatcher:
+    def __init__(self, predict_batch, max_batch_size=16, max_wait_ms=10, executor=None, max_queue=None, timeout=None):
+        """
+        Initialize the batcher
+
+        Args:
+            predict_batch (callable): Maps a list of texts to a list of prediction tuples,
+                e.g. TextEmotionClassifier.predict_emotions
+            max_batch_size (int): Maximum number of texts per forward pass
+            max_wait_ms (float): Maximum time the oldest queued text waits for a batch to fill
+            executor (BoundedInferenceExecutor): Where to run batches; the loop's default
+                thread pool when None
+            max_queue (int): Texts that may wait for a batch; beyond this, predict() rejects
+                (defaults to the executor's max_queue, unbounded without an executor)
+            timeout (float): Seconds a text may take from queueing to prediction
+                (defaults to the executor's default_timeout, None for no limit)
+        """
+        self.predict_batch = predict_batch
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        if max_queue is None:
+            max_queue = executor.max_queue if executor is not None else 0
+        self.max_queue = max(0, int(max_queue))
+        if timeout is None and executor is not None:
+            timeout = executor.default_timeout
+        self.timeout = timeout
+        self._queue = None
+        self._worker = None
+
+        # Counters for monitoring batch efficiency and load shedding
+        self.batches_run = 0
+        self.texts_processed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def start(self):
+        """Start the background batching task (must be called from a running event loop)"""
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching task and fail any requests still waiting"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Text batcher stopped"))
+
+    async def predict(self, text):
+        """
+        Queue a text for the next batch and wait for its prediction
+
+        Args:
+            text (str): Input text to analyze
+
+        Returns:
+            tuple: (emotion_class, confidence, emotion_label, probabilities)
+
+        Raises:
+            ExecutorSaturated: The queue is full, the caller should shed load
+            DeadlineExceeded: No prediction within the timeout
+        """
+        if self._worker is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = loop.time() + self.timeout if self.timeout else None
+        try:
+            self._queue.put_nowait((text, future, deadline))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ExecutorSaturated(f"Text batch queue full ({self.max_queue} texts)")
+
+        if deadline is None:
+            return await future
+        try:
+            # Cancels the future on timeout, so a batch not yet run skips it
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise DeadlineExceeded(f"Text inference did not finish within {self.timeout:.1f}s")
+
+    def stats(self):
+        """Return batching counters"""
+        return {
+            'batches_run': self.batches_run,
+            'texts_processed': self.texts_processed,
+            'avg_batch_size': (self.texts_processed / self.batches_run) if self.batches_run else 0.0,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue': self.max_queue,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out
+        }
+
+    async def _collect_batch(self):
+        """Wait for the first text, then gather more until the window closes or the batch is full"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Callers that gave up (client disconnected, deadline passed) don't need a slot
+        now = loop.time()
+        live = []
+        for text, future, deadline in batch:
+            if future.done():
+                continue
+            if deadline is not None and deadline <= now:
+                future.set_exception(DeadlineExceeded("Deadline passed while queued"))
+                continue
+            live.append((text, future, deadline))
+        return live
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+
+            texts = [text for text, _, _ in batch]
+            try:
+                # Run the forward pass off the event loop, until the last caller's deadline
+                if self.executor is not None:
+                    deadlines = [deadline for _, _, deadline in batch]
+                    timeout = None if None in deadlines else max(max(deadlines) - loop.time(), 0.001)
+                    predictions = await self.executor.run(self.predict_batch, texts, timeout=timeout)
+                else:
+                    predictions = await loop.run_in_executor(None, self.predict_batch, texts)
+            except Exception as e:
+                print(f"Error in batched text inference: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.texts_processed += len(texts)
+
+            for (_, future, _), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
@@ -0,0 +1,129 @@
+"""
+Hash index from normalized movie titles to catalog rows
+
+Titles are normalized once at load time (NFKC, Unicode case-folding,
+collapsed whitespace), so a lookup is one dict probe instead of
+lowercasing the whole title column. Titles shared by several movies keep
+all their rows in catalog order; an optional release year picks between
+them.
+
+Usage:
+    python title_index.py    # lookup latency against str.lower() scans
+"""
+
+import time
+import unicodedata
+import numpy as np
+import pandas as pd
+
+
+def normalize_title(title):
+    """Canonical form used as the lookup key ('' for missing titles)"""
+    if not isinstance(title, str):
+        return ''
+    return ' '.join(unicodedata.normalize('NFKC', title).casefold().split())
+
+
+class TitleIndex:
+    def __init__(self, titles, years=None):
+        """
+        Build the index
+
+        Args:
+            titles (sequence): Title per catalog row (missing values allowed)
+            years (np.array): Release year per row, for disambiguation (optional)
+        """
+        self.years = np.asarray(years) if years is not None else None
+        # Most titles are unique: one int per key, lists only for the duplicates
+        self._first = {}
+        self._duplicates = {}
+        for row, title in enumerate(titles):
+            key = normalize_title(title)
+            if not key:
+                continue
+            if key not in self._first:
+                self._first[key] = row
+            elif key in self._duplicates:
+                self._duplicates[key].append(row)
+            else:
+                self._duplicates[key] = [self._first[key], row]
+
+    def __len__(self):
+        return len(self._first)
+
+    def lookup(self, title, year=None):
+        """
+        All rows with this title
+
+        Args:
+            title (str): Title in any case or Unicode normalization form
+            year (int): Only keep rows released that year (ignored without years)
+
+        Returns:
+            list: Row positions in catalog order (empty if unknown)
+        """
+        key = normalize_title(title)
+        rows = self._duplicates.get(key)
+        if rows is None:
+            rows = [self._first[key]] if key in self._first else []
+        if year is not None and self.years is not None:
+            rows = [row for row in rows if self.years[row] == year]
+        return list(rows)
+
+    def first(self, title, year=None):
+        """First matching row position, or None"""
+        rows = self.lookup(title, year)
+        return rows[0] if rows else None
+
+    def lookup_many(self, titles, years=None):
+        """
+        First matching row for each title
+
+        Args:
+            titles (list): Titles to look up
+            years (list): Optional year per title (None entries match any year)
+
+        Returns:
+            np.array: Row position per title, -1 where nothing matched
+        """
+        years = years if years is not None else [None] * len(titles)
+        rows = np.full(len(titles), -1, dtype=np.int64)
+        for i, (title, year) in enumerate(zip(titles, years)):
+            key = normalize_title(title)
+            if year is None and key not in self._duplicates:
+                rows[i] = self._first.get(key, -1)
+            else:
+                row = self.first(title, year)
+                rows[i] = -1 if row is None else row
+        return rows
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    repeats = 200
+
+    for size in (28655, 1000000):
+        titles = pd.Series([f"Movie Title {i}" for i in range(size)], dtype='string[pyarrow]')
+        queries = [f"movie title {i}" for i in rng.integers(0, size, repeats)]
+
+        started = time.perf_counter()
+        index = TitleIndex(titles.tolist(), rng.integers(1990, 2024, size))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for query in queries[:20]:
+            np.flatnonzero(titles.str.lower() == query)
+        scan_ms = (time.perf_counter() - started) / 20 * 1000
+
+        started = time.perf_counter()
+        for query in queries:
+            index.first(query)
+        lookup_us = (time.perf_counter() - started) / repeats * 1e6
+
+        started = time.perf_counter()
+        index.lookup_many(queries)
+        bulk_us = (time.perf_counter() - started) / repeats * 1e6
+
+        print(f"{size} titles: index built in {build_ms:.0f} ms")
+        print(f"   str.lower() scan   {scan_ms:>9.2f} ms/lookup")
+        print(f"   title index        {lookup_us:>9.2f} us/lookup ({bulk_us:.2f} us/title in bulk)")
@@ -1,18 +1,25 @@
 import pandas as pd
 import numpy as np
+import threading
+import time
 import warnings
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 warnings.filterwarnings('ignore')
 
 # Add the parent directory to path to import from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config'))
+from models_config import STARTUP_SETTINGS
 
 # Import your existing modules with correct paths
 try:
     # Import from models directory
     from models.text_emotion_hf import TextEmotionClassifier
     from models.face_emotion_hf import FaceEmotionClassifier
+    from models.emotion_cache import build_image_cache
+    from services.emotion_profiles import class_profiles
     # Import from same services directory
     from services.movie_recommender_hf import MovieRecommenderHF
 except ImportError as e:
@@ -20,34 +27,110 @@ except ImportError as e:
     print("Make sure all required modules are available")
     raise
 
-class UnifiedOTTRecommender:
-    def __init__(self):
-        """Initialize the unified OTT recommendation system"""
-        print("Initializing Unified OTT Recommendation System...")
-        
-        # Initialize emotion classifier
+class ComponentLoader:
+    """Loads one recommender component (eagerly or on first use) and records its state and timings"""
+    
+    def __init__(self, name, factory, warmup=None):
+        """
+        Args:
+            name (str): Component name used in logs and readiness reports
+            factory (callable): Builds the component
+            warmup (callable): Optional throwaway inference run on the built component
+        """
+        self.name = name
+        self.factory = factory
+        self.warmup = warmup
+        self.state = 'pending'  # pending -> loading -> ready | failed
+        self.instance = None
+        self.error = None
+        self.load_seconds = None
+        self.warmup_state = 'pending' if warmup else 'skipped'
+        self.warmup_seconds = None
+        self._lock = threading.Lock()
+    
+    def get(self):
+        """Return the component, loading it first if needed (None if loading failed)"""
+        if self.state not in ('ready', 'failed'):
+            with self._lock:
+                if self.state not in ('ready', 'failed'):
+                    self._load()
+        return self.instance
+    
+    def _load(self):
+        self.state = 'loading'
+        started = time.perf_counter()
         try:
-            self.text_classifier = TextEmotionClassifier()
-            print("✅ Text emotion classifier initialized")
+            self.instance = self.factory()
+            self.state = 'ready'
+            print(f"✅ {self.name} initialized")
         except Exception as e:
-            print(f"❌ Error initializing text classifier: {e}")
-            self.text_classifier = None
-        
-        # Initialize face emotion classifier
+            self.error = str(e)
+            self.state = 'failed'
+            print(f"❌ Error initializing {self.name}: {e}")
+        self.load_seconds = time.perf_counter() - started
+    
+    def run_warmup(self):
+        """Run the warm-up inference once the component is ready"""
+        if self.warmup is None or self.get() is None:
+            return
+        self.warmup_state = 'running'
+        started = time.perf_counter()
         try:
-            self.face_classifier = FaceEmotionClassifier()
-            print("✅ Face emotion classifier initialized")
+            self.warmup(self.instance)
+            self.warmup_state = 'done'
         except Exception as e:
-            print(f"❌ Error initializing face classifier: {e}")
-            self.face_classifier = None
+            self.warmup_state = 'failed'
+            print(f"❌ Warm-up failed for {self.name}: {e}")
+        self.warmup_seconds = time.perf_counter() - started
+    
+    def status(self):
+        return {
+            'state': self.state,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'warmup': self.warmup_state,
+            'warmup_seconds': round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            'error': self.error
+        }
+
+def _warmup_text(classifier):
+    # Bypass the result cache so the forward pass really runs
+    classifier.predict_probabilities(["Warming up the text emotion model"])
+
+def _warmup_face(classifier):
+    classifier.predict_emotion_from_array(np.full((224, 224, 3), 128, dtype=np.uint8))
+
+def _warmup_movies(movie_recommender):
+    movie_recommender.recommend_movies(6, 1)
+
+class UnifiedOTTRecommender:
+    def __init__(self, parallel=None, lazy=None, background=None, warmup=None, defer_warmup=False):
+        """
+        Initialize the unified OTT recommendation system
         
-        # Initialize movie recommender
-        try:
-            self.movie_recommender = MovieRecommenderHF()
-            print("✅ Movie recommender initialized")
-        except Exception as e:
-            print(f"❌ Error initializing movie recommender: {e}")
-            self.movie_recommender = None
+        Args (the first four default to STARTUP_SETTINGS):
+            parallel (bool): Load the text, face and movie components concurrently
+            lazy (bool): Load each component on first use instead of now
+            background (bool): Return immediately and load in a background thread
+            warmup (bool): Run a throwaway inference after each component loads
+            defer_warmup (bool): Don't start the warm-up after loading; the caller runs
+                start_warmup() later (the pre-fork server does this in each worker)
+        """
+        print("Initializing Unified OTT Recommendation System...")
+        self.parallel = STARTUP_SETTINGS['parallel'] if parallel is None else parallel
+        self.lazy = STARTUP_SETTINGS['lazy'] if lazy is None else lazy
+        background = STARTUP_SETTINGS['background'] if background is None else background
+        warmup = STARTUP_SETTINGS['warmup'] if warmup is None else warmup
+        
+        self.components = {
+            'text_classifier': ComponentLoader('Text emotion classifier', TextEmotionClassifier,
+                                               _warmup_text if warmup else None),
+            'face_classifier': ComponentLoader('Face emotion classifier', FaceEmotionClassifier,
+                                               _warmup_face if warmup else None),
+            'movie_recommender': ComponentLoader('Movie recommender', MovieRecommenderHF,
+                                                 _warmup_movies if warmup else None)
+        }
+        self.started_at = time.time()
+        self.image_cache = build_image_cache()
         
         # Emotion labels mapping
         self.emotion_labels = {
@@ -60,7 +143,77 @@ class UnifiedOTTRecommender:
             6: 'Neutral'
         }
         
-        print("✅ System initialized successfully!")
+        if self.lazy:
+            print("✅ System initialized (components load on first use)")
+        elif background:
+            threading.Thread(target=self.load_components, args=(not defer_warmup,),
+                             name='component-loader', daemon=True).start()
+            print("✅ System initializing in the background (see /ready)")
+        else:
+            self.load_components(warmup=not defer_warmup)
+            print("✅ System initialized successfully!")
+    
+    def load_components(self, warmup=True):
+        """
+        Load every component (concurrently when parallel is set)
+        
+        Args:
+            warmup (bool): Start the background warm-up afterwards. The pre-fork
+                server passes False and warms up inside each worker instead, since
+                running inference before fork() can leave thread pools unusable in children.
+        """
+        loaders = list(self.components.values())
+        if self.parallel:
+            with ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix='component-load') as executor:
+                list(executor.map(ComponentLoader.get, loaders))
+        else:
+            for loader in loaders:
+                loader.get()
+        
+        if warmup:
+            self.start_warmup()
+    
+    def start_warmup(self):
+        """Run the warm-up inferences in a background thread"""
+        threading.Thread(target=self._warmup_components, name='component-warmup', daemon=True).start()
+    
+    def _warmup_components(self):
+        for loader in self.components.values():
+            loader.run_warmup()
+    
+    @property
+    def text_classifier(self):
+        return self.components['text_classifier'].get()
+    
+    @property
+    def face_classifier(self):
+        return self.components['face_classifier'].get()
+    
+    @property
+    def movie_recommender(self):
+        return self.components['movie_recommender'].get()
+    
+    def component_state(self, name):
+        """Loading state of a component without triggering a load"""
+        return self.components[name].state
+    
+    def readiness(self):
+        """
+        Report per-component state and timings
+        
+        Returns:
+            dict: 'ready' is True once every component has loaded (or, in lazy mode,
+                  none is mid-load or failed); 'components' holds per-component status
+        """
+        components = {name: loader.status() for name, loader in self.components.items()}
+        ok_states = ('ready', 'pending') if self.lazy else ('ready',)
+        return {
+            'ready': all(status['state'] in ok_states for status in components.values()),
+            'lazy': self.lazy,
+            'parallel': self.parallel,
+            'uptime_seconds': round(time.time() - self.started_at, 3),
+            'components': components
+        }
     
     def analyze_text_emotion(self, text):
         """Analyze emotion from text input"""
@@ -69,26 +222,292 @@ class UnifiedOTTRecommender:
                 print("❌ Text classifier not available")
                 return None
             
-            emotion_class, confidence, emotion_label = self.text_classifier.predict_emotion(text)
+            prediction = self.text_classifier.predict_emotion(text)
             
-            return {
-                'emotion_class': emotion_class,
-                'emotion_label': self.emotion_labels.get(emotion_class, emotion_label),
-                'confidence': confidence,
-                'method': 'text'
-            }
+            return self.build_text_analysis(*prediction)
         except Exception as e:
             print(f"Error in text emotion analysis: {e}")
             return None
     
+    def analyze_text_emotions(self, texts):
+        """
+        Analyze emotion for several texts with one batched model call
+        
+        Args:
+            texts (list[str]): Input texts
+            
+        Returns:
+            list[dict]: Emotion analysis per text, in input order (None if the classifier is unavailable)
+        """
+        try:
+            if not self.text_classifier:
+                print("❌ Text classifier not available")
+                return None
+            
+            predictions = self.text_classifier.predict_emotions(texts)
+            return [self.build_text_analysis(*prediction) for prediction in predictions]
+        except Exception as e:
+            print(f"Error in batch text emotion analysis: {e}")
+            return None
+    
+    def predict_text_emotions(self, texts):
+        """Raw (emotion_class, confidence, emotion_label, probabilities) predictions for a batch of texts"""
+        return self.text_classifier.predict_emotions(texts)
+    
+    def analyze_text_batch(self, texts, include_recommendations=False, content_type="movie", num_recommendations=10):
+        """
+        Analyze many texts and optionally recommend for each one
+        
+        Returns:
+            list[dict]: One item per text with 'index' and 'emotion_analysis', plus
+                'recommendations' (DataFrame) or 'error' when recommendations were requested;
+                None if emotion analysis failed
+        """
+        analyses = self.analyze_text_emotions(texts)
+        if analyses is None:
+            return None
+        
+        items = []
+        for index, emotion_analysis in enumerate(analyses):
+            item = {'index': index, 'emotion_analysis': emotion_analysis}
+            if include_recommendations:
+                recommendation = self.recommend_for_emotion(emotion_analysis, content_type, num_recommendations)
+                if 'error' in recommendation:
+                    item['error'] = recommendation['error']
+                else:
+                    item['recommendations'] = recommendation['recommendations']
+            items.append(item)
+        return items
+    
+    def analyze_image_emotion(self, image):
+        """
+        Analyze emotion from an image, decoding it only once
+        
+        Args:
+            image (str | bytes | np.array): Path, encoded bytes or BGR array
+            
+        Returns:
+            dict: Emotion analysis, or None if the image could not be analyzed
+        """
+        analyses = self.analyze_image_emotions([image])
+        return analyses[0] if analyses else None
+    
+    def analyze_image_emotions(self, images):
+        """
+        Analyze emotion for many images with shared batched ViT forward passes
+        
+        Faces are detected in each image and classified together; images
+        without a face are classified whole. Images whose perceptual hash is
+        close to a cached one skip detection and inference entirely.
+        
+        Args:
+            images (list): Paths, encoded bytes or BGR arrays
+            
+        Returns:
+            list[dict]: Emotion analysis per image (None for images that could not be analyzed)
+        """
+        try:
+            if not self.face_classifier:
+                print("❌ Face classifier not available")
+                return None
+            
+            decoded = [self.face_classifier.load_image(image) for image in images]
+            analyses = [None] * len(decoded)
+            keys = [None] * len(decoded)
+            pending = []
+            for index, image in enumerate(decoded):
+                if image is None:
+                    continue
+                if self.image_cache is not None:
+                    keys[index] = self.image_cache.key(image)
+                    cached = self.image_cache.get(keys[index])
+                    if cached is not None:
+                        analyses[index] = cached
+                        continue
+                pending.append(index)
+            
+            results = self.face_classifier.analyze_images([decoded[index] for index in pending]) if pending else []
+            for index, result in zip(pending, results):
+                if result['method'] == 'error':
+                    continue
+                
+                emotion_analysis = {
+                    'emotion_class': result['emotion_class'],
+                    'emotion_label': self.emotion_labels.get(result['emotion_class'], result['emotion_label']),
+                    'confidence': float(result['confidence']),
+                    'method': 'image'
+                }
+                if result.get('probabilities') is not None:
+                    emotion_analysis['probabilities'] = [round(float(p), 4) for p in result['probabilities']]
+                if result['face_detected']:
+                    emotion_analysis['num_faces'] = len(result['faces'])
+                    emotion_analysis['aggregation'] = result['aggregation']
+                    emotion_analysis['faces'] = result['faces']
+                print(f"📸 Image emotion analysis ({result['method']}): {emotion_analysis}")
+                analyses[index] = emotion_analysis
+                if self.image_cache is not None:
+                    self.image_cache.put(keys[index], emotion_analysis)
+            return analyses
+        except Exception as e:
+            print(f"❌ Image analysis failed: {e}")
+            return None
+    
+    def analyze_image_batch(self, images, include_recommendations=False, content_type="movie", num_recommendations=10):
+        """
+        Analyze many images and optionally recommend for each one
+        
+        Returns:
+            list[dict]: One item per image with 'index' and 'emotion_analysis', plus
+                'recommendations' (DataFrame) or 'error'; None if the classifier is unavailable
+        """
+        analyses = self.analyze_image_emotions(images)
+        if analyses is None:
+            return None
+        
+        items = []
+        for index, emotion_analysis in enumerate(analyses):
+            item = {'index': index, 'emotion_analysis': emotion_analysis}
+            if emotion_analysis is None:
+                item['error'] = 'Could not decode or analyze image'
+            elif include_recommendations:
+                recommendation = self.recommend_for_emotion(emotion_analysis, content_type, num_recommendations)
+                if 'error' in recommendation:
+                    item['error'] = recommendation['error']
+                else:
+                    item['recommendations'] = recommendation['recommendations']
+            items.append(item)
+        return items
+    
+    def predict_frame_probabilities(self, frame):
+        """
+        Per-class emotion probabilities for one video frame (None if no face was found)
+        
+        Args:
+            frame (bytes | np.array): Encoded image bytes or BGR array
+        """
+        if not self.face_classifier:
+            return None
+        return self.face_classifier.predict_class_probabilities(frame)
+    
+    def build_text_analysis(self, emotion_class, confidence, emotion_label, probabilities=None):
+        """
+        Build the emotion analysis dict for a text prediction (e.g. one returned by the micro-batcher)
+        
+        Args:
+            probabilities (tuple): Model label probabilities, ordered as the classifier's labels;
+                folded into 'probabilities' per emotion class. None for failed or older cached predictions
+        """
+        emotion_analysis = {
+            'emotion_class': emotion_class,
+            'emotion_label': self.emotion_labels.get(emotion_class, emotion_label),
+            'confidence': confidence,
+            'method': 'text'
+        }
+        if probabilities is not None:
+            distribution = class_profiles(
+                np.asarray([probabilities], dtype=np.float32),
+                self.text_classifier.labels,
+                self.text_classifier.emotion_mapping
+            )[0]
+            emotion_analysis['probabilities'] = [round(float(p), 4) for p in distribution]
+        return emotion_analysis
+    
+    def recommend_for_emotion(self, emotion_analysis, content_type="movie", num_recommendations=10, ranking=None,
+                              emotion_distribution=None, seed=None):
+        """
+        Get recommendations for an emotion analysis that has already been computed
+        
+        Args:
+            emotion_analysis (dict): Output of analyze_text_emotion / build_text_analysis or the image path
+            content_type (str): 'movie' or 'tv_series'
+            num_recommendations (int): Number of recommendations to return
+            ranking (str): 'genre', 'mood' or 'emotion' (None = RECOMMENDATION_SETTINGS['ranking'])
+            emotion_distribution (np.array): Probability per emotion class for ranking='emotion'
+                (e.g. smoothed stream probabilities); defaults to emotion_analysis['probabilities'],
+                then one-hot on the detected class
+            seed (int | str): Seed or session token for reproducible recommendations
+            
+        Returns:
+            dict: Same shape as get_complete_recommendation, plus 'next_cursor' for the next page
+        """
+        if not self.movie_recommender:
+            return {'error': 'Movie recommender not initialized'}
+        
+        print(f"🎬 Getting recommendations for emotion: {emotion_analysis['emotion_label']}")
+        if emotion_distribution is None:
+            emotion_distribution = emotion_analysis.get('probabilities')
+        try:
+            recommendations = self.movie_recommender.recommend_movies(
+                emotion_analysis['emotion_class'],
+                num_recommendations,
+                content_type,
+                ranking=ranking,
+                emotion_distribution=emotion_distribution,
+                seed=seed
+            )
+        except ValueError as e:
+            # Unknown or unavailable ranking, or a malformed distribution: a client error, not an empty result
+            return {'error': str(e)}
+        
+        print(f"✅ Found {len(recommendations)} recommendations")
+        
+        return {
+            'emotion_analysis': emotion_analysis,
+            'recommendations': recommendations,
+            'content_type': content_type,
+            'num_recommendations': num_recommendations,
+            'next_cursor': recommendations.attrs.get('next_cursor')
+        }
+    
+    def next_recommendations(self, cursor, num_recommendations=10):
+        """
+        Continue a previous recommendation request from its next_cursor
+        
+        Args:
+            cursor (str): 'next_cursor' of a previous result
+            num_recommendations (int): Page size
+            
+        Returns:
+            dict: 'recommendations' and 'next_cursor' (None after the last page)
+            
+        Raises:
+            ValueError: For malformed or stale cursors
+        """
+        if not self.movie_recommender:
+            return {'error': 'Movie recommender not initialized'}
+        
+        recommendations = self.movie_recommender.recommend_movies(None, num_recommendations, cursor=cursor)
+        return {
+            'recommendations': recommendations,
+            'next_cursor': recommendations.attrs.get('next_cursor')
+        }
+    
+    def search_movies(self, query, num_results=10, prefix=True):
+        """
+        Full-text search over the catalog (see MovieRecommenderHF.search_movies)
+        
+        Returns:
+            pd.DataFrame: Ranked results, empty if the movie recommender isn't available
+        """
+        if not self.movie_recommender:
+            return pd.DataFrame()
+        return self.movie_recommender.search_movies(query, num_results, prefix)
+    
     def get_complete_recommendation(self, 
                                   text=None,
                                   audio_path=None,
                                   image_path=None,
                                   content_type="movie",
-                                  num_recommendations=10):
+                                  num_recommendations=10,
+                                  image=None,
+                                  ranking=None,
+                                  seed=None):
         """
         Get complete recommendations based on multiple input types
+        
+        Images can be given as image_path or, to avoid temp files, as image
+        (encoded bytes or a decoded BGR array). A seed (or session token) makes the
+        recommendations reproducible; the result's 'next_cursor' pages through them.
         """
         try:
             emotion_analysis = None
@@ -98,56 +517,16 @@ class UnifiedOTTRecommender:
                 emotion_analysis = self.analyze_text_emotion(text)
                 print(f"📝 Text emotion analysis: {emotion_analysis}")
             
-            # Image analysis
-            if image_path and not emotion_analysis and self.face_classifier:
-                try:
-                    # First try face detection path
-                    emotion_class, confidence, raw_label, face_detected = self.face_classifier.detect_face_and_predict(image_path)
-                    if face_detected:
-                        emotion_analysis = {
-                            'emotion_class': emotion_class,
-                            'emotion_label': self.emotion_labels.get(emotion_class, raw_label),
-                            'confidence': float(confidence),
-                            'method': 'image'
-                        }
-                        print(f"📸 Image emotion analysis (face): {emotion_analysis}")
-                    else:
-                        # Fallback: classify whole image
-                        emotion_class, confidence, raw_label = self.face_classifier.predict_emotion(image_path)
-                        emotion_analysis = {
-                            'emotion_class': emotion_class,
-                            'emotion_label': self.emotion_labels.get(emotion_class, raw_label),
-                            'confidence': float(confidence),
-                            'method': 'image'
-                        }
-                        print(f"📸 Image emotion analysis (full-image): {emotion_analysis}")
-                except Exception as e:
-                    print(f"❌ Image analysis failed: {e}")
-            
-            # Image analysis not implemented in this HF variant
+            # Image analysis (an in-memory image wins over a path)
+            image_source = image if image is not None else image_path
+            if image_source is not None and not emotion_analysis and self.face_classifier:
+                emotion_analysis = self.analyze_image_emotion(image_source)
             
             if not emotion_analysis:
                 return {'error': 'No input provided or emotion analysis failed'}
             
             # Get recommendations
-            if not self.movie_recommender:
-                return {'error': 'Movie recommender not initialized'}
-            
-            print(f"🎬 Getting recommendations for emotion: {emotion_analysis['emotion_label']}")
-            recommendations = self.movie_recommender.recommend_movies(
-                emotion_analysis['emotion_class'],
-                num_recommendations,
-                content_type
-            )
-            
-            print(f"✅ Found {len(recommendations)} recommendations")
-            
-            return {
-                'emotion_analysis': emotion_analysis,
-                'recommendations': recommendations,
-                'content_type': content_type,
-                'num_recommendations': num_recommendations
-            }
+            return self.recommend_for_emotion(emotion_analysis, content_type, num_recommendations, ranking, seed=seed)
             
         except Exception as e:
             print(f"❌ Error in complete recommendation: {e}")
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The backend modules import their siblings by bare name (see the sys.path
+# setup at the top of each module), so mirror that for the tests
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ('', 'config', 'models', 'services'):
+    path = os.path.join(BACKEND, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,51 @@
+"""Compact catalog columns and float32 output widening"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import compact_catalog, memory_usage, widen_float32
+
+
+def _catalog():
+    return pd.DataFrame({
+        'title': ['A', 'B', None],
+        'overview': ['one', 'two', 'three'],
+        'rating': [9.3, 7.25, 8.0],
+        'year': [1994, 2008, 2023],
+        'genre_mask': np.array([1, 6, 32], dtype=np.uint16),
+        'adult': [False, True, False]
+    }, index=[10, 4, 7])
+
+
+def test_compact_catalog_downcasts_and_keeps_values():
+    movies = _catalog()
+    compact = compact_catalog(movies)
+
+    assert compact['rating'].dtype == np.float32
+    assert compact['year'].dtype == np.int16
+    assert compact['genre_mask'].dtype == np.uint16 and compact['adult'].dtype == bool
+    assert list(compact.index) == [0, 1, 2]
+    np.testing.assert_allclose(compact['rating'], movies['rating'], rtol=1e-6)
+    assert compact['year'].tolist() == movies['year'].tolist()
+    assert compact['title'].iloc[:2].tolist() == ['A', 'B'] and pd.isna(compact['title'].iloc[2])
+    assert movies['rating'].dtype == np.float64  # the input is left alone
+
+
+def test_compact_catalog_uses_arrow_strings_when_available():
+    pytest.importorskip('pyarrow')
+    compact = compact_catalog(_catalog())
+    assert str(compact['overview'].dtype) == 'string'
+    assert memory_usage(compact)['total_bytes'] < memory_usage(_catalog().astype({'overview': object}))['total_bytes']
+
+
+def test_widen_float32_rounds_away_float32_noise():
+    values = np.array([9.3, 9.2436771, 7.0], dtype=np.float32)
+    widened = widen_float32(values)
+    assert widened.dtype == np.float64
+    assert widened.tolist() == [9.3, 9.24, 7.0]
+    assert widen_float32(values, decimals=None).tolist() == [9.3, 9.243677, 7.0]
+
+    # Anything that isn't float32 passes through untouched
+    assert widen_float32(np.array([9.2436771])).tolist() == [9.2436771]
+    assert widen_float32(np.array([1994], dtype=np.int16)).dtype == np.int16
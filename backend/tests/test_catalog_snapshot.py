@@ -0,0 +1,112 @@
+"""Catalog snapshots: write / memory-map round trip, versioning and rebuild fallback"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('datasets')
+
+import catalog_snapshot
+import movie_recommender_hf
+from catalog import compact_catalog
+from models_config import CATALOG_SETTINGS, EMBEDDING_SETTINGS
+from movie_recommender_hf import MovieRecommenderHF
+
+MOVIES = pd.DataFrame({
+    'title': ['Laughs', 'Tears', 'Night', 'Siege'],
+    'overview': ['a funny comedy', 'a tragic tale', 'a scary monster', 'an epic battle'],
+    'rating': [8.0, 9.0, 7.5, 7.2],
+    'year': [2001, 1995, 2020, 2010]
+})
+
+
+def test_snapshot_round_trip(tmp_path):
+    movies = compact_catalog(MOVIES)
+    arrays = {'rows': np.arange(4, dtype=np.int64), 'scores': np.linspace(0, 1, 4)}
+    catalog_snapshot.write_snapshot(str(tmp_path), 'v1', movies, arrays, metadata={'fingerprint': {'a': 1}})
+
+    loaded, loaded_arrays, manifest = catalog_snapshot.load_snapshot(str(tmp_path), 'v1')
+    pd.testing.assert_frame_equal(loaded, movies, check_dtype=False)
+    assert loaded['rating'].dtype == np.float32 and str(loaded['title'].dtype) == 'string'
+    for name, array in arrays.items():
+        assert isinstance(loaded_arrays[name], np.memmap)
+        np.testing.assert_array_equal(loaded_arrays[name], array)
+    assert manifest['rows'] == 4 and manifest['metadata'] == {'fingerprint': {'a': 1}}
+    assert catalog_snapshot.verify_snapshot(str(tmp_path), 'v1', manifest) == []
+
+
+def test_stale_and_corrupt_snapshots_are_not_loaded(tmp_path):
+    root = str(tmp_path)
+    catalog_snapshot.write_snapshot(root, 'v1', compact_catalog(MOVIES), {'rows': np.arange(4)})
+    assert catalog_snapshot.load_snapshot(root, 'v2') is None
+
+    with open(os.path.join(root, 'v1', 'rows.npy'), 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b'\x07')
+    assert catalog_snapshot.load_snapshot(root, 'v1') is None
+    assert catalog_snapshot.load_snapshot(root, 'v1', verify_checksum=False) is not None
+
+    # A new version replaces the old one
+    catalog_snapshot.write_snapshot(root, 'v2', compact_catalog(MOVIES), {})
+    assert sorted(os.listdir(root)) == ['v2']
+
+
+@pytest.fixture
+def catalog(monkeypatch, tmp_path):
+    """Snapshots in tmp_path, a pinned revision and a dataset loader that counts its calls"""
+    monkeypatch.setitem(CATALOG_SETTINGS, 'snapshot_dir', str(tmp_path / 'catalog'))
+    monkeypatch.setitem(EMBEDDING_SETTINGS, 'artifact_dir', str(tmp_path / 'embeddings'))
+    monkeypatch.setitem(CATALOG_SETTINGS, 'dataset_revision', 'rev-1')
+    monkeypatch.setitem(CATALOG_SETTINGS, 'verify_checksum', True)
+    loads = []
+
+    def load_movie_dataset(self):
+        loads.append(self.dataset_revision())
+        self.movies_df = MOVIES.copy()
+        self.movies_df['genre_mask'] = self.genre_tagger.tag(self.movies_df['overview'])
+        self.catalog_source = 'dataset'
+
+    monkeypatch.setattr(MovieRecommenderHF, 'load_movie_dataset', load_movie_dataset)
+    return loads
+
+
+def test_recommender_loads_its_own_snapshot(catalog):
+    built = MovieRecommenderHF(snapshot=True)
+    loaded = MovieRecommenderHF(snapshot=True)
+
+    assert catalog == ['rev-1']
+    assert built.catalog_source == 'dataset' and loaded.catalog_source == 'snapshot'
+    pd.testing.assert_frame_equal(loaded.movies_df, built.movies_df, check_dtype=False)
+    for cluster, (rows, scores) in built.cluster_index.items():
+        np.testing.assert_array_equal(loaded.cluster_index[cluster][0], rows)
+        np.testing.assert_array_equal(loaded.cluster_index[cluster][1], scores)
+    assert loaded.get_movie_info('tears')['rating'] == 9.0
+
+
+def test_new_dataset_revision_or_corruption_rebuilds(catalog, monkeypatch):
+    MovieRecommenderHF(snapshot=True)
+    monkeypatch.setitem(CATALOG_SETTINGS, 'dataset_revision', 'rev-2')
+    assert MovieRecommenderHF(snapshot=True).catalog_source == 'dataset'
+    assert catalog == ['rev-1', 'rev-2']
+
+    version = catalog_snapshot.snapshot_version(MovieRecommenderHF(snapshot=True).snapshot_fingerprint())
+    with open(os.path.join(CATALOG_SETTINGS['snapshot_dir'], version, catalog_snapshot.CATALOG_FILE), 'r+b') as f:
+        f.write(b'junk')
+    assert MovieRecommenderHF(snapshot=True).catalog_source == 'dataset'
+    assert catalog == ['rev-1', 'rev-2', 'rev-2']
+
+
+def test_unresolvable_revision_reuses_a_matching_snapshot(catalog, monkeypatch):
+    MovieRecommenderHF(snapshot=True)
+    monkeypatch.setitem(CATALOG_SETTINGS, 'dataset_revision', None)
+    monkeypatch.setattr(movie_recommender_hf, 'resolve_dataset_revision', lambda dataset: None)
+
+    offline = MovieRecommenderHF(snapshot=True)
+    assert offline.catalog_source == 'snapshot' and catalog == ['rev-1']
+
+    # Settings that change the catalog still force a rebuild
+    monkeypatch.setitem(CATALOG_SETTINGS, 'seed', CATALOG_SETTINGS['seed'] + 1)
+    assert MovieRecommenderHF(snapshot=True).catalog_source == 'dataset'
@@ -0,0 +1,69 @@
+"""Exact and IVF nearest-neighbour search over unit vectors"""
+
+import numpy as np
+
+import embedding_index
+from embedding_index import EmbeddingIndex, build_ivf, normalize_rows
+
+
+def _clustered_vectors(rows=2000, dim=32, centers=20, seed=0):
+    rng = np.random.default_rng(seed)
+    means = normalize_rows(rng.normal(size=(centers, dim)))
+    vectors = means[rng.integers(0, centers, rows)] + 0.15 * rng.normal(size=(rows, dim))
+    return normalize_rows(vectors).astype(np.float16), rng
+
+
+def test_exact_search_matches_brute_force():
+    vectors, rng = _clustered_vectors()
+    query = normalize_rows(rng.normal(size=32)).astype(np.float32)
+    expected = np.argsort(-(vectors.astype(np.float32) @ query), kind='stable')[:10]
+
+    rows, scores = EmbeddingIndex(vectors).search(query, 10)
+    assert set(rows.tolist()) == set(expected.tolist())
+    assert (np.diff(scores) <= 0).all()
+    assert len(EmbeddingIndex(vectors).search(query, 0)[0]) == 0
+
+
+def test_blockwise_scoring_matches_the_widened_copy(monkeypatch):
+    vectors, rng = _clustered_vectors(rows=500)
+    query = normalize_rows(rng.normal(size=32)).astype(np.float32)
+    widened = EmbeddingIndex(vectors)
+
+    monkeypatch.setattr(embedding_index, 'FLOAT32_COPY_MAX_BYTES', 0)
+    monkeypatch.setattr(embedding_index, 'BLOCK_ROWS', 64)
+    blockwise = EmbeddingIndex(vectors)
+    assert blockwise._widened is None
+    np.testing.assert_allclose(blockwise.similarities(query), widened.similarities(query), rtol=1e-6)
+
+
+def test_ivf_partition_covers_every_row_once():
+    vectors, rng = _clustered_vectors()
+    centroids, offsets, rows = build_ivf(vectors, num_lists=16, rng=rng)
+    assert centroids.shape == (16, 32) and offsets[0] == 0 and offsets[-1] == len(vectors)
+    assert np.array_equal(np.sort(rows), np.arange(len(vectors)))
+    np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+
+def test_ivf_top_k_agrees_with_exact_search():
+    vectors, rng = _clustered_vectors()
+    ivf = build_ivf(vectors, num_lists=16, rng=np.random.default_rng(1))
+    exact = EmbeddingIndex(vectors)
+    approximate = EmbeddingIndex(vectors, ivf, probes=4)
+    assert approximate.mode == 'ivf' and exact.mode == 'exact'
+
+    recalls = []
+    for _ in range(20):
+        # Queries near the data, like mood vectors near the overviews they describe
+        near = vectors[rng.integers(len(vectors))].astype(np.float32) + 0.1 * rng.normal(size=32)
+        query = normalize_rows(near).astype(np.float32)
+        expected, _ = exact.search(query, 10)
+        rows, scores = approximate.search(query, 10)
+        # Every IVF hit carries its exact similarity
+        np.testing.assert_allclose(scores, exact.similarities(query, rows), rtol=1e-6)
+        recalls.append(len(set(rows.tolist()) & set(expected.tolist())) / 10)
+    assert np.mean(recalls) >= 0.95
+
+    # Probing every list is exact
+    everything = EmbeddingIndex(vectors, ivf, probes=16)
+    assert set(everything.search(query, 10)[0].tolist()) == set(exact.search(query, 10)[0].tolist())
+    assert set(approximate.search(query, 10, exact=True)[0].tolist()) == set(exact.search(query, 10)[0].tolist())
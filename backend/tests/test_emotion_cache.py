@@ -0,0 +1,197 @@
+"""Emotion result caches: text LRU/TTL/byte bounds and shared SQLite store, image pHash cache"""
+
+import copy
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+
+import emotion_cache
+from emotion_cache import ImageEmotionCache, SQLiteCacheBackend, TextEmotionCache, perceptual_hash
+
+JOY = (1, 0.9, 'joy')
+SADNESS = (0, 0.8, 'sadness')
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys_ignore_unicode_form_and_whitespace():
+    cache = TextEmotionCache(namespace='model')
+    assert cache.key('  Café\tday ') == cache.key('Café day')
+    assert cache.key('Day') != cache.key('day')
+    assert TextEmotionCache(casefold=True).key('Day') == TextEmotionCache(casefold=True).key('day')
+    assert TextEmotionCache(namespace='other').key('day') != TextEmotionCache(namespace='model').key('day')
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TextEmotionCache(max_entries=2)
+    cache.put('a', JOY)
+    cache.put('b', SADNESS)
+    assert cache.get('a') == JOY  # 'b' is now the oldest
+    cache.put('c', JOY)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == JOY and cache.get('c') == JOY
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(emotion_cache.time, 'time', clock)
+    cache = TextEmotionCache(ttl_seconds=60)
+    cache.put('a', JOY)
+
+    clock.now += 59
+    assert cache.get('a') == JOY
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_byte_limit_evicts_oldest_entries():
+    entry_size = TextEmotionCache()._entry_size(TextEmotionCache().key('a'), JOY)
+    cache = TextEmotionCache(max_bytes=int(entry_size * 2.5))
+    for text in ('a', 'b', 'c'):
+        cache.put(text, JOY)
+
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['evictions'] == 1
+    assert stats['bytes'] <= cache.max_bytes
+    assert cache.get('a') is None and cache.get('c') == JOY
+
+
+def test_shared_backend_serves_other_caches(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    writer = TextEmotionCache(namespace='model', shared_backend=SQLiteCacheBackend(path))
+    reader = TextEmotionCache(namespace='model', shared_backend=SQLiteCacheBackend(path))
+    writer.put('a', JOY)
+
+    assert reader.get('a') == JOY
+    assert reader.get('a') == JOY  # now from the in-process LRU
+    stats = reader.stats()
+    assert stats['shared_hits'] == 1 and stats['hits'] == 1
+
+
+def _child_uses_own_connection(backend, parent_connection):
+    # Runs in the forked child: the parent's connection must be set aside, not reused
+    connection = backend._connection()
+    ok = (connection is not parent_connection and backend._inherited == [parent_connection]
+          and backend.get('parent') == list(JOY))
+    backend.put('child', list(SADNESS))
+    os._exit(0 if ok else 1)
+
+
+def test_sqlite_connections_are_opened_per_process(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.sqlite'))
+    backend.put('parent', list(JOY))
+    parent_connection = backend._connection()
+
+    child = multiprocessing.get_context('fork').Process(
+        target=_child_uses_own_connection, args=(backend, parent_connection)
+    )
+    child.start()
+    child.join(30)
+    assert child.exitcode == 0
+
+    assert backend._connection() is parent_connection
+    assert backend.get('child') == list(SADNESS)
+
+
+def test_batch_prediction_errors_keep_cache_hits():
+    pytest.importorskip('transformers')
+    from text_emotion_hf import TextEmotionClassifier
+
+    def model_down(texts):
+        raise RuntimeError("model down")
+
+    classifier = TextEmotionClassifier.__new__(TextEmotionClassifier)
+    classifier.cache = TextEmotionCache()
+    classifier.cache.put('seen', JOY)
+    classifier.predict_probabilities = model_down
+
+    assert classifier.predict_emotions(['seen', 'new']) == [JOY, (0, 0.0, 'error')]
+
+
+def _scene(seed):
+    """Structured test image: random filled shapes over a gradient"""
+    rng = np.random.default_rng(seed)
+    image = np.tile(np.linspace(0, 255, 256, dtype=np.uint8), (256, 1))
+    image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    for _ in range(8):
+        center = tuple(int(v) for v in rng.integers(0, 256, 2))
+        color = tuple(int(v) for v in rng.integers(0, 256, 3))
+        cv2.circle(image, center, int(rng.integers(10, 60)), color, -1)
+    return image
+
+
+def _distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def test_perceptual_hash_is_stable_under_reencoding():
+    image = _scene(0)
+    _, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 60])
+    reencoded = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+    resized = cv2.resize(image, (200, 200), interpolation=cv2.INTER_AREA)
+
+    assert 0 <= perceptual_hash(image) < 2 ** 64
+    assert _distance(perceptual_hash(image), perceptual_hash(reencoded)) <= 6
+    assert _distance(perceptual_hash(image), perceptual_hash(resized)) <= 6
+    assert _distance(perceptual_hash(image), perceptual_hash(_scene(1))) > 6
+
+
+ANALYSIS = {
+    'dominant_emotion': 'happy', 'confidence': 0.9, 'method': 'face_detection',
+    'faces': [{'box': [10, 10, 50, 50], 'emotion_label': 'happy', 'scores': {'happy': 0.9}}]
+}
+
+
+def test_image_hits_are_copies():
+    cache = ImageEmotionCache(hamming_tolerance=0)
+    key = cache.key(_scene(0))
+    value = copy.deepcopy(ANALYSIS)
+    cache.put(key, value)
+    value['faces'][0]['box'][0] = 999  # the caller keeps editing its dict
+
+    hit = cache.get(key)
+    assert hit == ANALYSIS
+    hit['faces'][0]['box'][0] = 999
+    hit['dominant_emotion'] = 'sad'
+    assert cache.get(key) == ANALYSIS
+    assert cache.stats()['hits'] == 2
+
+
+def test_near_duplicate_hits_drop_face_boxes():
+    cache = ImageEmotionCache(hamming_tolerance=6)
+    cache.put(1 << 40, ANALYSIS)
+
+    near = cache.get((1 << 40) | 0b111)  # 3 bits away
+    assert near == {field: value for field, value in ANALYSIS.items() if field != 'faces'}
+    assert cache.get((1 << 40) | 0b1111111) is None  # 7 bits away
+    assert cache.get(1 << 40)['faces'] == ANALYSIS['faces']
+
+    stats = cache.stats()
+    assert stats['near_hits'] == 1 and stats['misses'] == 1 and stats['hits'] == 1
+
+
+def test_image_cache_evicts_least_recently_used():
+    cache = ImageEmotionCache(max_entries=2, hamming_tolerance=0)
+    cache.put(1, ANALYSIS)
+    cache.put(2, ANALYSIS)
+    cache.get(1)
+    cache.put(3, ANALYSIS)
+    assert cache.get(2) is None and cache.get(1) is not None and cache.get(3) is not None
+
+    small = ImageEmotionCache(max_bytes=1, hamming_tolerance=0)
+    small.put(1, ANALYSIS)
+    stats = small.stats()
+    assert stats['entries'] == 0 and stats['bytes'] == 0 and stats['evictions'] == 1
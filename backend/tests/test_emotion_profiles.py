@@ -0,0 +1,186 @@
+"""Emotion profiles and distribution-aware ranking, over a small synthetic catalog"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('datasets')
+
+from emotion_profiles import NUM_CLASSES, class_profiles, validate_distribution
+from models_config import EMBEDDING_SETTINGS, EMOTION_PROFILE_SETTINGS, FACE_EMOTION_MAPPING, TEXT_EMOTION_MAPPING
+from movie_recommender_hf import MovieRecommenderHF
+
+MOVIES = pd.DataFrame({
+    'title': ['Laughs', 'Tears', 'Night', 'Siege', 'Hearts', 'Clues'],
+    'overview': ['a funny comedy', 'a tragic tale', 'a scary monster', 'an epic battle',
+                 'a tale of love', 'a detective hunt'],
+    'rating': [8.0, 9.0, 7.5, 7.2, 8.8, 7.9],
+    'year': [2001, 1995, 2020, 2010, 2015, 2005]
+})
+
+SAD, FEAR, NEUTRAL = 0, 4, 6
+
+
+def one_hot(emotion_class):
+    return np.eye(NUM_CLASSES, dtype=np.float32)[emotion_class]
+
+
+@pytest.fixture
+def recommender(monkeypatch):
+    def load_movie_dataset(self):
+        self.movies_df = MOVIES.copy()
+        self.movies_df['genre_mask'] = self.genre_tagger.tag(self.movies_df['overview'])
+
+    monkeypatch.setattr(MovieRecommenderHF, 'load_movie_dataset', load_movie_dataset)
+    monkeypatch.setitem(EMBEDDING_SETTINGS, 'enabled', False)
+    monkeypatch.setitem(EMOTION_PROFILE_SETTINGS, 'enabled', False)
+    recommender = MovieRecommenderHF(snapshot=False)
+
+    # Cluster 0 (sad, angry, fear) holds Tears, Clues, Siege, best base score first;
+    # only Siege's overview reads as fearful
+    profiles = np.tile(one_hot(NEUTRAL), (len(MOVIES), 1))
+    profiles[1] = 0.9 * one_hot(SAD) + 0.1 * one_hot(NEUTRAL)
+    profiles[3] = one_hot(FEAR)
+    recommender.emotion_profiles = profiles
+    return recommender
+
+
+def titles(recommender, rows):
+    return list(recommender.movies_df['title'].iloc[rows])
+
+
+def test_class_profiles_fold_model_labels():
+    labels = ['joy', 'sadness', 'fear', 'love', 'surprise']
+    probabilities = np.array([[0.5, 0.1, 0.1, 0.2, 0.1],
+                              [0.0, 0.0, 1.0, 0.0, 0.0]], dtype=np.float32)
+    mapping = dict(TEXT_EMOTION_MAPPING, surprise=2, love=2)
+
+    profiles = class_profiles(probabilities, labels, mapping)
+    assert profiles.shape == (2, NUM_CLASSES) and profiles.dtype == np.float32
+    np.testing.assert_allclose(profiles[0], [0.1, 0.5, 0.3, 0, 0.1, 0, 0], atol=1e-6)
+    np.testing.assert_allclose(profiles[1], one_hot(FEAR))
+
+    # Labels outside the mapping carry no emotion
+    dropped = class_profiles(probabilities, labels, TEXT_EMOTION_MAPPING)
+    np.testing.assert_allclose(dropped[0].sum(), 0.8, atol=1e-6)
+
+
+def test_validate_distribution():
+    distribution = validate_distribution([0, 0, 0, 0, 1, 0, 0])
+    assert distribution.dtype == np.float32 and distribution.shape == (NUM_CLASSES,)
+
+    for bad in ([1.0, 0.0], np.ones((1, NUM_CLASSES)), [-0.1] + [0.2] * 6, [np.nan] + [0.0] * 6):
+        with pytest.raises(ValueError):
+            validate_distribution(bad)
+
+
+def test_emotion_ranking_puts_matching_profiles_first(recommender):
+    cluster = recommender.emotion_cluster_mapping[FEAR]
+    rows, _ = recommender.cluster_index[cluster]
+    assert titles(recommender, rows) == ['Tears', 'Clues', 'Siege']
+
+    rows, negated = recommender.emotion_candidates(cluster, one_hot(FEAR))
+    assert titles(recommender, rows)[0] == 'Siege'
+    assert (np.diff(negated) >= 0).all()
+
+    # Sad leaves Siege behind the other two
+    rows, _ = recommender.emotion_candidates(cluster, one_hot(SAD))
+    assert titles(recommender, rows) == ['Tears', 'Clues', 'Siege']
+
+    # Unnormalized weights rank like the normalized distribution
+    rows, _ = recommender.emotion_candidates(cluster, 5 * one_hot(FEAR))
+    assert titles(recommender, rows)[0] == 'Siege'
+
+
+def test_emotion_ranking_defaults_to_the_detected_class(recommender):
+    default_rows, _ = recommender.candidates(FEAR, ranking='emotion')
+    rows, _ = recommender.candidates(FEAR, ranking='emotion', emotion_distribution=one_hot(FEAR))
+    assert titles(recommender, default_rows) == titles(recommender, rows)
+
+
+def test_malformed_distribution_is_a_client_error(recommender):
+    with pytest.raises(ValueError):
+        recommender.recommend_movies(FEAR, ranking='emotion', emotion_distribution=[1.0, 0.0])
+
+    # Other rankings never read the distribution
+    recommendations = recommender.recommend_movies(FEAR, num_recommendations=2, ranking='genre',
+                                                   emotion_distribution=[1.0, 0.0])
+    assert len(recommendations) == 2
+
+
+def test_distribution_only_keys_emotion_ranked_pools(recommender):
+    for distribution in (None, one_hot(SAD), one_hot(FEAR)):
+        page = recommender.recommend_movies(FEAR, num_recommendations=1, ranking='genre',
+                                            emotion_distribution=distribution, seed=7)
+    assert len(recommender.pool_cache) == 1
+
+    first = recommender.recommend_movies(FEAR, num_recommendations=1, ranking='emotion',
+                                         emotion_distribution=one_hot(SAD), seed=7)
+    recommender.recommend_movies(FEAR, num_recommendations=1, ranking='emotion',
+                                 emotion_distribution=one_hot(FEAR), seed=7)
+    assert len(recommender.pool_cache) == 3
+
+    # Cursors carry the distribution, so the next page reuses its pool
+    following = recommender.recommend_movies(FEAR, num_recommendations=1, cursor=first.attrs['next_cursor'])
+    assert len(recommender.pool_cache) == 3
+    assert set(following['title']).isdisjoint(first['title'])
+    assert page.attrs['next_cursor'] is not None
+
+
+def test_text_and_image_analyses_carry_class_probabilities(recommender, monkeypatch):
+    pytest.importorskip('transformers')
+    pytest.importorskip('cv2')
+    from face_emotion_hf import FaceEmotionClassifier
+    from services.unified_recommender_hf import UnifiedOTTRecommender
+
+    unified = SimpleNamespace(
+        emotion_labels={FEAR: 'Fear'},
+        text_classifier=SimpleNamespace(labels=['joy', 'fear', 'love'], emotion_mapping=TEXT_EMOTION_MAPPING),
+        movie_recommender=recommender
+    )
+    analysis = UnifiedOTTRecommender.build_text_analysis(unified, FEAR, 0.7, 'fear', (0.2, 0.7, 0.1))
+    assert analysis['emotion_label'] == 'Fear'
+    assert analysis['probabilities'] == [0, 0.2, 0, 0, 0.7, 0, 0]
+    assert 'probabilities' not in UnifiedOTTRecommender.build_text_analysis(unified, 0, 0.0, 'error')
+
+    # The analysis' distribution is used unless one is passed; a bad one is a 400, not an empty list
+    seen = []
+    emotion_candidates = recommender.emotion_candidates
+
+    def spy(cluster, emotion_distribution):
+        seen.append(list(emotion_distribution))
+        return emotion_candidates(cluster, emotion_distribution)
+
+    monkeypatch.setattr(recommender, 'emotion_candidates', spy)
+    results = UnifiedOTTRecommender.recommend_for_emotion(unified, analysis, num_recommendations=1,
+                                                          ranking='emotion')
+    assert len(results['recommendations']) == 1
+    UnifiedOTTRecommender.recommend_for_emotion(unified, analysis, ranking='emotion',
+                                                emotion_distribution=one_hot(SAD))
+    np.testing.assert_allclose(seen, [analysis['probabilities'], one_hot(SAD)], atol=1e-6)
+
+    analysis['probabilities'] = [1.0, 0.0]
+    assert 'error' in UnifiedOTTRecommender.recommend_for_emotion(unified, analysis, ranking='emotion')
+
+    classifier = FaceEmotionClassifier.__new__(FaceEmotionClassifier)
+    classifier.emotion_mapping = FACE_EMOTION_MAPPING
+    faces = [
+        {'box': [0, 0, 40, 40], 'emotion_label': 'fear', 'confidence': 0.6,
+         'scores': {'fear': 0.6, 'sad': 0.4}},
+        {'box': [0, 0, 20, 20], 'emotion_label': 'sad', 'confidence': 0.8,
+         'scores': {'sad': 0.8, 'happy': 0.2}},
+        {'box': [0, 0, 10, 10], 'emotion_label': 'sad', 'confidence': 0.4,
+         'scores': {'sad': 0.4, 'neutral': 0.6}}
+    ]
+    largest = classifier.aggregate_probabilities(faces, 'largest', 'fear')
+    np.testing.assert_allclose(largest, 0.6 * one_hot(FEAR) + 0.4 * one_hot(SAD), atol=1e-6)
+
+    majority = classifier.aggregate_probabilities(faces, 'majority', 'sad')
+    np.testing.assert_allclose(majority, [(0.8 * 0.8 + 0.4 * 0.4) / 1.2, 0.8 * 0.2 / 1.2, 0, 0, 0, 0, 0.4 * 0.6 / 1.2],
+                               atol=1e-6)
+
+    weighted = classifier.aggregate_probabilities(faces, 'weighted_mean', 'sad')
+    assert weighted.shape == (NUM_CLASSES,)
+    np.testing.assert_allclose(weighted.sum(), 1.0, atol=1e-6)
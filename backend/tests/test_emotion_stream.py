@@ -0,0 +1,74 @@
+"""Live stream state: EMA smoothing and frame sampling/dropping"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.emotion_stream import EmotionSmoother, EmotionStreamSession
+
+HAPPY = np.eye(7)[1]
+SAD = np.eye(7)[0]
+
+
+def test_smoother_converges_to_a_steady_signal():
+    smoother = EmotionSmoother(alpha=0.3)
+    assert smoother.update(SAD)  # first frame always counts as a change
+    for _ in range(30):
+        smoother.update(HAPPY)
+
+    np.testing.assert_allclose(smoother.probabilities, HAPPY, atol=1e-4)
+    assert smoother.emotion_class == 1 and smoother.confidence == pytest.approx(1.0, abs=1e-4)
+
+
+def test_smoother_switches_class_only_after_enough_evidence():
+    smoother = EmotionSmoother(alpha=0.3)
+    smoother.update(SAD)
+    # 0.7 of sad survives one happy frame, 0.49 survives two
+    assert not smoother.update(HAPPY)
+    assert smoother.emotion_class == 0
+    assert smoother.update(HAPPY)
+    assert smoother.emotion_class == 1
+    assert not smoother.update(HAPPY)
+
+    smoother.reset()
+    assert smoother.probabilities is None and smoother.confidence == 0.0
+    assert smoother.update(SAD)
+
+
+def test_smoother_rejects_invalid_alpha():
+    for alpha in (0.0, -0.1, 1.5):
+        with pytest.raises(ValueError):
+            EmotionSmoother(alpha)
+    smoother = EmotionSmoother(alpha=1.0)
+    smoother.update(SAD)
+    assert smoother.update(HAPPY)  # alpha 1.0 means no smoothing
+
+
+def test_session_samples_every_nth_frame():
+    async def scenario():
+        session = EmotionStreamSession(frame_stride=3)
+        kept = [session.offer(f'frame{i}') for i in range(7)]
+        return kept, await session.next_frame(), session.stats()
+
+    kept, (index, frame), stats = asyncio.run(scenario())
+    assert kept == [True, False, False, True, False, False, True]
+    # Frames 0 and 3 were replaced while waiting; only the newest is handed out
+    assert (index, frame) == (6, 'frame6')
+    assert stats['received'] == 7 and stats['skipped'] == 4 and stats['dropped'] == 2
+
+
+def test_session_hands_out_each_frame_once():
+    async def scenario():
+        session = EmotionStreamSession(frame_stride=1)
+        session.offer('a')
+        first = await session.next_frame()
+        waiting = asyncio.ensure_future(session.next_frame())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()  # nothing new yet
+        session.offer('b')
+        return first, await asyncio.wait_for(waiting, 1), session.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first == (0, 'a') and second == (1, 'b')
+    assert stats['dropped'] == 0 and stats['skipped'] == 0
@@ -0,0 +1,39 @@
+"""Batch face preprocessing matches the model's image processor"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('torch')
+transformers = pytest.importorskip('transformers')
+
+from face_emotion_hf import FaceEmotionClassifier
+
+
+def _classifier(processor):
+    classifier = FaceEmotionClassifier.__new__(FaceEmotionClassifier)
+    classifier.configure_preprocessing(processor)
+    return classifier
+
+
+@pytest.mark.parametrize('shape', [(300, 200, 3), (48, 60, 3), (224, 224, 3), (90, 120)])
+def test_preprocess_batch_matches_the_image_processor(shape):
+    processor = transformers.ViTImageProcessor()
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=shape, dtype=np.uint8)
+    rgb = image[..., ::-1] if image.ndim == 3 else np.repeat(image[..., None], 3, axis=2)
+
+    expected = processor(images=[np.ascontiguousarray(rgb)], return_tensors='np')['pixel_values']
+    actual = _classifier(processor).preprocess_batch([image])
+
+    assert actual.shape == expected.shape == (1, 3, 224, 224)
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+
+def test_preprocess_batch_follows_processor_size_and_normalization():
+    processor = transformers.ViTImageProcessor(size={'height': 32, 'width': 48}, do_normalize=False)
+    image = np.full((64, 64, 3), 255, dtype=np.uint8)
+
+    pixels = _classifier(processor).preprocess_batch([image, image])
+    assert pixels.shape == (2, 3, 32, 48)
+    np.testing.assert_allclose(pixels, 1.0, atol=1e-6)
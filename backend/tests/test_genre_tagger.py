@@ -0,0 +1,54 @@
+"""The vectorized genre tagger must tag exactly like the per-row reference"""
+
+import numpy as np
+import pandas as pd
+
+from genre_tagger import GENRE_KEYWORDS, GenreTagger, extract_genres_reference
+
+
+def _synthetic_overviews(size, seed=0):
+    rng = np.random.default_rng(seed)
+    keywords = [keyword for words in GENRE_KEYWORDS.values() for keyword in words]
+    filler = "the a young city secret home after his her when must find village past".split()
+    texts = []
+    for _ in range(size):
+        words = list(rng.choice(filler, size=rng.integers(5, 30)))
+        for _ in range(rng.integers(0, 5)):
+            words.insert(rng.integers(0, len(words) + 1), str(rng.choice(keywords)).upper())
+        texts.append(' '.join(words))
+    return texts
+
+
+def _assert_matches_reference(overviews):
+    tagger = GenreTagger()
+    masks = tagger.tag(pd.Series(overviews, dtype=object))
+    for text, mask in zip(overviews, masks):
+        assert tagger.decode(mask) == extract_genres_reference(text), text
+
+
+def test_matches_reference_on_random_overviews():
+    _assert_matches_reference(_synthetic_overviews(2000))
+
+
+def test_matches_reference_on_edge_cases():
+    keyword = next(iter(GENRE_KEYWORDS.values()))[0]
+    _assert_matches_reference([
+        None,
+        '',
+        keyword,  # keyword is the whole text
+        f"ends with {keyword}",
+        keyword[:-1],  # truncated keyword at the end of the corpus
+        f"{keyword[:2]}\0{keyword[2:]}",  # NUL inside a text must not join a match
+        f"İstanbul {keyword} Ärger",  # lowercasing changes byte lengths
+        ' '.join(words[0] for words in GENRE_KEYWORDS.values()),  # more than max_genres
+    ])
+
+
+def test_empty_input():
+    assert len(GenreTagger().tag([])) == 0
+
+
+def test_encode_decode_round_trip():
+    tagger = GenreTagger()
+    genres = list(GENRE_KEYWORDS)[:3]
+    assert tagger.decode(tagger.encode(genres)) == genres
@@ -0,0 +1,111 @@
+"""Bounded executor: load shedding, deadlines and metrics (thread workers)"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.inference_executor import BoundedInferenceExecutor, DeadlineExceeded, ExecutorSaturated
+
+
+class Blocker:
+    """Blocking job that waits until released and records what ran"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+
+    def __call__(self, name):
+        self.started.append(name)
+        self.release.wait(10)
+        return name
+
+
+async def _settle(executor):
+    # Slots are freed by a done callback on the worker thread
+    for _ in range(200):
+        if executor.stats()['inflight'] == 0:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_full_queue_is_rejected_immediately():
+    async def scenario():
+        executor = BoundedInferenceExecutor(max_workers=1, max_queue=1, default_timeout=None)
+        job = Blocker()
+        running = asyncio.ensure_future(executor.run(job, 'running'))
+        queued = asyncio.ensure_future(executor.run(job, 'queued'))
+        await asyncio.sleep(0.05)
+        assert executor.queue_depth() == 1
+
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(job, 'rejected')
+
+        job.release.set()
+        assert await asyncio.gather(running, queued) == ['running', 'queued']
+        await _settle(executor)
+        executor.shutdown()
+        return executor.stats(), job.started
+
+    stats, started = asyncio.run(scenario())
+    assert started == ['running', 'queued']
+    assert stats['rejected'] == 1 and stats['submitted'] == 2 and stats['completed'] == 2
+    assert stats['max_inflight_seen'] == 2 and stats['queue_depth'] == 0
+
+
+def test_deadline_exceeded_and_expired_jobs_are_skipped():
+    async def scenario():
+        executor = BoundedInferenceExecutor(max_workers=1, max_queue=4, default_timeout=None)
+        job = Blocker()
+        with pytest.raises(DeadlineExceeded):
+            await executor.run(job, 'slow', timeout=0.05)
+        # The slow job still holds the only worker, so this one expires in the queue
+        with pytest.raises(DeadlineExceeded):
+            await executor.run(job, 'expired', timeout=0.05)
+
+        job.release.set()
+        await _settle(executor)
+        executor.shutdown()
+        return executor.stats(), job.started
+
+    stats, started = asyncio.run(scenario())
+    assert started == ['slow']
+    assert stats['timed_out'] == 2
+    assert stats['completed'] == 1 and stats['failed'] == 1 and stats['inflight'] == 0
+
+
+def test_non_positive_timeouts_are_rejected():
+    with pytest.raises(ValueError):
+        BoundedInferenceExecutor(default_timeout=0)
+
+    async def scenario():
+        executor = BoundedInferenceExecutor(default_timeout=None)
+        with pytest.raises(ValueError):
+            await executor.run(time.sleep, 0, timeout=-1)
+        executor.shutdown()
+        return executor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['submitted'] == 0 and stats['inflight'] == 0
+
+
+def test_stats_report_wait_times():
+    async def scenario():
+        executor = BoundedInferenceExecutor(max_workers=1, max_queue=8)
+        job = Blocker()
+        first = asyncio.ensure_future(executor.run(job, 'first'))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(executor.run(job, 'second'))
+        await asyncio.sleep(0.1)
+        job.release.set()
+        await asyncio.gather(first, second)
+        await _settle(executor)
+        executor.shutdown()
+        return executor.stats()
+
+    stats = asyncio.run(scenario())
+    # The second job waited for the first to finish
+    assert stats['wait_ms_max'] >= 50
+    assert stats['wait_ms_p50'] <= stats['wait_ms_p95'] <= stats['wait_ms_max']
+    assert stats['completed'] == 2 and stats['kind'] == 'thread'
@@ -0,0 +1,134 @@
+"""MovieRecommenderHF candidate indexes, built over a small synthetic catalog"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('datasets')
+
+from embedding_index import EmbeddingIndex, normalize_rows
+from models_config import EMBEDDING_SETTINGS
+from movie_recommender_hf import MovieRecommenderHF
+
+MOVIES = pd.DataFrame({
+    'title': ['Laughs', 'Tears', 'Night', 'Siege', 'Hearts', 'Clues'],
+    'overview': ['a funny comedy', 'a tragic tale', 'a scary monster', 'an epic battle',
+                 'a tale of love', 'a detective hunt'],
+    'rating': [8.0, 9.0, 7.5, 7.2, 8.8, 7.9],
+    'year': [2001, 1995, 2020, 2010, 2015, 2005]
+})
+
+
+@pytest.fixture
+def recommender(monkeypatch):
+    def load_movie_dataset(self):
+        self.movies_df = MOVIES.copy()
+        self.movies_df['genre_mask'] = self.genre_tagger.tag(self.movies_df['overview'])
+
+    monkeypatch.setattr(MovieRecommenderHF, 'load_movie_dataset', load_movie_dataset)
+    # No offline artifacts; tests that need embeddings install them directly
+    monkeypatch.setitem(EMBEDDING_SETTINGS, 'enabled', False)
+    return MovieRecommenderHF(snapshot=False)
+
+
+def test_cluster_index_holds_matching_rows_best_first(recommender):
+    scores = recommender.base_scores(recommender.movies_df)
+    genres = [set(g) for g in recommender.genre_tagger.decode_many(recommender.movies_df['genre_mask'])]
+
+    for cluster, preferred in recommender.cluster_genre_mapping.items():
+        rows, negated = recommender.cluster_index[cluster]
+        expected = {i for i, movie_genres in enumerate(genres) if movie_genres & set(preferred)}
+        assert set(rows.tolist()) == expected
+        np.testing.assert_allclose(negated, -scores[rows])
+        assert (np.diff(negated) >= 0).all()
+
+    # 'Night' (horror) is in no cluster; recency lets 'Hearts' (8.8, 2015) beat 'Tears' (9.0, 1995)
+    assert all(2 not in rows for rows, _ in recommender.cluster_index.values())
+    leaders = [MOVIES['title'].iloc[recommender.cluster_index[c][0][0]] for c in (0, 1, 2)]
+    assert leaders == ['Tears', 'Hearts', 'Laughs']
+
+
+def test_cluster_without_matches_falls_back_to_every_movie(recommender):
+    recommender.cluster_genre_mapping[3] = ['documentary']
+    recommender.build_cluster_index()
+    rows, _ = recommender.cluster_index[3]
+    assert sorted(rows.tolist()) == list(range(len(MOVIES)))
+
+    recommender.movies_df = recommender.movies_df.iloc[:0]
+    recommender.build_cluster_index()
+    assert recommender.cluster_index == {}
+
+
+def test_recommendations_come_from_the_emotion_cluster(recommender):
+    happy_cluster = recommender.emotion_cluster_mapping[1]
+    rows, _ = recommender.cluster_index[happy_cluster]
+    titles = set(MOVIES['title'].iloc[rows])
+
+    recommendations = recommender.recommend_movies(1, num_recommendations=2)
+    assert len(recommendations) == 2
+    assert set(recommendations['title']) <= titles
+
+
+def test_movie_info_returns_rounded_floats(recommender):
+    recommender.movies_df['rating'] = np.float32([8.0, 9.2436771, 7.5, 7.2, 8.8, 7.9])
+    info = recommender.get_movie_info('tears')
+    assert info['title'] == 'Tears' and info['rating'] == 9.24
+    assert info['genres'] == ['drama'] and 'genre_mask' not in info
+
+    recommendations = recommender.recommend_movies(1, num_recommendations=10)
+    assert set(recommendations['rating']) <= {8.0, 9.24, 7.5, 7.2, 8.8, 7.9}
+
+
+def test_batch_movie_info_returns_rounded_floats(recommender):
+    recommender.movies_df['rating'] = np.float32([8.0, 9.2436771, 7.5, 7.2, 8.8, 7.9])
+    infos = recommender.get_movies_info(['TEARS', 'missing', 'Hearts'], [1995, None, None])
+    assert [info.get('title') for info in infos] == ['Tears', None, 'Hearts']
+    assert infos[0]['rating'] == 9.24 and infos[2]['rating'] == 8.8
+    assert infos[1] == {}
+
+
+def _install_embeddings(recommender, monkeypatch, mood_candidates=4):
+    """One-hot overview embeddings; each emotion's mood vector points at one movie"""
+    monkeypatch.setitem(EMBEDDING_SETTINGS, 'mood_candidates', mood_candidates)
+    vectors = np.eye(len(MOVIES), 8, dtype=np.float16)
+    mood_vectors = np.zeros((7, 8), dtype=np.float32)
+    # sad -> 'Siege' (cluster 0), happy -> 'Laughs' (cluster 2), neutral -> 'Night' (horror, no cluster)
+    for emotion, row in {0: 3, 1: 0, 2: 0, 3: 3, 4: 3, 5: 4, 6: 2}.items():
+        mood_vectors[emotion, row] = 1.0
+        mood_vectors[emotion, (row + 1) % len(MOVIES)] = 0.1
+    recommender.embedding_index = EmbeddingIndex(vectors)
+    recommender.mood_vectors = normalize_rows(mood_vectors)
+    recommender.build_mood_index()
+
+
+def test_mood_index_keeps_nearest_in_cluster_rows(recommender, monkeypatch):
+    _install_embeddings(recommender, monkeypatch)
+    assert recommender.available_rankings() == ['genre', 'mood']
+
+    for emotion, (rows, negated) in recommender.mood_index.items():
+        cluster_rows = recommender.cluster_index[recommender.emotion_cluster_mapping[emotion]][0]
+        assert np.isin(rows, cluster_rows).all()
+        assert (np.diff(negated) >= 0).all()
+
+    # Mood similarity outweighs the base score: 'Siege' leads for sad even though 'Tears' rates higher
+    assert MOVIES['title'].iloc[recommender.mood_index[0][0][0]] == 'Siege'
+    assert MOVIES['title'].iloc[recommender.mood_index[1][0][0]] == 'Laughs'
+
+
+def test_emotion_without_mood_candidates_falls_back_to_its_cluster(recommender, monkeypatch):
+    # With one candidate each, neutral's only neighbour ('Night') is outside its cluster
+    _install_embeddings(recommender, monkeypatch, mood_candidates=1)
+    assert 6 not in recommender.mood_index and 0 in recommender.mood_index
+
+    cluster = recommender.emotion_cluster_mapping[6]
+    rows, _ = recommender.candidates(6, ranking='mood')
+    assert np.array_equal(rows, recommender.cluster_index[cluster][0])
+    assert len(recommender.recommend_movies(6, num_recommendations=2, ranking='mood')) == 2
+
+
+def test_mood_ranking_needs_embeddings(recommender):
+    assert recommender.available_rankings() == ['genre']
+    with pytest.raises(ValueError):
+        recommender.candidates(0, ranking='mood')
+    with pytest.raises(ValueError):
+        recommender.candidates(0, ranking='popularity')
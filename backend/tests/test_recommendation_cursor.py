@@ -0,0 +1,78 @@
+"""Cursor round trip, validation and pool caching"""
+
+import base64
+import json
+
+import numpy as np
+import pytest
+
+from recommendation_cursor import PoolCache, decode_cursor, encode_cursor, seed_from
+
+STATE = {'catalog': 'v1', 'emotion': 3, 'ranking': 'genre', 'distribution': None, 'seed': 2 ** 63 - 1, 'offset': 20}
+
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor(STATE), 'v1') == STATE
+
+
+def test_distribution_round_trips_exactly():
+    distribution = np.random.default_rng(0).dirichlet(np.ones(7)).astype(np.float32)
+    state = {**STATE, 'ranking': 'emotion', 'distribution': distribution.tolist()}
+    decoded = decode_cursor(encode_cursor(state), 'v1')
+    assert decoded['distribution'].dtype == np.float32
+    assert decoded['distribution'].tobytes() == distribution.tobytes()
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor({**STATE, 'ranking': '??>>~~'})
+    assert set(cursor) <= set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    'not base64 !!',
+    _raw_cursor([1, 2]),
+    _raw_cursor({'v': 1}),
+    _raw_cursor({'v': 1, 'emotion': 1}),
+    _raw_cursor({k: v for k, v in {'v': 1, **STATE}.items() if k != 'catalog'}),
+    _raw_cursor({'v': 99, **STATE}),
+    _raw_cursor({'v': 1, **STATE, 'offset': -5}),
+    _raw_cursor({'v': 1, **STATE, 'seed': 'abc'}),
+    _raw_cursor({'v': 1, **STATE, 'ranking': 'emotion', 'distribution': [0.5, 0.5]}),
+    _raw_cursor({'v': 1, **STATE, 'ranking': 'emotion', 'distribution': [-1, 1, 1, 0, 0, 0, 0]}),
+])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 'v1')
+
+
+def test_stale_catalog_version_is_rejected():
+    with pytest.raises(ValueError, match="another catalog version"):
+        decode_cursor(encode_cursor(STATE), 'v2')
+
+
+def test_seed_from_is_stable_and_type_insensitive():
+    assert seed_from(42) == seed_from('42')
+    assert seed_from('session-a') != seed_from('session-b')
+    assert 0 <= seed_from('x') < 2 ** 64
+
+
+def test_pool_cache_evicts_least_recently_used():
+    cache = PoolCache(max_entries=2)
+    keys = [PoolCache.key('v1', emotion, 'genre', None, 1) for emotion in range(3)]
+    cache.put(keys[0], np.arange(3))
+    cache.put(keys[1], np.arange(3))
+    cache.get(keys[0])
+    cache.put(keys[2], np.arange(3))
+    assert cache.get(keys[1]) is None and cache.get(keys[0]) is not None and len(cache) == 2
+
+
+def test_pool_cache_key_distinguishes_distributions():
+    first = PoolCache.key('v1', 1, 'emotion', np.array([0.5, 0.5]), 1)
+    second = PoolCache.key('v1', 1, 'emotion', np.array([0.6, 0.4]), 1)
+    assert first != second
+    assert first == PoolCache.key('v1', 1, 'emotion', [0.5, 0.5], 1)
@@ -0,0 +1,70 @@
+"""Pre-encoded JSON records must decode to exactly what to_dict('records') gives"""
+
+import json
+
+import numpy as np
+import pytest
+
+import record_encoder
+from record_encoder import RECORD_FIELDS, RecordEncoder, dumps, select_fields
+
+# Output-ready columns, as MovieRecommenderHF.build_record_encoder produces them
+COLUMNS = {
+    'title': ['Amélie', 'Quote "this"', 'Back\\slash', None],
+    'rating': [8.3, 7.0, 9.25, 7.5],
+    'year': [2001, 1999, 2010, 2020],
+    'genres': [['romance'], ['drama', 'comedy'], [], ['horror']],
+    'overview': ['Paris 🥐', 'Line\nbreak', '', None]
+}
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    if request.param == 'json':
+        monkeypatch.setattr(record_encoder, 'orjson', None)
+    elif record_encoder.orjson is None:
+        pytest.skip("orjson not installed")
+    return RecordEncoder.build(COLUMNS)
+
+
+def _expected(positions, fields=RECORD_FIELDS):
+    return [{field: COLUMNS[field][position] for field in fields} for position in positions]
+
+
+def test_records_decode_to_the_catalog_rows(encoder):
+    positions = [2, 0, 3, 1]
+    assert json.loads(encoder.encode(positions)) == _expected(positions)
+
+
+def test_records_are_byte_identical_to_encoding_the_dicts(encoder):
+    positions = [1, 3, 0]
+    assert encoder.encode(positions) == dumps(_expected(positions))
+
+
+def test_field_subsets_keep_the_requested_order(encoder):
+    fields = ('year', 'title')
+    decoded = json.loads(encoder.encode(np.array([1, 0]), fields))
+    assert decoded == _expected([1, 0], fields)
+    assert list(decoded[0]) == list(fields)
+
+
+def test_empty_selection_of_rows(encoder):
+    assert encoder.encode([]) == b'[]'
+
+
+def test_arrays_round_trip_is_byte_identical(encoder):
+    rebuilt = RecordEncoder.from_arrays(encoder.to_arrays())
+    assert rebuilt.encode([3, 1, 2]) == encoder.encode([3, 1, 2])
+
+
+def test_select_fields():
+    assert select_fields(None) == RECORD_FIELDS
+    assert select_fields('title, year') == ('title', 'year')
+    with pytest.raises(ValueError):
+        select_fields(['title', 'budget'])
+    with pytest.raises(ValueError):
+        select_fields('')
+
+
+def test_dumps_handles_numpy_values():
+    assert json.loads(dumps({'a': np.float32(0.5), 'b': np.int64(3), 'c': np.arange(2)})) == {'a': 0.5, 'b': 3, 'c': [0, 1]}
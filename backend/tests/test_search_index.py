@@ -0,0 +1,85 @@
+"""BM25 inverted index: ranking, prefix matching, merge paths and round trip"""
+
+import numpy as np
+import pytest
+
+import search_index
+from search_index import SearchIndex, synthetic_catalog, tokenize
+
+TITLES = ['Star Wars', 'The Dark Knight', 'Love Story', 'Starship Troopers', 'A (Weird) Title [1999]']
+OVERVIEWS = [
+    'A farm boy joins a rebellion against the empire.',
+    'Batman faces the Joker in Gotham.',
+    'A love story between two students.',
+    'Soldiers fight giant bugs in space.',
+    'Nothing about stars here, only wars of words.'
+]
+RATINGS = [8.6, 9.0, 7.1, 7.3, 7.0]
+
+
+@pytest.fixture
+def index():
+    return SearchIndex.build(TITLES, OVERVIEWS, RATINGS)
+
+
+def test_tokenize_normalizes_case_and_unicode():
+    assert tokenize('ＳＴＡＲ  Wars!') == ['star', 'wars']
+    assert tokenize(None) == []
+
+
+def test_title_match_ranks_first(index):
+    positions, scores = index.search('star wars', limit=5, prefix=False)
+    assert positions[0] == 0
+    assert (np.diff(scores) <= 0).all()
+
+
+def test_prefix_matches_the_last_token(index):
+    positions, _ = index.search('star', limit=5, prefix=True)
+    assert {0, 3} <= set(positions.tolist())
+    positions, _ = index.search('starsh', limit=5, prefix=False)
+    assert len(positions) == 0
+
+
+def test_regex_metacharacters_are_plain_text(index):
+    for query in ['(weird', '[1999', '.*', '\\']:
+        index.search(query)
+    positions, _ = index.search('(weird)', prefix=False)
+    assert positions.tolist() == [4]
+
+
+def test_rating_breaks_ties():
+    index = SearchIndex.build(['same title', 'same title'], ['', ''], [7.0, 9.0])
+    positions, scores = index.search('same title', prefix=False)
+    assert scores[0] == scores[1] and positions.tolist() == [1, 0]
+
+
+def test_dense_and_sparse_merges_agree(monkeypatch):
+    titles, overviews, ratings = synthetic_catalog(3000, np.random.default_rng(0))
+    index = SearchIndex.build(titles, overviews, ratings)
+    for query in ['word1 word2', 'star wars', 'wor', 'dark kni']:
+        monkeypatch.setattr(search_index, 'DENSE_MERGE_RATIO', 10 ** 9)
+        dense = index.search(query, limit=20)
+        monkeypatch.setattr(search_index, 'DENSE_MERGE_RATIO', 0)
+        sparse = index.search(query, limit=20)
+        np.testing.assert_allclose(dense[1], sparse[1], rtol=1e-5)
+        assert set(dense[0].tolist()) == set(sparse[0].tolist())
+
+
+def test_arrays_round_trip(index):
+    rebuilt = SearchIndex.from_arrays(index.to_arrays(), RATINGS)
+    for query in ['star wars', 'love', 'bat']:
+        expected, got = index.search(query), rebuilt.search(query)
+        assert np.array_equal(expected[0], got[0])
+        np.testing.assert_array_equal(expected[1], got[1])
+
+
+def test_prefix_expansion_always_keeps_the_exact_term(monkeypatch):
+    monkeypatch.setattr(search_index, 'MAX_PREFIX_EXPANSIONS', 3)
+    # 'car' appears once, each longer completion several times
+    overviews = ['car'] + ['cart carton cargo cartel'] * 4
+    index = SearchIndex.build([f'Movie {i}' for i in range(5)], overviews, [7.0] * 5)
+
+    expanded = [index.terms[term_id] for term_id in index._expand_prefix('car')]
+    assert len(expanded) == 3 and expanded[0] == 'car'
+    positions, _ = index.search('car', limit=5, prefix=True)
+    assert 0 in positions.tolist()
@@ -0,0 +1,51 @@
+"""
+Parity of the optimized text backends with the fp32 PyTorch model
+
+Needs torch, transformers and the model weights; the ONNX case also needs
+onnxruntime and an export for the current key (models/text_backends.py
+export). Missing pieces skip rather than fail.
+"""
+
+import os
+import numpy as np
+import pytest
+
+import text_backends
+from models_config import TEXT_EMOTION_MODEL, TEXT_INFERENCE_SETTINGS
+
+
+def _parity(backend_name):
+    pytest.importorskip('torch')
+    pytest.importorskip('transformers')
+    try:
+        return text_backends.check_parity(backend_name)
+    except OSError as e:
+        pytest.skip(f"Model weights unavailable: {e}")
+
+
+def test_softmax_rows_sum_to_one():
+    logits = np.array([[1.0, 2.0, 3.0], [1000.0, 0.0, -1000.0]])
+    probabilities = text_backends.softmax(logits)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+    assert probabilities.argmax(axis=1).tolist() == [2, 0]
+
+
+def test_int8_matches_fp32():
+    report = _parity('pytorch_int8')
+    assert report['top1_agreement'] == 1.0, report['mismatched_texts']
+    assert report['max_abs_prob_diff'] <= TEXT_INFERENCE_SETTINGS['parity_atol']
+
+
+def test_onnx_matches_fp32():
+    pytest.importorskip('onnxruntime')
+    if not os.path.exists(text_backends.onnx_artifact_path(TEXT_EMOTION_MODEL)):
+        pytest.skip("No ONNX export for the current key (run models/text_backends.py export)")
+    report = _parity('onnx')
+    assert report['top1_agreement'] == 1.0, report['mismatched_texts']
+    assert report['max_abs_prob_diff'] <= TEXT_INFERENCE_SETTINGS['parity_atol']
+
+
+def test_export_key_changes_artifact_path(monkeypatch):
+    path = text_backends.onnx_artifact_path(TEXT_EMOTION_MODEL)
+    monkeypatch.setitem(TEXT_INFERENCE_SETTINGS, 'onnx_opset', TEXT_INFERENCE_SETTINGS['onnx_opset'] + 1)
+    assert text_backends.onnx_artifact_path(TEXT_EMOTION_MODEL) != path
@@ -0,0 +1,97 @@
+"""Text micro-batching: batch size and wait window, queue bound and deadlines"""
+
+import asyncio
+import threading
+
+import pytest
+
+from services.inference_executor import DeadlineExceeded, ExecutorSaturated
+from services.text_batcher import TextEmotionBatcher
+
+
+class FakeClassifier:
+    """predict_batch stand-in that records batch sizes, optionally blocking until released"""
+
+    def __init__(self, block=False):
+        self.batches = []
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.release.wait(10)
+        return [(len(text), 1.0, text) for text in texts]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    classifier = FakeClassifier()
+
+    async def scenario():
+        batcher = TextEmotionBatcher(classifier, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.predict('x' * n) for n in range(1, 11)))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert [label for _, _, label in results] == ['x' * n for n in range(1, 11)]
+    assert [len(batch) for batch in classifier.batches] == [4, 4, 2]
+    assert stats['batches_run'] == 3 and stats['texts_processed'] == 10
+
+
+def test_partial_batch_runs_when_the_wait_window_closes():
+    classifier = FakeClassifier()
+
+    async def scenario():
+        batcher = TextEmotionBatcher(classifier, max_batch_size=16, max_wait_ms=20)
+        first = await batcher.predict('alone')
+        # Arrives long after the first batch closed, so it gets a batch of its own
+        second = await batcher.predict('later')
+        await batcher.stop()
+        return first, second
+
+    assert asyncio.run(scenario()) == ((5, 1.0, 'alone'), (5, 1.0, 'later'))
+    assert classifier.batches == [['alone'], ['later']]
+
+
+def test_full_queue_is_rejected():
+    classifier = FakeClassifier(block=True)
+
+    async def scenario():
+        batcher = TextEmotionBatcher(classifier, max_batch_size=1, max_wait_ms=0, max_queue=1)
+        running = asyncio.ensure_future(batcher.predict('running'))
+        await asyncio.sleep(0.05)  # taken off the queue, blocked in the classifier
+        queued = asyncio.ensure_future(batcher.predict('queued'))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturated):
+            await batcher.predict('rejected')
+
+        classifier.release.set()
+        results = await asyncio.gather(running, queued)
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert [label for _, _, label in results] == ['running', 'queued']
+    assert stats['rejected'] == 1 and stats['texts_processed'] == 2
+
+
+def test_texts_past_their_deadline_are_dropped():
+    classifier = FakeClassifier(block=True)
+
+    async def scenario():
+        batcher = TextEmotionBatcher(classifier, max_batch_size=1, max_wait_ms=0, timeout=0.05)
+        with pytest.raises(DeadlineExceeded):
+            await batcher.predict('slow')
+        # Queued behind the blocked batch until its deadline passes
+        with pytest.raises(DeadlineExceeded):
+            await batcher.predict('expired')
+
+        classifier.release.set()
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        return batcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert classifier.batches == [['slow']]
+    assert stats['timed_out'] == 2
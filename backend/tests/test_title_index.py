@@ -0,0 +1,40 @@
+"""Normalized title lookups"""
+
+import numpy as np
+
+from title_index import TitleIndex, normalize_title
+
+TITLES = ['The Matrix', 'Amélie', 'the  matrix', None, 'ＡＢＣ', 'Straße']
+YEARS = np.array([1999, 2001, 2021, 2000, 2010, 2015])
+
+
+def test_normalize_title():
+    assert normalize_title('  The   MATRIX ') == 'the matrix'
+    assert normalize_title('ＡＢＣ') == 'abc'
+    assert normalize_title('STRASSE') == normalize_title('Straße')
+    assert normalize_title(None) == ''
+
+
+def test_lookup_is_case_unicode_and_whitespace_insensitive():
+    index = TitleIndex(TITLES, YEARS)
+    assert index.lookup('THE MATRIX') == [0, 2]
+    assert index.first('amélie') == 1
+    assert index.first('Ame\u0301lie') == 1  # decomposed accent
+    assert index.first('abc') == 4
+    assert index.first('strasse') == 5
+    assert index.lookup('unknown') == []
+
+
+def test_year_picks_between_duplicates():
+    index = TitleIndex(TITLES, YEARS)
+    assert index.first('the matrix', year=2021) == 2
+    assert index.first('the matrix', year=1950) is None
+
+
+def test_lookup_many_matches_single_lookups():
+    index = TitleIndex(TITLES, YEARS)
+    queries = ['the matrix', 'AMÉLIE', 'missing', 'The Matrix', '']
+    years = [None, None, None, 2021, None]
+    expected = [index.first(title, year) for title, year in zip(queries, years)]
+    expected = [-1 if row is None else row for row in expected]
+    assert index.lookup_many(queries, years).tolist() == expected
@@ -0,0 +1,51 @@
+"""Jittered pool window math and seeded pool ordering"""
+
+import numpy as np
+
+from topk_sampler import jittered_pool, pool_order, sample_without_replacement
+
+
+def _presorted(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.sort(-rng.uniform(5.0, 7.0, size))
+
+
+def test_rows_outside_the_window_could_never_enter_the_pool():
+    negated = _presorted(5000)
+    pool_size, jitter = 200, 0.1
+    pool, jittered = jittered_pool(negated, pool_size, jitter, np.random.default_rng(1))
+    assert len(pool) == pool_size and len(set(pool.tolist())) == pool_size
+
+    # The pool is the best pool_size of the jittered window...
+    boundary = np.sort(jittered[pool])[0]
+    assert (np.delete(jittered, pool) <= boundary).all()
+    # ...and even maximal jitter can't lift a row past the window above that boundary
+    outside = -negated[len(jittered):] + jitter
+    assert (outside <= boundary).all()
+
+
+def test_small_candidate_lists_keep_every_row():
+    negated = _presorted(7)
+    pool, _ = jittered_pool(negated, 200, 0.1, np.random.default_rng(0))
+    assert sorted(pool.tolist()) == list(range(7))
+    assert len(jittered_pool(negated[:0], 200, 0.1, np.random.default_rng(0))[0]) == 0
+
+
+def test_pool_order_is_deterministic_and_a_permutation_of_the_pool():
+    negated = _presorted(5000)
+    first = pool_order(negated, np.random.default_rng(42))
+    assert np.array_equal(first, pool_order(negated, np.random.default_rng(42)))
+    assert not np.array_equal(first, pool_order(negated, np.random.default_rng(43)))
+
+    pool, _ = jittered_pool(negated, 200, 0.1, np.random.default_rng(42))
+    assert sorted(first.tolist()) == sorted(pool.tolist())
+
+
+def test_sample_without_replacement():
+    rng = np.random.default_rng(0)
+    drawn = sample_without_replacement(10, rng, size=50)
+    assert len(set(drawn.tolist())) == 10 and drawn.max() < 50
+    assert len(sample_without_replacement(10, rng, size=3)) == 3
+    # Zero-weight items are only drawn once everything else is exhausted
+    weights = np.array([0.0, 1.0, 1.0])
+    assert 0 not in sample_without_replacement(2, rng, weights).tolist()